@@ -75,6 +75,17 @@ bool xorn_revision_is_transient(xorn_revision_t rev);
 void xorn_finalize_revision(xorn_revision_t rev);
 void xorn_free_revision(xorn_revision_t rev);
 
+/* memory usage */
+
+struct xorn_memory_usage {
+	size_t reserved;	/* bytes reserved for internal data */
+	size_t used;		/* bytes of internal data in use */
+	size_t objects;		/* number of distinct object states */
+	size_t strings;		/* bytes of string data */
+};
+
+void xorn_get_memory_usage(struct xorn_memory_usage *usage);
+
 /* object functions */
 
 bool xorn_object_exists_in_revision(
@@ -87,10 +98,16 @@ int xorn_get_object_location(
 	xorn_revision_t rev, xorn_object_t ob,
 	xorn_object_t *attached_to_return,
 	unsigned int *position_return);
+int xorn_get_object_locations(
+	xorn_revision_t rev, const xorn_object_t *objects, size_t count,
+	xorn_object_t *attached_to_return,
+	unsigned int *positions_return);
 
 int xorn_get_objects(
 	xorn_revision_t rev,
 	xorn_object_t **objects_return, size_t *count_return);
+xorn_object_t xorn_get_next_object(
+	xorn_revision_t rev, xorn_object_t ob);
 int xorn_get_objects_attached_to(
 	xorn_revision_t rev, xorn_object_t ob,
 	xorn_object_t **objects_return, size_t *count_return);
@@ -141,6 +158,10 @@ void xorn_free_selection(
 xorn_object_t xorn_add_object(xorn_revision_t rev,
 			      xorn_obtype_t type, const void *data,
 			      xorn_error_t *err);
+int xorn_add_objects(xorn_revision_t rev, size_t count,
+		     const xorn_obtype_t *types, const void *const *data,
+		     const ptrdiff_t *attach_to, xorn_object_t *objects_return,
+		     xorn_error_t *err);
 int xorn_set_object_data(xorn_revision_t rev, xorn_object_t ob,
 			 xorn_obtype_t type, const void *data,
 			 xorn_error_t *err);
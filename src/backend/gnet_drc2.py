@@ -221,6 +221,8 @@ pintype_names = [
     'unknown', 'in', 'out', 'io', 'oc', 'oe', 'pas', 'tp', 'tri', 'clk', 'pwr',
     'unconnected'
 ]
+pintype_positions = dict((name, position)
+                         for position, name in enumerate(pintype_names))
 descriptive_pintype_names = [
     'unknown', 'input', 'output', 'input/output', 'open collector',
     'open emitter', 'passive', 'totem-pole', 'tristate', 'clock', 'power',
@@ -244,19 +246,27 @@ def warning(f, msg):
 def ignore(f, msg):
     pass
 
+# The DRC matrix with each entry replaced by the corresponding
+# reporting function (or None for an invalid entry).  Set up by \ref
+# run using \ref compile_drc_matrix.
+drc_table = None
+
+# Pintypes which can drive a net.  Set up by \ref run.
+driving_pintypes = None
+
+def compile_drc_matrix(matrix):
+    procs = { 'c': ignore, 'w': warning, 'e': error }
+    return [[procs.get(c) for c in row] for row in matrix]
+
 def get_drc_matrix_element(row, column):
     if row < column:
         row, column = column, row
-    try:
-        return {
-            'c': ignore,
-            'w': warning,
-            'e': error
-        }[drc_matrix[row][column]]
-    except KeyError:
+    proc = drc_table[row][column]
+    if proc is None:
         sys.stderr.write("INTERNAL ERROR: DRC matrix has unknown value "
                          "on position %s,%s\n" % (row, column))
         sys.exit(3)
+    return proc
 
 ## Return a sorted list of slots used by a package.
 #
@@ -280,18 +290,89 @@ def get_slots(package):
     l.sort()
     return l
 
-## Return a sorted list of unique slots used by a package.
+## Information about the netlist shared by the checks.
+#
+# Each value is computed on first use and then reused by all checks,
+# so attribute lookups (and the errors they may report) happen only
+# once per package, pin, or net.
+
+class Index:
+    def __init__(self, netlist):
+        self.netlist = netlist
+        self._refdes_counts = None
+        self._folded_refdes_counts = None
+        self._slots = {}
+        self._unique_slots = {}
+        self._pintypes = {}
+        self._directives = {}
+
+    ## Return the number of components using a refdes.
+    #
+    # Compares case-insensitively if \c case_insensitive is set.
+
+    def refdes_count(self, refdes):
+        if self._refdes_counts is None:
+            self._refdes_counts = {}
+            self._folded_refdes_counts = {}
+            for component in self.netlist.components:
+                if component.refdes is None:
+                    continue
+                folded = component.refdes.lower()
+                self._refdes_counts[component.refdes] = \
+                    self._refdes_counts.get(component.refdes, 0) + 1
+                self._folded_refdes_counts[folded] = \
+                    self._folded_refdes_counts.get(folded, 0) + 1
+
+        if case_insensitive:
+            return self._folded_refdes_counts.get(refdes.lower(), 0)
+        return self._refdes_counts.get(refdes, 0)
 
-def get_unique_slots(package):
-    l = list(set(get_slots(package)))
-    l.sort()
-    return l
+    ## Return the sorted list of slots used by a package.
+    #
+    # See \ref get_slots.
+
+    def slots(self, package):
+        try:
+            return self._slots[package]
+        except KeyError:
+            l = self._slots[package] = get_slots(package)
+            return l
+
+    ## Return the sorted list of unique slots used by a package.
+
+    def unique_slots(self, package):
+        try:
+            return self._unique_slots[package]
+        except KeyError:
+            l = self._unique_slots[package] = sorted(set(self.slots(package)))
+            return l
+
+    ## Return the pintype of a package pin.
+
+    def pintype(self, pin):
+        try:
+            return self._pintypes[pin]
+        except KeyError:
+            pintype = self._pintypes[pin] = \
+                pin.get_attribute('pintype', 'unknown')
+            return pintype
+
+    ## Return the DRC directives of a net.
+
+    def directives(self, net):
+        try:
+            return self._directives[net]
+        except KeyError:
+            directives = self._directives[net] = \
+                net.graphical_objs_with_attrib_get_attrib(
+                    'device', 'DRC_Directive', 'value')
+            return directives
 
 # ======================== Symbol checking functions =========================
 
 # Check for symbols not numbered.
 
-def check_non_numbered_items(f, netlist, packages):
+def check_non_numbered_items(f, index, packages):
     for package in packages:
         if '?' in package.refdes:
             error(f, "Reference not numbered: %s" % package.refdes)
@@ -301,10 +382,10 @@ def check_non_numbered_items(f, netlist, packages):
 # Check if a slot of a package is used more than one time.
 # Checks all packages in the design.
 
-def check_duplicated_slots(f, netlist):
-    for package in reversed(netlist.packages):
+def check_duplicated_slots(f, index):
+    for package in reversed(index.netlist.packages):
         slots = set()
-        for slot in get_slots(package):
+        for slot in index.slots(package):
             if slot in slots:
                 error(f, "duplicated slot %d of uref %s"
                          % (slot, package.refdes))
@@ -313,17 +394,17 @@ def check_duplicated_slots(f, netlist):
 
 # Checks for slots not used.
 
-def check_unused_slots(f, netlist):
+def check_unused_slots(f, index):
     if action_unused_slots == 'c':
         return
 
-    for package in reversed(netlist.packages):
+    for package in reversed(index.netlist.packages):
         try:
             numslots = int(package.get_attribute('numslots', 'unknown'))
         except ValueError:
             continue
 
-        slots_list = get_unique_slots(package)
+        slots_list = set(index.unique_slots(package))
 
         for slot_number in xrange(numslots):
             if slot_number + 1 in slots_list:
@@ -338,8 +419,8 @@ def check_unused_slots(f, netlist):
 
 # Check slot number is greater or equal than numslots for all packages.
 
-def check_slots(f, netlist):
-    for package in reversed(netlist.packages):
+def check_slots(f, index):
+    for package in reversed(index.netlist.packages):
         numslots_string = package.get_attribute('numslots', 'unknown')
         slots = package.get_all_attributes('slot')
         if not slots or slots[0] is None:
@@ -384,7 +465,7 @@ def check_slots(f, netlist):
                      "has no slot attribute defined." % package.refdes)
             continue
 
-        for this_slot in get_unique_slots(package):
+        for this_slot in index.unique_slots(package):
             if this_slot > numslots or this_slot < 1:
                 # If slot is not between 1 and numslots,
                 # then report an error.
@@ -397,29 +478,19 @@ def check_slots(f, netlist):
 # match the number of unique slots used by that part, then that
 # reference is used more than one time in the schematic.
 
-def check_duplicated_references(f, netlist, packages):
-    for package in reversed(netlist.packages):
-        count = 0
-        if case_insensitive:
-            for component in netlist.components:
-                if component.refdes.lower() == package.refdes.lower():
-                    count += 1
-        else:
-            for component in netlist.components:
-                if component.refdes == package.refdes:
-                    count += 1
-
-        if count > len(get_unique_slots(package)):
+def check_duplicated_references(f, index, packages):
+    for package in reversed(index.netlist.packages):
+        count = index.refdes_count(package.refdes)
+        if count > len(index.unique_slots(package)):
             error(f, "Duplicated reference %s." % package.refdes)
 
 # ========================== Net checking functions ==========================
 
 # Check for NoConnection nets with more than one pin connected.
 
-def check_connected_noconnects(f, netlist, all_nets):
+def check_connected_noconnects(f, index, all_nets):
     for net in all_nets:
-        directives = net.graphical_objs_with_attrib_get_attrib(
-            'device', 'DRC_Directive', 'value')
+        directives = index.directives(net)
 
         # Only check nets with a NoConnection directive
         if 'NoConnection' not in directives:
@@ -428,14 +499,13 @@ def check_connected_noconnects(f, netlist, all_nets):
         if len(net.connections) > 1:
             error(f, "Net '%s' has connections, "
                      "but has the NoConnection DRC directive: %s."
-                     % (net.name, display_pins_of_type(netlist, 'all', net)))
+                     % (net.name, display_pins_of_type(index, 'all', net)))
 
 # Check for nets with less than two pins connected.
 
-def check_single_nets(f, netlist, all_nets):
+def check_single_nets(f, index, all_nets):
     for net in all_nets:
-        directives = net.graphical_objs_with_attrib_get_attrib(
-            'device', 'DRC_Directive', 'value')
+        directives = index.directives(net)
 
         # If one of the directives is NoConnection,
         # then it shouldn't be checked.
@@ -446,13 +516,12 @@ def check_single_nets(f, netlist, all_nets):
             error(f, "Net '%s' has no connections." % net.name)
         if len(net.connections) == 1:
             error(f, "Net '%s' is connected to only one pin: %s."
-                  % (net.name, display_pins_of_type(netlist, 'all', net)))
+                  % (net.name, display_pins_of_type(index, 'all', net)))
 
 # Return a list with the pintypes of the pins connected to a net.
 
-def get_pintypes_of_net_connections(netlist, net):
-    return [pin.get_attribute('pintype', 'unknown')
-            for pin in reversed(net.connections)]
+def get_pintypes_of_net_connections(index, net):
+    return [index.pintype(pin) for pin in reversed(net.connections)]
 
 # Count pintypes of a net.
 
@@ -460,8 +529,8 @@ def count_pintypes_of_net(f, net):
     output_list = PINTYPE_COUNT * [0]
     for type in net:
         try:
-            output_list[pintype_names.index(type.lower())] += 1
-        except ValueError:
+            output_list[pintype_positions[type.lower()]] += 1
+        except KeyError:
             f.write("INTERNAL ERROR: unknown pin type : %s\n" % type)
     return output_list
 
@@ -469,11 +538,11 @@ def count_pintypes_of_net(f, net):
 #
 # type: pin type index, or the string "all" to display all the pins.
 
-def display_pins_of_type(netlist, type, net):
+def display_pins_of_type(index, type, net):
     return ''.join(
         '%s:%s ' % (pin.package.refdes, pin.number)
         for pin in reversed(net.connections)
-        if type == 'all' or pin.get_attribute('pintype', 'unknown').lower()
+        if type == 'all' or index.pintype(pin).lower()
                                 == pintype_names[type].lower())
 
 # Check connection between two pintypes.
@@ -481,16 +550,16 @@ def display_pins_of_type(netlist, type, net):
 # type1, type2: pin type indices
 
 def check_connection_of_two_pintypes(
-        f, netlist, type1, type2, net):
+        f, index, type1, type2, net):
     proc = get_drc_matrix_element(type1, type2)
     proc(f, "Pin(s) with pintype '%s': %s\n"
             "\tare connected by net '%s'\n"
             "\tto pin(s) with pintype '%s': %s" % (
                 descriptive_pintype_names[type1],
-                display_pins_of_type(netlist, type1, net),
+                display_pins_of_type(index, type1, net),
                 net.name,
                 descriptive_pintype_names[type2],
-                display_pins_of_type(netlist, type2, net)))
+                display_pins_of_type(index, type2, net)))
 
 # Check pintypes of the pins connected to a single net.
 #
@@ -498,21 +567,20 @@ def check_connection_of_two_pintypes(
 #                by pintype.
 
 def check_pintypes_of_single_net(
-        f, netlist, net, pintypes, pintype_count):
-    for type1 in xrange(PINTYPE_COUNT - 1):
-        type1_count = pintype_count[type1]
-        if type1_count == 0:
-            continue
-
-        for type2 in xrange(type1, PINTYPE_COUNT - 1):
-            type2_count = pintype_count[type2]
-            if type2_count == 0:
+        f, index, net, pintypes, pintype_count):
+    # only look at the pintypes which are actually present; most nets
+    # connect pins of one or two different types
+    present = [type for type in xrange(PINTYPE_COUNT - 1)
+               if pintype_count[type]]
+
+    for i, type1 in enumerate(present):
+        for type2 in present[i:]:
+            if type1 == type2 and pintype_count[type1] == 1:
                 continue
-
-            if (type1 == type2 and type1_count > 1) or \
-               (type1 != type2 and type1_count > 0 and type2_count > 0):
+            # don't bother formatting messages which would be ignored
+            if get_drc_matrix_element(type1, type2) is not ignore:
                 check_connection_of_two_pintypes(
-                    f, netlist, type1, type2, net)
+                    f, index, type1, type2, net)
 
 # Check if a net has a pintype which can drive the net.
 #
@@ -520,25 +588,24 @@ def check_pintypes_of_single_net(
 #                by pintype.
 
 def check_if_net_is_driven(pintype_count):
-    for position in xrange(PINTYPE_COUNT - 1):
-        if pintype_count[position] > 0 and pintype_can_drive[position] == 1:
+    for position in driving_pintypes:
+        if pintype_count[position] > 0:
             return True
 
     return False
 
 # Check pintype of the pins connected to every net in the design.
 
-def check_pintypes_of_nets(f, netlist, all_nets):
+def check_pintypes_of_nets(f, index, all_nets):
     for net in all_nets:
-        pintypes = get_pintypes_of_net_connections(netlist, net)
+        pintypes = get_pintypes_of_net_connections(index, net)
         pintype_count = count_pintypes_of_net(f, pintypes)
-        directives = net.graphical_objs_with_attrib_get_attrib(
-            'device', 'DRC_Directive', 'value')
+        directives = index.directives(net)
 
         # If some directives are defined, then it shouldn't be checked.
         if 'DontCheckPintypes' not in directives:
             check_pintypes_of_single_net(
-                f, netlist, net, pintypes, pintype_count)
+                f, index, net, pintypes, pintype_count)
 
         if not dont_check_not_driven_nets and \
            'DontCheckIfDriven' not in directives and \
@@ -548,30 +615,27 @@ def check_pintypes_of_nets(f, netlist, all_nets):
 
 # Check unconnected pins.
 
-def check_unconnected_pins(f, netlist, packages):
+def check_unconnected_pins(f, index, packages):
     for package in packages:
         for pin in package.pins:
             if not pin.net.is_unconnected_pin:
                 continue
 
-            try:
-                position = pintype_names.index(
-                    pin.get_attribute('pintype', 'unknown').lower())
-            except ValueError:
-                position = PINTYPE_COUNT
+            position = pintype_positions.get(
+                index.pintype(pin).lower(), PINTYPE_COUNT)
 
             proc = get_drc_matrix_element(PINTYPE_UNDEFINED, position)
             proc(f, "Unconnected pin %s:%s" % (package.refdes, pin.number))
 
 # Report pins without the 'pintype' attribute (pintype=unknown).
 
-def report_unknown_pintypes(f, netlist, nets):
+def report_unknown_pintypes(f, index, nets):
     nets = list(nets)
 
     # count unknown pintypes
     count = 0
     for net in nets:
-        pintypes = get_pintypes_of_net_connections(netlist, net)
+        pintypes = get_pintypes_of_net_connections(index, net)
         pintype_count = count_pintypes_of_net(f, pintypes)
         count += pintype_count[PINTYPE_UNKNOWN]
 
@@ -579,13 +643,15 @@ def report_unknown_pintypes(f, netlist, nets):
     if count > 0:
         f.write("NOTE: Found pins without the 'pintype' attribute: ")
         f.write(''.join(
-            display_pins_of_type(netlist, PINTYPE_UNKNOWN, net)
+            display_pins_of_type(index, PINTYPE_UNKNOWN, net)
             for net in nets))
         #message("\n")
 
 # ========================== Highest level function ==========================
 
 def run(f, netlist, args):
+    global drc_table, driving_pintypes
+
     options = backend_getopt(args, {
         'ignore-warnings-in-return-value': Option(False, NO_ARGUMENT, None)
     })
@@ -614,46 +680,52 @@ def run(f, netlist, args):
                          "has a wrong value.\n")
         sys.exit(3)
 
+    drc_table = compile_drc_matrix(drc_matrix)
+    driving_pintypes = [position for position in xrange(PINTYPE_COUNT - 1)
+                        if pintype_can_drive[position] == 1]
+
+    index = Index(netlist)
+
     # Check non-numbered symbols
     if not dont_check_non_numbered_parts:
         f.write("Checking non-numbered parts...")
         f.write("\n")
-        check_non_numbered_items(f, netlist, reversed(netlist.packages))
+        check_non_numbered_items(f, index, reversed(netlist.packages))
         f.write("\n")
 
     # Check for duplicated references
     if not dont_check_duplicated_references:
         f.write("Checking duplicated references...")
         f.write("\n")
-        check_duplicated_references(f, netlist, reversed(netlist.packages))
+        check_duplicated_references(f, index, reversed(netlist.packages))
         f.write("\n")
 
     # Check for NoConnection nets with more than one pin connected.
     if not dont_check_connected_noconnects:
         f.write("Checking NoConnection nets for connections...")
         f.write("\n")
-        check_connected_noconnects(f, netlist, reversed(netlist.nets))
+        check_connected_noconnects(f, index, reversed(netlist.nets))
         f.write("\n")
 
     # Check nets with only one connection
     if not dont_check_one_connection_nets:
         f.write("Checking nets with only one connection...")
         f.write("\n")
-        check_single_nets(f, netlist, reversed(netlist.nets))
+        check_single_nets(f, index, reversed(netlist.nets))
         f.write("\n")
 
     # Check "unknown" pintypes
     if not dont_report_unknown_pintypes:
         f.write("Checking pins without the 'pintype' attribute...")
         f.write("\n")
-        report_unknown_pintypes(f, netlist, reversed(netlist.nets))
+        report_unknown_pintypes(f, index, reversed(netlist.nets))
         f.write("\n")
 
     # Check pintypes of the pins connected to every net
     if not dont_check_pintypes_of_nets:
         f.write("Checking type of pins connected to a net...")
         f.write("\n")
-        check_pintypes_of_nets(f, netlist, reversed(netlist.nets))
+        check_pintypes_of_nets(f, index, reversed(netlist.nets))
         f.write("\n")
 
     # Check unconnected pins
@@ -661,28 +733,28 @@ def run(f, netlist, args):
         f.write("Checking unconnected pins...")
         f.write("\n")
         if netlist.packages:
-            check_unconnected_pins(f, netlist, reversed(netlist.packages))
+            check_unconnected_pins(f, index, reversed(netlist.packages))
         f.write("\n")
 
     # Check slots
     if not dont_check_slots:
         f.write("Checking slots...")
         f.write("\n")
-        check_slots(f, netlist)
+        check_slots(f, index)
         f.write("\n")
 
     # Check for duplicated slots
     if not dont_check_duplicated_slots:
         f.write("Checking duplicated slots...")
         f.write("\n")
-        check_duplicated_slots(f, netlist)
+        check_duplicated_slots(f, index)
         f.write("\n")
 
     # Check for unused slots
     if not dont_check_unused_slots:
         f.write("Checking unused slots...")
         f.write("\n")
-        check_unused_slots(f, netlist)
+        check_unused_slots(f, index)
         f.write("\n")
 
     # Display total number of warnings
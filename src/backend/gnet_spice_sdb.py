@@ -159,21 +159,15 @@ def loop_through_files(f, file_info_list):
         file_type = list_element[2]
         handle_spice_file(f, file_name)
 
-# Loops through the model-file list looking for triplet corresponding
-# to model-name.  If found, it returns the corresponding list.  If not
-# found, returns False.
+# Builds a dictionary mapping each model name in the model-file list
+# to its triplet.  If a model name appears more than once, the first
+# triplet in the list is used.
 
-def get_file_info_list_item(model_name, file_info_list):
+def index_file_info_list(file_info_list):
+    file_info_index = {}
     for list_element in file_info_list:
-        list_elt_model_name = list_element[0]
-        list_elt_file_name = list_element[1]
-        list_elt_file_type = list_element[2]
-
-        if list_elt_model_name == model_name:
-            # found model_name.  Return list_element.
-            return list_element
-
-    return None
+        file_info_index.setdefault(list_element[0], list_element)
+    return file_info_index
 
 # This wraps insert_text_file.
 #
@@ -198,20 +192,10 @@ def handle_spice_file(f, file_name):
 # of the spice code in the file -- you're on your own!
 
 def insert_text_file(f, model_filename):
-    if not os.path.isfile(model_filename):
-        sys.stderr.write("ERROR: File '%s' not found.\n" % model_filename)
-        sys.exit(3)
-
-    model_file = open(model_filename)
-    try:
-        f.write('*vvvvvvvv  Included SPICE model from %s vvvvvvvv\n'
-                % model_filename)
-
-        for model_line in model_file:
-            f.write(model_line)
-    finally:
-        model_file.close()
-
+    contents = read_model_file(model_filename)[1]
+    f.write('*vvvvvvvv  Included SPICE model from %s vvvvvvvv\n'
+            % model_filename)
+    f.write(contents)
     f.write('*^^^^^^^^  End of included SPICE model from %s ^^^^^^^^\n'
             % model_filename)
     f.write('*\n')
@@ -273,33 +257,65 @@ def get_IO_nets(package_list):
 
 # Given a filename, open the file, get the first line, and see if it
 # is a .MODEL or .SUBCKT file.  Returns either ".MODEL" or ".SUBCKT"
-# or "OTHER".  The function opens the model file, and closes it when
-# it is done.
+# or "OTHER".  The file is only read once; see read_model_file.
 
 def get_file_type(model_filename):
+    return read_model_file(model_filename)[0]
+
+# Type and contents of the model files which have been read so far,
+# keyed by file name.  Each value is a tuple
+#   (mtime, size, file_type, contents)
+# so a file is only read again if it has changed in the meantime.
+
+model_file_cache = {}
+
+# Given a filename, return a tuple (file_type, contents) for the
+# file, reading it only if it isn't in the model-file cache yet.
+
+def read_model_file(model_filename):
     if not os.path.isfile(model_filename):
         sys.stderr.write("ERROR: File '%s' not found.\n" % model_filename)
         sys.exit(3)
 
+    st = os.stat(model_filename)
+    try:
+        entry = model_file_cache[model_filename]
+    except KeyError:
+        pass
+    else:
+        if entry[:2] == (st.st_mtime, st.st_size):
+            return entry[2:]
+
     model_file = open(model_filename)
     try:
-        for file_line in model_file:
-            if file_line.startswith('.'):
-                debug_spew("In get_file_type, first_char = .\n")
-                if file_line[:7].lower() == '.subckt':
-                    # found .subckt as first line.
-                    return '.SUBCKT'
-                if file_line[:6].lower() == '.model':
-                    # found .model as first line.
-                    return '.MODEL'
-                # first . spice card is neither .model nor .subckt
-                return 'OTHER'
-
-        # Arrived at end of line without finding .MODEL or .SUBCKT.
-        return 'OTHER'
+        contents = model_file.read()
     finally:
         model_file.close()
 
+    file_type = get_contents_type(contents)
+    model_file_cache[model_filename] = \
+        st.st_mtime, st.st_size, file_type, contents
+    return file_type, contents
+
+# Returns the type of a model file given its contents: .SUBCKT or
+# .MODEL depending on the first SPICE card, or OTHER.
+
+def get_contents_type(contents):
+    for file_line in contents.split('\n'):
+        if file_line.startswith('.'):
+            debug_spew("In get_file_type, first_char = .\n")
+            if file_line[:7].lower() == '.subckt':
+                # found .subckt as first line.
+                return '.SUBCKT'
+            if file_line[:6].lower() == '.model':
+                # found .model as first line.
+                return '.MODEL'
+            # first . spice card is neither .model nor .subckt
+            return 'OTHER'
+
+    # Arrived at end of line without finding .MODEL or .SUBCKT.
+    return 'OTHER'
+
 # Write prefix if first char of refdes is improper, e.g. if MOSFET is
 # named T1 then becomes MT1 in SPICE.
 
@@ -453,7 +469,7 @@ def write_diode(f, package):
 #      respectively, prepend the correct prefix to the refdes.
 #  3.  Print out the rest of the line.
 
-def write_ic(f, package, file_info_list):
+def write_ic(f, package, file_info_index):
     # First do local assignments
     first_char = package.refdes[0]  # extract first char of refdes
     value = package.get_attribute('value', 'unknown')
@@ -467,8 +483,8 @@ def write_ic(f, package, file_info_list):
     elif first_char == 'X':
         debug_spew("Found subcircuit.  Refdes = %s\n" % package.refdes)
 
-    # Now get item from file_info_list using model_name as key
-    list_item = get_file_info_list_item(model_name, file_info_list)
+    # Now get item from file_info_index using model_name as key
+    list_item = file_info_index.get(model_name)
 
     # check to see if list_item is null.
     if list_item is None:
@@ -924,24 +940,24 @@ def write_model(f, package):
 #      Otherwise, it just outputs the refdes, the attached nets, and
 #      the value of the "value" attribute.
 
-def write_default_component(f, package, file_info_list):
+def write_default_component(f, package, file_info_index):
     # extract first char of refdes.
     first_char = package.refdes[0]
 
     if first_char == 'A':
-        write_ic(f, package, file_info_list)
+        write_ic(f, package, file_info_index)
     elif first_char == 'D':
         write_diode(f, package)
     elif first_char == 'Q' or first_char == 'M':
         write_transistor_diode(f, package, False, '<unknown>', [])
     elif first_char == 'U':
-        write_ic(f, package, file_info_list)
+        write_ic(f, package, file_info_index)
     elif first_char == 'V':
         write_independent_voltage_source(f, package)
     elif first_char == 'I':
         write_independent_current_source(f, package)
     elif first_char == 'X':
-        write_ic(f, package, file_info_list)
+        write_ic(f, package, file_info_index)
     else:
         package.warn("unknown component")
         write_component_no_value(f, package)
@@ -962,7 +978,7 @@ def write_default_component(f, package, file_info_list):
 # optional extra attributes.  Check if the component is a special
 # spice component.
 
-def write_netlist(f, file_info_list, ls):
+def write_netlist(f, file_info_index, ls):
     for package in ls:
         device = package.get_attribute('device', 'unknown')
 
@@ -1044,7 +1060,7 @@ def write_netlist(f, file_info_list, ls):
         elif device == 'SUBCKT_NMOS':
             write_subckt_nmos_transistor(f, package)
         else:
-            write_default_component(f, package, file_info_list)
+            write_default_component(f, package, file_info_index)
 
 # This runs through the list of packages (refdesses), and for each
 # gets the attributes.  If there is a "FILE" attribute, it gets the
@@ -1053,6 +1069,7 @@ def write_netlist(f, file_info_list, ls):
 
 def create_file_info_list(packages):
     file_info_list = []
+    seen_files = set()
     for package in reversed(packages):
         model = package.get_attribute('model-name', 'unknown')
         model_file = package.get_attribute('file', None)
@@ -1067,12 +1084,13 @@ def create_file_info_list(packages):
         debug_spew("found file attribute for %s.  File name = %s\n"
                    % (package.refdes, model_file))
 
-        # Now check to see if file is in file_info_list
-        if is_in_file_info_list(model_file, file_info_list):
-            #  File is already in list.  Print debug spew if desired.
+        # Now check to see if file has already been seen
+        if model_file in seen_files:
+            #  File has been seen before.  Print debug spew if desired.
             debug_spew("File has already been seen and entered into "
                        "known model file list.\n")
             continue
+        seen_files.add(model_file)
 
         # File is new.  Open file, find out what type it is, and push
         # info into file_info_list
@@ -1096,19 +1114,6 @@ def create_file_info_list(packages):
     file_info_list.reverse()
     return file_info_list
 
-# Helper function.  Returns True if file is already in file_info_list,
-# otherwise False.  Assumes file_info_list of form:
-#   [(model1, file1, file_type1), (model2, file2, file_type2), ...]
-
-def is_in_file_info_list(model_file, file_info_list):
-    for list_element in file_info_list:
-        list_file_name = list_element[1]
-        if list_file_name == model_file:
-            return True  # item found
-
-    return False
-
-
 # Write out spice netlist header
 
 def write_top_header(f):
@@ -1211,6 +1216,7 @@ def run(f, netlist, args):
     debug_spew("Make first pass through design and "
                "create list of all model files referenced.\n")
     file_info_list = create_file_info_list(packages)
+    file_info_index = index_file_info_list(file_info_list)
     debug_spew("Done creating file_info_list.\n\n")
 
     # Moved this loop before the next one to get numparam to work with
@@ -1239,10 +1245,10 @@ def run(f, netlist, args):
         '*==============  Begin SPICE netlist of main design ============\n')
     if 'sort_mode' in calling_flags:
         # sort on refdes
-        write_netlist(f, file_info_list, sorted(packages, cmp = packsort))
+        write_netlist(f, file_info_index, sorted(packages, cmp = packsort))
     else:
         # don't sort.
-        write_netlist(f, file_info_list, reversed(packages))
+        write_netlist(f, file_info_index, reversed(packages))
     debug_spew("Done writing SPICE cards . . .\n\n")
 
     # Now write out .END(S) of netlist, depending upon whether this
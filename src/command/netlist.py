@@ -34,6 +34,11 @@ report_gui = None
 report_gui_buf = None
 report_gui_stderr = None
 
+## Directory in which symbol directory listings and parsed symbols
+## are cached, or \c None if caching is disabled.
+
+symbol_cache_dir = None
+
 def parse_bool(value):
     if value in ['disabled', 'no', 'n', 'off', 'false', '0']:
         return False
@@ -65,7 +70,7 @@ def symbol_library(path, recursive, option_name):
         sys.exit(1)
 
     gaf.clib.add_source(
-        gaf.clib.DirectorySource(path, recursive),
+        gaf.clib.DirectorySource(path, recursive, symbol_cache_dir),
         gaf.clib.uniquify_source_name(os.path.basename(path)))
 
 ## Add a command to the symbol library.
@@ -157,6 +162,7 @@ Symbol and source loading paths:
   --symbol-library-command=...
   --symbol-library-funcs=...
   --reset-symbol-library
+  --symbol-cache-dir=DIR  cache symbol library contents in DIR
 
   --source-library=...
   --source-library-search=...
@@ -312,6 +318,8 @@ def main():
         raise
 
 def inner_main():
+    global symbol_cache_dir
+
     # TODO: this is totally hacky, re-do this correctly
     dirname = os.path.dirname(__file__)
     if dirname.endswith('/command'):
@@ -399,6 +407,7 @@ def inner_main():
              'symbol-library-command=',
              'symbol-library-funcs=',
              'reset-symbol-library',
+             'symbol-cache-dir=',
 
              'source-library=',
              'source-library-search=',
@@ -424,6 +433,12 @@ def inner_main():
     except getopt.GetoptError as e:
         xorn.command.invalid_arguments(e.msg)
 
+    # the cache directory applies to all library directories,
+    # regardless of the order of the options
+    for option, value in options:
+        if option == '--symbol-cache-dir':
+            symbol_cache_dir = value
+
     for option, value in options:
         if option == '-o':
             output_filename = value
@@ -456,6 +471,8 @@ def inner_main():
             symbol_library_funcs(value)
         elif option == '--reset-symbol-library':
             gaf.clib.reset()
+        elif option == '--symbol-cache-dir':
+            pass  # handled above
 
         elif option == '--source-library':
             source_library(value)
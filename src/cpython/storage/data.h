@@ -113,21 +113,30 @@ typedef struct {
 
 void prepare_arc(Arc *self,
 	xorn_obtype_t *type_return, const void **data_return);
+int matches_arc(Arc *self, const struct xornsch_arc *data);
 void prepare_box(Box *self,
 	xorn_obtype_t *type_return, const void **data_return);
+int matches_box(Box *self, const struct xornsch_box *data);
 void prepare_circle(Circle *self,
 	xorn_obtype_t *type_return, const void **data_return);
+int matches_circle(Circle *self, const struct xornsch_circle *data);
 void prepare_component(Component *self,
 	xorn_obtype_t *type_return, const void **data_return);
+int matches_component(Component *self, const struct xornsch_component *data);
 void prepare_line(Line *self,
 	xorn_obtype_t *type_return, const void **data_return);
+int matches_line(Line *self, const struct xornsch_line *data);
 void prepare_net(Net *self,
 	xorn_obtype_t *type_return, const void **data_return);
+int matches_net(Net *self, const struct xornsch_net *data);
 void prepare_path(Path *self,
 	xorn_obtype_t *type_return, const void **data_return);
+int matches_path(Path *self, const struct xornsch_path *data);
 void prepare_picture(Picture *self,
 	xorn_obtype_t *type_return, const void **data_return);
+int matches_picture(Picture *self, const struct xornsch_picture *data);
 void prepare_text(Text *self,
 	xorn_obtype_t *type_return, const void **data_return);
+int matches_text(Text *self, const struct xornsch_text *data);
 
 #endif
@@ -17,6 +17,7 @@
    Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
 
 #include "data.h"
+#include <string.h>
 #include <structmember.h>
 
 
@@ -30,9 +31,9 @@ PyObject *construct_circle(const struct xornsch_circle *data)
 	if (self == NULL)
 		return NULL;
 
-	self->data = *data;
-	((LineAttr *)self->line)->data = data->line;
-	((FillAttr *)self->fill)->data = data->fill;
+	memcpy(&self->data, data, sizeof self->data);
+	memcpy(&((LineAttr *)self->line)->data, &data->line, sizeof data->line);
+	memcpy(&((FillAttr *)self->fill)->data, &data->fill, sizeof data->fill);
 	return (PyObject *)self;
 }
 
@@ -45,6 +46,21 @@ void prepare_circle(Circle *self,
 	*data_return = &self->data;
 }
 
+int matches_circle(Circle *self, const struct xornsch_circle *data)
+{
+	if (memcmp(&self->data, data, sizeof self->data) != 0)
+		return 0;
+	if (Py_REFCNT(self->line) != 1 ||
+	    memcmp(&((LineAttr *)self->line)->data, &data->line,
+		   sizeof data->line) != 0)
+		return 0;
+	if (Py_REFCNT(self->fill) != 1 ||
+	    memcmp(&((FillAttr *)self->fill)->data, &data->fill,
+		   sizeof data->fill) != 0)
+		return 0;
+	return 1;
+}
+
 static PyObject *Circle_new(
 	PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
@@ -17,6 +17,7 @@
    Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
 
 #include "data.h"
+#include <string.h>
 #include <structmember.h>
 
 
@@ -37,7 +38,7 @@ PyObject *construct_component(const struct xornsch_component *data)
 	if (self == NULL)
 		return NULL;
 
-	self->data = *data;
+	memcpy(&self->data, data, sizeof self->data);
 	Py_XINCREF(self->data.symbol.ptr);
 	return (PyObject *)self;
 }
@@ -49,6 +50,13 @@ void prepare_component(Component *self,
 	*data_return = &self->data;
 }
 
+int matches_component(Component *self, const struct xornsch_component *data)
+{
+	if (memcmp(&self->data, data, sizeof self->data) != 0)
+		return 0;
+	return 1;
+}
+
 static PyObject *Component_new(
 	PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
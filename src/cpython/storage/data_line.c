@@ -17,6 +17,7 @@
    Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
 
 #include "data.h"
+#include <string.h>
 #include <structmember.h>
 
 
@@ -30,8 +31,8 @@ PyObject *construct_line(const struct xornsch_line *data)
 	if (self == NULL)
 		return NULL;
 
-	self->data = *data;
-	((LineAttr *)self->line)->data = data->line;
+	memcpy(&self->data, data, sizeof self->data);
+	memcpy(&((LineAttr *)self->line)->data, &data->line, sizeof data->line);
 	return (PyObject *)self;
 }
 
@@ -43,6 +44,17 @@ void prepare_line(Line *self,
 	*data_return = &self->data;
 }
 
+int matches_line(Line *self, const struct xornsch_line *data)
+{
+	if (memcmp(&self->data, data, sizeof self->data) != 0)
+		return 0;
+	if (Py_REFCNT(self->line) != 1 ||
+	    memcmp(&((LineAttr *)self->line)->data, &data->line,
+		   sizeof data->line) != 0)
+		return 0;
+	return 1;
+}
+
 static PyObject *Line_new(
 	PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
@@ -17,6 +17,7 @@
    Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
 
 #include "data.h"
+#include <string.h>
 #include <structmember.h>
 
 
@@ -30,7 +31,7 @@ PyObject *construct_line_attr(const struct xornsch_line_attr *data)
 	if (self == NULL)
 		return NULL;
 
-	self->data = *data;
+	memcpy(&self->data, data, sizeof self->data);
 	return (PyObject *)self;
 }
 
@@ -17,6 +17,7 @@
    Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
 
 #include "data.h"
+#include <string.h>
 #include <structmember.h>
 
 
@@ -30,7 +31,7 @@ PyObject *construct_net(const struct xornsch_net *data)
 	if (self == NULL)
 		return NULL;
 
-	self->data = *data;
+	memcpy(&self->data, data, sizeof self->data);
 	return (PyObject *)self;
 }
 
@@ -41,6 +42,13 @@ void prepare_net(Net *self,
 	*data_return = &self->data;
 }
 
+int matches_net(Net *self, const struct xornsch_net *data)
+{
+	if (memcmp(&self->data, data, sizeof self->data) != 0)
+		return 0;
+	return 1;
+}
+
 static PyObject *Net_new(
 	PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
@@ -17,6 +17,7 @@
    Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
 
 #include "data.h"
+#include <string.h>
 #include <structmember.h>
 
 
@@ -30,7 +31,7 @@ PyObject *construct_path(const struct xornsch_path *data)
 	if (self == NULL)
 		return NULL;
 
-	self->data = *data;
+	memcpy(&self->data, data, sizeof self->data);
 
 	if (data->pathdata.len != 0) {
 		Py_DECREF(self->pathdata);
@@ -40,9 +41,12 @@ PyObject *construct_path(const struct xornsch_path *data)
 			Py_DECREF(self);
 			return NULL;
 		}
+		/* strings are interned in the storage library, so share
+		   a single string object for all equal values, too */
+		PyString_InternInPlace(&self->pathdata);
 	}
-	((LineAttr *)self->line)->data = data->line;
-	((FillAttr *)self->fill)->data = data->fill;
+	memcpy(&((LineAttr *)self->line)->data, &data->line, sizeof data->line);
+	memcpy(&((FillAttr *)self->fill)->data, &data->fill, sizeof data->fill);
 	return (PyObject *)self;
 }
 
@@ -57,6 +61,26 @@ void prepare_path(Path *self,
 	*data_return = &self->data;
 }
 
+int matches_path(Path *self, const struct xornsch_path *data)
+{
+	if (memcmp(&self->data, data, sizeof self->data) != 0)
+		return 0;
+	if ((size_t)PyString_GET_SIZE(self->pathdata) != data->pathdata.len ||
+	    (data->pathdata.len != 0 &&
+	     memcmp(PyString_AS_STRING(self->pathdata), data->pathdata.s,
+		    data->pathdata.len) != 0))
+		return 0;
+	if (Py_REFCNT(self->line) != 1 ||
+	    memcmp(&((LineAttr *)self->line)->data, &data->line,
+		   sizeof data->line) != 0)
+		return 0;
+	if (Py_REFCNT(self->fill) != 1 ||
+	    memcmp(&((FillAttr *)self->fill)->data, &data->fill,
+		   sizeof data->fill) != 0)
+		return 0;
+	return 1;
+}
+
 static PyObject *Path_new(
 	PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
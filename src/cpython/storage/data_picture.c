@@ -17,6 +17,7 @@
    Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
 
 #include "data.h"
+#include <string.h>
 #include <structmember.h>
 
 
@@ -37,7 +38,7 @@ PyObject *construct_picture(const struct xornsch_picture *data)
 	if (self == NULL)
 		return NULL;
 
-	self->data = *data;
+	memcpy(&self->data, data, sizeof self->data);
 	Py_XINCREF(self->data.pixmap.ptr);
 	return (PyObject *)self;
 }
@@ -49,6 +50,13 @@ void prepare_picture(Picture *self,
 	*data_return = &self->data;
 }
 
+int matches_picture(Picture *self, const struct xornsch_picture *data)
+{
+	if (memcmp(&self->data, data, sizeof self->data) != 0)
+		return 0;
+	return 1;
+}
+
 static PyObject *Picture_new(
 	PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
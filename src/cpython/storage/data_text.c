@@ -17,6 +17,7 @@
    Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
 
 #include "data.h"
+#include <string.h>
 #include <structmember.h>
 
 
@@ -30,7 +31,7 @@ PyObject *construct_text(const struct xornsch_text *data)
 	if (self == NULL)
 		return NULL;
 
-	self->data = *data;
+	memcpy(&self->data, data, sizeof self->data);
 
 	if (data->text.len != 0) {
 		Py_DECREF(self->text);
@@ -40,6 +41,9 @@ PyObject *construct_text(const struct xornsch_text *data)
 			Py_DECREF(self);
 			return NULL;
 		}
+		/* strings are interned in the storage library, so share
+		   a single string object for all equal values, too */
+		PyString_InternInPlace(&self->text);
 	}
 	return (PyObject *)self;
 }
@@ -53,6 +57,18 @@ void prepare_text(Text *self,
 	*data_return = &self->data;
 }
 
+int matches_text(Text *self, const struct xornsch_text *data)
+{
+	if (memcmp(&self->data, data, sizeof self->data) != 0)
+		return 0;
+	if ((size_t)PyString_GET_SIZE(self->text) != data->text.len ||
+	    (data->text.len != 0 &&
+	     memcmp(PyString_AS_STRING(self->text), data->text.s,
+		    data->text.len) != 0))
+		return 0;
+	return 1;
+}
+
 static PyObject *Text_new(
 	PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
@@ -33,6 +33,7 @@ m4_define(`clear_diversion', `6')
 m4_define(`members_diversion', `7')
 m4_define(`getset_bodies_diversion', `8')
 m4_define(`getset_diversion', `9')
+m4_define(`matches_diversion', `17')
 
 m4_define(`begin_divert', `m4_divert($1_diversion)m4_dnl')
 m4_define(`end_divert', `m4_divert(`-1')')
@@ -186,8 +187,18 @@ begin_divert(`construct')
 			Py_DECREF(self);
 			return NULL;
 		}
+		/* strings are interned in the storage library, so share
+		   a single string object for all equal values, too */
+		PyString_InternInPlace(&self->`$1');
 	}
 end_divert
+begin_divert(`matches')
+	if ((size_t)PyString_GET_SIZE(self->`$1') != data->`$1'.len ||
+	    (data->`$1'.len != 0 &&
+	     memcmp(PyString_AS_STRING(self->`$1'), data->`$1'.s,
+		    data->`$1'.len) != 0))
+		return 0;
+end_divert
 begin_divert(`prepare')
 	self->data.`$1'.s = PyString_AS_STRING(self->`$1');
 	self->data.`$1'.len = PyString_GET_SIZE(self->`$1');
@@ -320,7 +331,13 @@ end_divert
 m4_define(`cg_line', `
   m4_define(`is_complex')
 begin_divert(`construct')
-	((LineAttr *)self->line)->data = data->line;
+	memcpy(&((LineAttr *)self->line)->data, &data->line, sizeof data->line);
+end_divert
+begin_divert(`matches')
+	if (Py_REFCNT(self->line) != 1 ||
+	    memcmp(&((LineAttr *)self->line)->data, &data->line,
+		   sizeof data->line) != 0)
+		return 0;
 end_divert
 begin_divert(`prepare')
 	self->data.line = ((LineAttr *)self->line)->data;
@@ -408,7 +425,13 @@ end_divert
 m4_define(`cg_fill', `
   m4_define(`is_complex')
 begin_divert(`construct')
-	((FillAttr *)self->fill)->data = data->fill;
+	memcpy(&((FillAttr *)self->fill)->data, &data->fill, sizeof data->fill);
+end_divert
+begin_divert(`matches')
+	if (Py_REFCNT(self->fill) != 1 ||
+	    memcmp(&((FillAttr *)self->fill)->data, &data->fill,
+		   sizeof data->fill) != 0)
+		return 0;
 end_divert
 begin_divert(`prepare')
 	self->data.fill = ((FillAttr *)self->fill)->data;
@@ -515,6 +538,7 @@ begin_divert(`stdout')
    Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
 
 #include "data.h"
+#include <string.h>
 #include <structmember.h>
 
 
@@ -529,7 +553,7 @@ undivert(`preconstruct')
 	if (self == NULL)
 		return NULL;
 
-	self->data = *data;
+	memcpy(&self->data, data, sizeof self->data);
 undivert(`construct')
 	return (PyObject *)self;
 }
@@ -542,6 +566,14 @@ undivert(`prepare')
 	*type_return = xornsch_obtype_`'typename;
 	*data_return = &self->data;
 }
+
+int matches_`'typename`'(Class *self, const struct xornsch_`'typename *data)
+{
+	if (memcmp(&self->data, data, sizeof self->data) != 0)
+		return 0;
+undivert(`matches')
+	return 1;
+}
 m4_ifelse(m4_index(typename, `_attr'), `4', `begin_divert(`stdout')')`'m4_dnl
 
 static PyObject *Class(`new')(
@@ -124,6 +124,7 @@ m4_ifelse(m4_index(typename, `_attr'), `-1',
 	  `begin_divert(`prepare')')`'m4_dnl
 void prepare_`'typename`'(Class *self,
 	xorn_obtype_t *type_return, const void **data_return);
+int matches_`'typename`'(Class *self, const struct xornsch_`'typename *data);
 m4_ifelse(m4_index(typename, `_attr'), `-1',
 	  `end_divert')`'m4_dnl
 ')
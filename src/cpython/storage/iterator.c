@@ -0,0 +1,152 @@
+/* Copyright (C) 2013-2021 Roland Lutz
+
+   This program is free software; you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation; either version 2 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program; if not, write to the Free Software Foundation,
+   Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
+
+#include "module.h"
+
+
+typedef struct {
+	PyObject_HEAD
+	Revision *rev;
+	xorn_object_t ob;	/* last object returned, or NULL */
+	int exhausted;
+} ObjectIterator;
+
+PyObject *build_object_iterator(Revision *rev)
+{
+	ObjectIterator *self = (ObjectIterator *)
+		ObjectIteratorType.tp_alloc(&ObjectIteratorType, 0);
+	if (self == NULL)
+		return NULL;
+
+	Py_INCREF(rev);
+	self->rev = rev;
+	self->ob = NULL;
+	self->exhausted = 0;
+	return (PyObject *)self;
+}
+
+static void ObjectIterator_dealloc(ObjectIterator *self)
+{
+	Py_XDECREF(self->rev);
+	self->ob_type->tp_free((PyObject *)self);
+}
+
+static PyObject *ObjectIterator_iternext(ObjectIterator *self)
+{
+	if (self->exhausted)
+		return NULL;
+
+	if (self->ob != NULL &&
+	    !xorn_object_exists_in_revision(self->rev->rev, self->ob)) {
+		self->exhausted = 1;
+		PyErr_SetString(PyExc_RuntimeError,
+				"object deleted during iteration");
+		return NULL;
+	}
+
+	self->ob = xorn_get_next_object(self->rev->rev, self->ob);
+	if (self->ob == NULL) {
+		self->exhausted = 1;
+		return NULL;
+	}
+	return build_object(self->ob);
+}
+
+PyTypeObject ObjectIteratorType = {
+	PyObject_HEAD_INIT(NULL)
+	0,                         /*ob_size*/
+
+	/* For printing, in format "<module>.<name>" */
+	"xorn.storage.ObjectIterator",	/* const char *tp_name */
+
+	/* For allocation */
+	sizeof(ObjectIterator),		/* Py_ssize_t tp_basicsize */
+	0,				/* Py_ssize_t tp_itemsize */
+
+	/* Methods to implement standard operations */
+	(destructor)ObjectIterator_dealloc, /* destructor tp_dealloc */
+	NULL,				/* printfunc tp_print */
+	NULL,				/* getattrfunc tp_getattr */
+	NULL,				/* setattrfunc tp_setattr */
+	NULL,				/* cmpfunc tp_compare */
+	NULL,				/* reprfunc tp_repr */
+
+	/* Method suites for standard classes */
+	NULL,				/* PyNumberMethods *tp_as_number */
+	NULL,				/* PySequenceMethods *tp_as_sequence */
+	NULL,				/* PyMappingMethods *tp_as_mapping */
+
+	/* More standard operations (here for binary compatibility) */
+	NULL,				/* hashfunc tp_hash */
+	NULL,				/* ternaryfunc tp_call */
+	NULL,				/* reprfunc tp_str */
+	NULL,				/* getattrofunc tp_getattro */
+	NULL,				/* setattrofunc tp_setattro */
+
+	/* Functions to access object as input/output buffer */
+	NULL,				/* PyBufferProcs *tp_as_buffer */
+
+	/* Flags to define presence of optional/expanded features */
+	Py_TPFLAGS_DEFAULT,		/* long tp_flags */
+
+	/* Documentation string */
+	PyDoc_STR("Iterator over the objects in a revision."),
+					/* const char *tp_doc */
+
+	/* Assigned meaning in release 2.0 */
+	/* call function for all accessible objects */
+	NULL,				/* traverseproc tp_traverse */
+
+	/* delete references to contained objects */
+	NULL,				/* inquiry tp_clear */
+
+	/* Assigned meaning in release 2.1 */
+	/* rich comparisons */
+	NULL,				/* richcmpfunc tp_richcompare */
+
+	/* weak reference enabler */
+	0,				/* Py_ssize_t tp_weaklistoffset */
+
+	/* Added in release 2.2 */
+	/* Iterators */
+	PyObject_SelfIter,		/* getiterfunc tp_iter */
+	(iternextfunc)ObjectIterator_iternext,
+					/* iternextfunc tp_iternext */
+
+	/* Attribute descriptor and subclassing stuff */
+	NULL,				/* struct PyMethodDef *tp_methods */
+	NULL,				/* struct PyMemberDef *tp_members */
+	NULL,				/* struct PyGetSetDef *tp_getset */
+	NULL,				/* struct _typeobject *tp_base */
+	NULL,				/* PyObject *tp_dict */
+	NULL,				/* descrgetfunc tp_descr_get */
+	NULL,				/* descrsetfunc tp_descr_set */
+	0,				/* Py_ssize_t tp_dictoffset */
+	NULL,				/* initproc tp_init */
+	NULL,				/* allocfunc tp_alloc */
+	NULL,				/* newfunc tp_new */
+	NULL,		/* freefunc tp_free--Low-level free-memory routine */
+	NULL,		/* inquiry tp_is_gc--For PyObject_IS_GC */
+	NULL,				/* PyObject *tp_bases */
+	NULL,		/* PyObject *tp_mro--method resolution order */
+	NULL,				/* PyObject *tp_cache */
+	NULL,				/* PyObject *tp_subclasses */
+	NULL,				/* PyObject *tp_weaklist */
+	NULL,				/* destructor tp_del */
+
+	/* Type attribute cache version tag. Added in version 2.6 */
+	0,				/* unsigned int tp_version_tag */
+};
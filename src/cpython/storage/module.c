@@ -170,6 +170,18 @@ static PyObject *get_modified_objects(
 	return to_python_list(objects, count);
 }
 
+static PyObject *get_memory_usage(
+	PyObject *self, PyObject *args, PyObject *kwds)
+{
+	struct xorn_memory_usage usage;
+	xorn_get_memory_usage(&usage);
+	return Py_BuildValue("{s:n,s:n,s:n,s:n}",
+			     "reserved", (Py_ssize_t)usage.reserved,
+			     "used", (Py_ssize_t)usage.used,
+			     "objects", (Py_ssize_t)usage.objects,
+			     "strings", (Py_ssize_t)usage.strings);
+}
+
 /****************************************************************************/
 
 static PyObject *select_none(
@@ -403,6 +415,10 @@ static PyMethodDef methods[] = {
 	  PyDoc_STR("get_modified_objects(from, to) -> [Object] -- "
 		    "a list of objects which exist in two revisions but have "
 		    "different type or data") },
+	{ "get_memory_usage", (PyCFunction)get_memory_usage, METH_NOARGS,
+	  PyDoc_STR("get_memory_usage() -> dict -- "
+		    "number of bytes reserved and used for internal data, "
+		    "number of object states, and bytes of string data") },
 
 	{ "select_none", (PyCFunction)select_none, METH_NOARGS,
 	  PyDoc_STR("select_none() -> Selection -- "
@@ -466,6 +482,7 @@ PyMODINIT_FUNC initstorage(void)
 	if (PyType_Ready(&RevisionType) == -1)	return;
 	if (PyType_Ready(&ObjectType) == -1)	return;
 	if (PyType_Ready(&SelectionType) == -1)	return;
+	if (PyType_Ready(&ObjectIteratorType) == -1) return;
 
 	if (PyType_Ready(&ArcType) == -1)	return;
 	if (PyType_Ready(&BoxType) == -1)	return;
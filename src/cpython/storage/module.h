@@ -23,6 +23,7 @@
 extern PyTypeObject RevisionType;
 extern PyTypeObject ObjectType;
 extern PyTypeObject SelectionType;
+extern PyTypeObject ObjectIteratorType;
 
 PyObject *build_object(xorn_object_t ob);
 PyObject *build_selection(xorn_selection_t sel);
@@ -30,6 +31,7 @@ PyObject *build_selection(xorn_selection_t sel);
 typedef struct {
 	PyObject_HEAD
 	xorn_revision_t rev;
+	PyObject *weakreflist;
 } Revision;
 
 typedef struct {
@@ -42,4 +44,6 @@ typedef struct {
 	xorn_selection_t sel;
 } Selection;
 
+PyObject *build_object_iterator(Revision *rev);
+
 #endif
@@ -64,6 +64,8 @@ static int Revision_init(Revision *self, PyObject *args, PyObject *kwds)
 
 static void Revision_dealloc(Revision *self)
 {
+	if (self->weakreflist != NULL)
+		PyObject_ClearWeakRefs((PyObject *)self);
 	xorn_free_revision(self->rev);
 	self->ob_type->tp_free((PyObject *)self);
 }
@@ -112,6 +114,11 @@ static PyObject *Revision_get_objects(
 	return list;
 }
 
+static PyObject *Revision_iter_objects(Revision *self)
+{
+	return build_object_iterator(self);
+}
+
 static PyObject *Revision_object_exists(
 	Revision *self, PyObject *args, PyObject *kwds)
 {
@@ -130,45 +137,32 @@ static PyObject *Revision_object_exists(
 	return result;
 }
 
-static PyObject *Revision_get_object_data(
-	Revision *self, PyObject *args, PyObject *kwds)
+static PyObject *construct_uncached(xorn_revision_t rev, xorn_object_t ob,
+				    xorn_obtype_t type)
 {
-	PyObject *ob_arg = NULL;
-	static char *kwlist[] = { "ob", NULL };
-
-	if (!PyArg_ParseTupleAndKeywords(
-		    args, kwds, "O!:Revision.get_object_data", kwlist,
-		    &ObjectType, &ob_arg))
-		return NULL;
-
-	xorn_object_t ob = ((Object *)ob_arg)->ob;
-	xorn_obtype_t type = xorn_get_object_type(self->rev, ob);
-
 	switch (type) {
 	case xorn_obtype_none:
 		PyErr_SetString(PyExc_KeyError, "object does not exist");
 		return NULL;
 	case xornsch_obtype_arc:
-		return construct_arc(xornsch_get_arc_data(self->rev, ob));
+		return construct_arc(xornsch_get_arc_data(rev, ob));
 	case xornsch_obtype_box:
-		return construct_box(xornsch_get_box_data(self->rev, ob));
+		return construct_box(xornsch_get_box_data(rev, ob));
 	case xornsch_obtype_circle:
-		return construct_circle(
-			xornsch_get_circle_data(self->rev, ob));
+		return construct_circle(xornsch_get_circle_data(rev, ob));
 	case xornsch_obtype_component:
 		return construct_component(
-			xornsch_get_component_data(self->rev, ob));
+			xornsch_get_component_data(rev, ob));
 	case xornsch_obtype_line:
-		return construct_line(xornsch_get_line_data(self->rev, ob));
+		return construct_line(xornsch_get_line_data(rev, ob));
 	case xornsch_obtype_net:
-		return construct_net(xornsch_get_net_data(self->rev, ob));
+		return construct_net(xornsch_get_net_data(rev, ob));
 	case xornsch_obtype_path:
-		return construct_path(xornsch_get_path_data(self->rev, ob));
+		return construct_path(xornsch_get_path_data(rev, ob));
 	case xornsch_obtype_picture:
-		return construct_picture(
-			xornsch_get_picture_data(self->rev, ob));
+		return construct_picture(xornsch_get_picture_data(rev, ob));
 	case xornsch_obtype_text:
-		return construct_text(xornsch_get_text_data(self->rev, ob));
+		return construct_text(xornsch_get_text_data(rev, ob));
 	}
 
 	char buf[BUFSIZ];
@@ -177,6 +171,195 @@ static PyObject *Revision_get_object_data(
 	return NULL;
 }
 
+/* Data objects constructed for finalized revisions are cached by the
+   address of the object data in the storage backend, so revisions
+   which share an object state also share the cache entry.
+
+   Data objects are mutable, so a cached object is only handed out
+   again if nobody else holds a reference to it and it still matches
+   the stored data.  This way, the caller can't tell the difference
+   from a newly constructed object.  */
+
+#define DATA_CACHE_SIZE 1024
+
+static struct {
+	const void *data;
+	xorn_obtype_t type;
+	PyObject *ob;
+} data_cache[DATA_CACHE_SIZE];
+
+static int data_matches(PyObject *ob, xorn_obtype_t type, const void *data)
+{
+	switch (type) {
+	case xorn_obtype_none:
+		return 0;
+	case xornsch_obtype_arc:
+		return matches_arc((Arc *)ob, data);
+	case xornsch_obtype_box:
+		return matches_box((Box *)ob, data);
+	case xornsch_obtype_circle:
+		return matches_circle((Circle *)ob, data);
+	case xornsch_obtype_component:
+		return matches_component((Component *)ob, data);
+	case xornsch_obtype_line:
+		return matches_line((Line *)ob, data);
+	case xornsch_obtype_net:
+		return matches_net((Net *)ob, data);
+	case xornsch_obtype_path:
+		return matches_path((Path *)ob, data);
+	case xornsch_obtype_picture:
+		return matches_picture((Picture *)ob, data);
+	case xornsch_obtype_text:
+		return matches_text((Text *)ob, data);
+	}
+	return 0;
+}
+
+static PyObject *construct_data(xorn_revision_t rev, xorn_object_t ob,
+				xorn_obtype_t type)
+{
+	if (type == xorn_obtype_none || xorn_revision_is_transient(rev))
+		return construct_uncached(rev, ob, type);
+
+	const void *data = xorn_get_object_data(rev, ob, type);
+	size_t i = ((size_t)data >> 4) % DATA_CACHE_SIZE;
+
+	if (data_cache[i].data == data && data_cache[i].type == type &&
+	    Py_REFCNT(data_cache[i].ob) == 1 &&
+	    data_matches(data_cache[i].ob, type, data)) {
+		Py_INCREF(data_cache[i].ob);
+		return data_cache[i].ob;
+	}
+
+	PyObject *result = construct_uncached(rev, ob, type);
+	if (result != NULL) {
+		PyObject *old = data_cache[i].ob;
+		Py_INCREF(result);
+		data_cache[i].data = data;
+		data_cache[i].type = type;
+		data_cache[i].ob = result;
+		Py_XDECREF(old);
+	}
+	return result;
+}
+
+static PyObject *Revision_get_object_data(
+	Revision *self, PyObject *args, PyObject *kwds)
+{
+	PyObject *ob_arg = NULL;
+	static char *kwlist[] = { "ob", NULL };
+
+	if (!PyArg_ParseTupleAndKeywords(
+		    args, kwds, "O!:Revision.get_object_data", kwlist,
+		    &ObjectType, &ob_arg))
+		return NULL;
+
+	xorn_object_t ob = ((Object *)ob_arg)->ob;
+	return construct_data(self->rev, ob,
+			      xorn_get_object_type(self->rev, ob));
+}
+
+static int parse_obtype(PyObject *type_arg, xorn_obtype_t *type_return)
+{
+	if (type_arg == NULL || type_arg == Py_None)
+		*type_return = xorn_obtype_none;
+	else if (type_arg == (PyObject *)&ArcType)
+		*type_return = xornsch_obtype_arc;
+	else if (type_arg == (PyObject *)&BoxType)
+		*type_return = xornsch_obtype_box;
+	else if (type_arg == (PyObject *)&CircleType)
+		*type_return = xornsch_obtype_circle;
+	else if (type_arg == (PyObject *)&ComponentType)
+		*type_return = xornsch_obtype_component;
+	else if (type_arg == (PyObject *)&LineType)
+		*type_return = xornsch_obtype_line;
+	else if (type_arg == (PyObject *)&NetType)
+		*type_return = xornsch_obtype_net;
+	else if (type_arg == (PyObject *)&PathType)
+		*type_return = xornsch_obtype_path;
+	else if (type_arg == (PyObject *)&PictureType)
+		*type_return = xornsch_obtype_picture;
+	else if (type_arg == (PyObject *)&TextType)
+		*type_return = xornsch_obtype_text;
+	else {
+		PyErr_SetString(PyExc_TypeError,
+				"type must be None or an object data type");
+		return -1;
+	}
+	return 0;
+}
+
+static PyObject *Revision_get_objects_with_data(
+	Revision *self, PyObject *args, PyObject *kwds)
+{
+	PyObject *type_arg = NULL;
+	static char *kwlist[] = { "type", NULL };
+	xorn_obtype_t type;
+
+	if (!PyArg_ParseTupleAndKeywords(
+		    args, kwds, "|O:Revision.get_objects_with_data", kwlist,
+		    &type_arg))
+		return NULL;
+	if (parse_obtype(type_arg, &type) == -1)
+		return NULL;
+
+	xorn_object_t *objects;
+	size_t count;
+	PyObject *list;
+	size_t i;
+
+	if (xorn_get_objects(self->rev, &objects, &count) == -1)
+		return PyErr_NoMemory();
+
+	list = PyList_New(0);
+	if (list == NULL) {
+		free(objects);
+		return NULL;
+	}
+
+	for (i = 0; i < count; i++) {
+		xorn_obtype_t ob_type = xorn_get_object_type(
+			self->rev, objects[i]);
+		if (type != xorn_obtype_none && ob_type != type)
+			continue;
+
+		xorn_object_t attached_to = NULL;
+		unsigned int position = -1;
+		xorn_get_object_location(self->rev, objects[i],
+					 &attached_to, &position);
+
+		PyObject *ob_item = build_object(objects[i]);
+		PyObject *data_item = construct_data(
+			self->rev, objects[i], ob_type);
+		PyObject *attached_to_item;
+		if (attached_to == NULL) {
+			Py_INCREF(Py_None);
+			attached_to_item = Py_None;
+		} else
+			attached_to_item = build_object(attached_to);
+
+		PyObject *item = NULL;
+		if (ob_item != NULL && data_item != NULL &&
+		    attached_to_item != NULL)
+			item = Py_BuildValue("OOOI", ob_item, data_item,
+					     attached_to_item, position);
+		Py_XDECREF(attached_to_item);
+		Py_XDECREF(data_item);
+		Py_XDECREF(ob_item);
+
+		if (item == NULL || PyList_Append(list, item) == -1) {
+			Py_XDECREF(item);
+			Py_DECREF(list);
+			free(objects);
+			return NULL;
+		}
+		Py_DECREF(item);
+	}
+
+	free(objects);
+	return list;
+}
+
 static PyObject *Revision_get_object_location(
 	Revision *self, PyObject *args, PyObject *kwds)
 {
@@ -203,6 +386,80 @@ static PyObject *Revision_get_object_location(
 	return Py_BuildValue("NI", build_object(attached_to), position);
 }
 
+static PyObject *Revision_get_object_locations(
+	Revision *self, PyObject *args, PyObject *kwds)
+{
+	PyObject *obs_arg = NULL;
+	static char *kwlist[] = { "obs", NULL };
+
+	if (!PyArg_ParseTupleAndKeywords(
+		    args, kwds, "O:Revision.get_object_locations", kwlist,
+		    &obs_arg))
+		return NULL;
+
+	PyObject *seq = PySequence_Fast(
+		obs_arg, "Revision.get_object_locations() argument must "
+			 "be a sequence of objects");
+	if (seq == NULL)
+		return NULL;
+
+	Py_ssize_t count = PySequence_Fast_GET_SIZE(seq);
+	PyObject **items = PySequence_Fast_ITEMS(seq);
+	xorn_object_t *objects = NULL, *attached_to = NULL;
+	unsigned int *positions = NULL;
+	PyObject *list = NULL;
+	Py_ssize_t i;
+
+	for (i = 0; i < count; i++)
+		if (!PyObject_TypeCheck(items[i], &ObjectType)) {
+			PyErr_SetString(PyExc_TypeError,
+					"sequence items must be objects");
+			goto done;
+		}
+
+	objects = malloc(count * sizeof(xorn_object_t));
+	attached_to = malloc(count * sizeof(xorn_object_t));
+	positions = malloc(count * sizeof(unsigned int));
+	if (count != 0 && (objects == NULL || attached_to == NULL ||
+			   positions == NULL)) {
+		PyErr_NoMemory();
+		goto done;
+	}
+
+	for (i = 0; i < count; i++)
+		objects[i] = ((Object *)items[i])->ob;
+
+	if (xorn_get_object_locations(self->rev, objects, count,
+				      attached_to, positions) == -1) {
+		PyErr_SetString(PyExc_KeyError, "object does not exist");
+		goto done;
+	}
+
+	list = PyList_New(count);
+	if (list == NULL)
+		goto done;
+
+	for (i = 0; i < count; i++) {
+		PyObject *item = attached_to[i] == NULL
+			? Py_BuildValue("OI", Py_None, positions[i])
+			: Py_BuildValue("NI", build_object(attached_to[i]),
+					positions[i]);
+		if (item == NULL) {
+			Py_DECREF(list);
+			list = NULL;
+			goto done;
+		}
+		PyList_SET_ITEM(list, i, item);
+	}
+
+done:
+	free(positions);
+	free(attached_to);
+	free(objects);
+	Py_DECREF(seq);
+	return list;
+}
+
 /****************************************************************************/
 
 static int prepare_data(PyObject *obj, xorn_obtype_t *type_return,
@@ -285,6 +542,138 @@ static PyObject *Revision_add_object(
 	return build_object(ob);
 }
 
+static PyObject *Revision_add_objects(
+	Revision *self, PyObject *args, PyObject *kwds)
+{
+	PyObject *items_arg = NULL;
+	static char *kwlist[] = { "items", NULL };
+
+	if (!PyArg_ParseTupleAndKeywords(
+		    args, kwds, "O:Revision.add_objects", kwlist, &items_arg))
+		return NULL;
+
+	PyObject *seq = PySequence_Fast(
+		items_arg, "Revision.add_objects() argument must be a "
+			   "sequence of (data, attach_to) tuples");
+	if (seq == NULL)
+		return NULL;
+
+	Py_ssize_t count = PySequence_Fast_GET_SIZE(seq);
+	PyObject **items = PySequence_Fast_ITEMS(seq);
+	xorn_obtype_t *types = NULL;
+	const void **data = NULL;
+	ptrdiff_t *attach_to = NULL;
+	xorn_object_t *objects = NULL;
+	PyObject *list = NULL;
+	Py_ssize_t i;
+
+	types = malloc(count * sizeof(xorn_obtype_t));
+	data = malloc(count * sizeof(const void *));
+	attach_to = malloc(count * sizeof(ptrdiff_t));
+	objects = malloc(count * sizeof(xorn_object_t));
+	if (count != 0 && (types == NULL || data == NULL ||
+			   attach_to == NULL || objects == NULL)) {
+		PyErr_NoMemory();
+		goto done;
+	}
+
+	for (i = 0; i < count; i++) {
+		PyObject *data_arg, *attach_to_arg;
+
+		if (!PyTuple_Check(items[i]) ||
+		    PyTuple_GET_SIZE(items[i]) != 2) {
+			PyErr_SetString(PyExc_TypeError,
+					"sequence items must be "
+					"(data, attach_to) tuples");
+			goto done;
+		}
+		data_arg = PyTuple_GET_ITEM(items[i], 0);
+		attach_to_arg = PyTuple_GET_ITEM(items[i], 1);
+
+		if (prepare_data(data_arg, &types[i], &data[i]) == -1) {
+			char buf[BUFSIZ];
+			snprintf(buf, BUFSIZ,
+				 "data must be of xorn.storage object type, "
+				 "not %.50s", data_arg->ob_type->tp_name);
+			PyErr_SetString(PyExc_TypeError, buf);
+			goto done;
+		}
+
+		if (attach_to_arg == Py_None) {
+			attach_to[i] = -1;
+			continue;
+		}
+		if (!PyInt_Check(attach_to_arg)) {
+			char buf[BUFSIZ];
+			snprintf(buf, BUFSIZ,
+				 "attach_to must be int or None, not %.50s",
+				 attach_to_arg->ob_type->tp_name);
+			PyErr_SetString(PyExc_TypeError, buf);
+			goto done;
+		}
+		long index = PyInt_AS_LONG(attach_to_arg);
+		if (index < 0 || index >= i) {
+			PyErr_SetString(PyExc_IndexError,
+			    "attach_to must refer to a preceding item");
+			goto done;
+		}
+		attach_to[i] = index;
+	}
+
+	xorn_error_t err;
+	if (xorn_add_objects(self->rev, count, types, data, attach_to,
+			     objects, &err) == -1) {
+		switch (err) {
+		case xorn_error_revision_not_transient:
+			PyErr_SetString(PyExc_ValueError,
+			    "revision can only be changed while transient");
+			break;
+		case xorn_error_invalid_object_data:
+			PyErr_SetString(PyExc_ValueError,
+			    "invalid object data");
+			break;
+		case xorn_error_invalid_parent:
+			PyErr_SetString(PyExc_ValueError,
+			    "only text objects can be attached, and only "
+			    "to net and component objects");
+			break;
+		case xorn_error_out_of_memory:
+			PyErr_NoMemory();
+			break;
+		case xorn_error_invalid_argument:
+			PyErr_SetString(PyExc_SystemError,
+			    "error preparing object data");
+			break;
+		default:
+			PyErr_SetString(PyExc_SystemError,
+			    "invalid Xorn error code");
+		}
+		goto done;
+	}
+
+	list = PyList_New(count);
+	if (list == NULL)
+		goto done;
+
+	for (i = 0; i < count; i++) {
+		PyObject *ob = build_object(objects[i]);
+		if (ob == NULL) {
+			Py_DECREF(list);
+			list = NULL;
+			goto done;
+		}
+		PyList_SET_ITEM(list, i, ob);
+	}
+
+done:
+	free(objects);
+	free(attach_to);
+	free(data);
+	free(types);
+	Py_DECREF(seq);
+	return list;
+}
+
 static PyObject *Revision_set_object_data(
 	Revision *self, PyObject *args, PyObject *kwds)
 {
@@ -532,6 +921,9 @@ static PyObject *Revision_delete_object(
 			PyErr_SetString(PyExc_KeyError,
 			    "object does not exist");
 			break;
+		case xorn_error_out_of_memory:
+			PyErr_NoMemory();
+			break;
 		default:
 			PyErr_SetString(PyExc_SystemError,
 			    "invalid Xorn error code");
@@ -562,6 +954,9 @@ static PyObject *Revision_delete_objects(
 			PyErr_SetString(PyExc_ValueError,
 			    "revision can only be changed while transient");
 			break;
+		case xorn_error_out_of_memory:
+			PyErr_NoMemory();
+			break;
 		default:
 			PyErr_SetString(PyExc_SystemError,
 			    "invalid Xorn error code");
@@ -591,15 +986,32 @@ static PyMethodDef Revision_methods[] = {
 	  METH_KEYWORDS,
 	  PyDoc_STR("rev.get_object_data(ob) -> Arc/Box/... -- "
 		    "get the data of an object") },
+	{ "iter_objects", (PyCFunction)Revision_iter_objects, METH_NOARGS,
+	  PyDoc_STR("rev.iter_objects() -> iterator -- "
+		    "iterate over all objects in the revision") },
+	{ "get_objects_with_data",
+	  (PyCFunction)Revision_get_objects_with_data, METH_KEYWORDS,
+	  PyDoc_STR("rev.get_objects_with_data(type=None) -> "
+		    "[(Object, data, Object, int)] -- "
+		    "all objects in the revision along with their data "
+		    "and location") },
 	{ "get_object_location", (PyCFunction)Revision_get_object_location,
 	  METH_KEYWORDS,
 	  PyDoc_STR("rev.get_object_location(ob) -> Object, int -- "
 		    "get the location of an object in the object structure") },
+	{ "get_object_locations",
+	  (PyCFunction)Revision_get_object_locations, METH_KEYWORDS,
+	  PyDoc_STR("rev.get_object_locations(obs) -> [(Object, int)] -- "
+		    "get the locations of several objects at once") },
 
 	{ "add_object", (PyCFunction)Revision_add_object, METH_KEYWORDS,
 	  PyDoc_STR("rev.add_object(data) -> Object -- "
 		    "add a new object to the revision\n\n"
 		    "Only callable on a transient revision.\n") },
+	{ "add_objects", (PyCFunction)Revision_add_objects, METH_KEYWORDS,
+	  PyDoc_STR("rev.add_objects(items) -> [Object] -- "
+		    "add several new objects to the revision at once\n\n"
+		    "Only callable on a transient revision.\n") },
 	{ "set_object_data", (PyCFunction)Revision_set_object_data,
 	  METH_KEYWORDS,
 	  PyDoc_STR("rev.set_object_data(ob, data) -- "
@@ -727,7 +1139,7 @@ PyTypeObject RevisionType = {
 	NULL,				/* richcmpfunc tp_richcompare */
 
 	/* weak reference enabler */
-	0,				/* Py_ssize_t tp_weaklistoffset */
+	offsetof(Revision, weakreflist),	/* Py_ssize_t tp_weaklistoffset */
 
 	/* Added in release 2.2 */
 	/* Iterators */
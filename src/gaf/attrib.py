@@ -34,10 +34,18 @@
 # In addition to its attached attributes, a component inherits the
 # attributes which live as toplevel un-attached attributes inside the
 # \c prim_objs of its symbol.
+#
+# Since finalized revisions can't change, the parsed attributes of an
+# object in a finalized revision are remembered the first time they
+# are searched, making further searches a dictionary lookup.
 
+import weakref
 import xorn.storage
 import xorn.proxy
 
+# revision -> object (or None for floating attributes) -> name -> values
+_indices = weakref.WeakKeyDictionary()
+
 ## Raised when trying to parse a text object that is not recognized as
 ## an attribute.
 
@@ -62,7 +70,13 @@ def parse_string(string):
     if string[ptr - 1] == ' ' or string[ptr + 1] == ' ':
         raise MalformedAttributeError
 
-    return string[:ptr], string[ptr + 1:]
+    # Attribute names are compared and used as dictionary keys a lot;
+    # interning them turns most of these comparisons into identity
+    # checks and avoids keeping many copies of the same name.
+    name = string[:ptr]
+    if type(name) == str:
+        name = intern(name)
+    return name, string[ptr + 1:]
 
 ## Tell whether an object is a text object whose text constitutes a
 ## valid attribute.
@@ -144,13 +158,66 @@ def search(attribs, name):
             found += [attrib_value]
     return found
 
+## Return a dictionary mapping the names of the attributes attached
+## to an object in a finalized revision to their values.
+#
+# If \a ob is \c None, returns the floating attributes of \a rev
+# instead.  If \a rev is transient, returns \c None.
+#
+# \throw KeyError if the object doesn't exist
+
+def _attribute_index(rev, ob):
+    if rev.is_transient():
+        return None
+    try:
+        indices = _indices[rev]
+    except KeyError:
+        indices = _indices[rev] = {}
+    try:
+        return indices[ob]
+    except KeyError:
+        pass
+
+    if ob is None:
+        attribs = xorn.proxy.RevisionProxy(rev).toplevel_objects()
+    else:
+        attribs = xorn.proxy.ObjectProxy(rev, ob).attached_objects()
+
+    index = {}
+    for attrib in attribs:
+        data = attrib.data()
+        if not isinstance(data, xorn.storage.Text):
+            continue
+        try:
+            attrib_name, attrib_value = parse_string(data.text)
+        except MalformedAttributeError:
+            continue
+        try:
+            index[attrib_name].append(attrib_value)
+        except KeyError:
+            index[attrib_name] = [attrib_value]
+
+    indices[ob] = index
+    return index
+
+## Search the attributes attached to an object (or the floating
+## attributes if \a ob is \c None) using the index if possible.
+
+def _search_indexed(rev, ob, name):
+    index = _attribute_index(rev, ob)
+    if index is not None:
+        return list(index.get(name, ()))
+    if ob is None:
+        return search(xorn.proxy.RevisionProxy(rev).toplevel_objects(), name)
+    return search(xorn.proxy.ObjectProxy(rev, ob).attached_objects(), name)
+
 ## Search the floating attributes in a revision for an attribute name
 ## and return matching values.
 #
 # \return List of strings with the values of the matching attributes.
 
 def search_floating(rev, name):
-    return search(rev.toplevel_objects(), name)
+    return _search_indexed(rev.rev, None, name)
 
 ## Search attributes attached to a net or component for an attribute
 ## name and return matching values.
@@ -160,7 +227,7 @@ def search_floating(rev, name):
 # \return List of strings with the values of the matching attributes.
 
 def search_attached(ob, name):
-    return search(ob.attached_objects(), name)
+    return _search_indexed(ob.rev, ob.ob, name)
 
 ## Search attributes inherited by a component for an attribute name
 ## and return matching values.
@@ -171,7 +238,10 @@ def search_attached(ob, name):
 # \return List of strings with the values of the matching attributes.
 
 def search_inherited(ob, name):
-    return search(inherited_objects(ob), name)
+    data = ob.data()
+    if not isinstance(data, xorn.storage.Component):
+        raise ValueError
+    return _search_indexed(data.symbol.prim_objs, None, name)
 
 ## Search both attached and inherited attributes of a component for an
 ## attribute name and return matching values.
@@ -184,7 +254,7 @@ def search_inherited(ob, name):
 # \return List of strings with the values of the matching attributes.
 
 def search_all(ob, name):
-    return search(ob.attached_objects() + inherited_objects(ob), name)
+    return search_attached(ob, name) + search_inherited(ob, name)
 
 
 ## Return all pins in a component with a particular attribute.
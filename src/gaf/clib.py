@@ -49,10 +49,14 @@
 # get_symbol.  If the source of a symbol isn't known, the symbol data
 # may be requested using the convenience function \ref lookup_symbol.
 
-import collections, fnmatch, os, shlex, stat, subprocess, sys
+import bisect, collections, cStringIO, fnmatch, os, select, shlex, stat
+import subprocess, sys, threading, time
+import multiprocessing.pool
 from gettext import gettext as _
+import gaf.fileformat
 import gaf.read
 import gaf.ref
+import gaf.symcache
 import xorn.proxy
 import xorn.storage
 
@@ -64,8 +68,13 @@ def sym_filename_filter(basename):
            basename.lower().endswith('.sym.xml')
 
 ## Named tuple class for storing data about a particular component source.
+#
+# \c symbols is the sorted list of symbol names available from the
+# source, and \c symbol_counts maps each name to the number of times
+# it occurs in \c symbols.
 
-Source = collections.namedtuple('Source', ['callback', 'symbols', 'name'])
+Source = collections.namedtuple(
+    'Source', ['callback', 'symbols', 'name', 'symbol_counts'])
 
 ## List of source triples for all known component sources.
 
@@ -93,6 +102,32 @@ _symbol_cache = {}
 
 load_pixmaps = False
 
+## Maximum number of threads used by \ref preload_symbols.
+#
+# Setting this to \c 1 disables concurrent loading.
+
+preload_jobs = 8
+
+## Exceptions raised while preloading symbols.
+#
+# The key of the hashtable is a pair <tt>(source, symbol)</tt>, and
+# the value is the \c sys.exc_info() tuple of the exception.  The
+# exception is re-raised by \ref get_symbol when the symbol is
+# actually requested, so errors are reported only once and at the
+# expected point.
+
+_preload_errors = {}
+
+## Messages logged while preloading symbols.
+#
+# The key of the hashtable is a pair <tt>(source, symbol)</tt>, and
+# the value is a list of messages which would have been written to
+# \c sys.stderr.  They are written by \ref get_symbol when the symbol
+# is actually requested, so messages are printed from the main thread
+# and only for symbols which are used.
+
+_preload_messages = {}
+
 
 ## Raised on symbol lookup if the symbol isn't found in the library.
 
@@ -112,27 +147,106 @@ class DuplicateError(Exception):
 # ending in ".sym" (case insensitive) are considered to be symbol
 # files.  Symbol files with filenames starting with a period "." are
 # ignored.
+#
+# If \a cache_directory is given, the directory listing and the
+# parsed symbols are cached there across runs (see gaf.symcache).
 
 class DirectorySource:
-    def __init__(self, directory, recursive):
+    def __init__(self, directory, recursive, cache_directory = None):
         ## Path to directory
         self.directory = directory
         ## Whether to recurse into subdirectories.
         self.recursive = recursive
 
+        # On-disk cache, or \c None if caching is disabled.
+        self._cache = None
+        listing = None
+        if cache_directory is not None:
+            self._cache = gaf.symcache.SymbolCache(
+                cache_directory, directory, recursive)
+            listing = self._cache.load_listing()
+
+        # Directory listings from the last recursive scan, keyed by
+        # path.  Each value is a tuple (mtime, filenames, subdirs)
+        # where \c filenames is sorted and \c subdirs contains the
+        # paths of the subdirectories os.walk would descend into.
+        self._dirs = listing if recursive and listing is not None else {}
+        # Resolved path of each file name found in the last recursive
+        # scan, or \c None if the directory hasn't been scanned yet.
+        self._paths = None
+        # Cached result of a non-recursive scan as a tuple (mtime,
+        # entries).  Only used if caching is enabled.
+        self._listing = listing if not recursive else None
+
+    ## Rescan the directory tree.
+    #
+    # Only directories whose mtime changed since the last scan are
+    # listed again; the listings of the others are reused.  Produces
+    # the same result as \c sorted(os.walk(self.directory)).
+
+    def _scan(self):
+        dirs = {}
+        changed = False
+        stack = [self.directory]
+        while stack:
+            dirpath = stack.pop()
+            try:
+                mtime = os.stat(dirpath).st_mtime
+            except OSError:
+                continue
+            entry = self._dirs.get(dirpath)
+            if entry is None or entry[0] != mtime:
+                try:
+                    names = os.listdir(dirpath)
+                except OSError:
+                    continue
+                filenames = []
+                subdirs = []
+                for name in names:
+                    path = os.path.join(dirpath, name)
+                    if not os.path.isdir(path):
+                        filenames.append(name)
+                    elif not os.path.islink(path):
+                        subdirs.append(path)
+                entry = mtime, sorted(filenames), subdirs
+                changed = True
+            dirs[dirpath] = entry
+            stack.extend(entry[2])
+        if len(dirs) != len(self._dirs):
+            changed = True
+        self._dirs = dirs
+        if changed and self._cache is not None:
+            self._cache.store_listing(dirs)
+
+        paths = {}
+        for dirpath in sorted(dirs):
+            for filename in dirs[dirpath][1]:
+                if filename not in paths:
+                    paths[filename] = os.path.join(dirpath, filename)
+        self._paths = paths
+
     ## Scan the directory for symbols.
 
     def list(self):
         if not self.recursive:
-            # skip subdirectories and anything else that isn't a
-            # regular file (this is what libgeda does)
-            entries = (entry for entry in os.listdir(self.directory)
-                       if stat.S_ISREG(
-                         os.stat(os.path.join(self.directory, entry)).st_mode))
+            if self._cache is not None:
+                mtime = os.stat(self.directory).st_mtime
+            if self._listing is not None and self._listing[0] == mtime:
+                entries = self._listing[1]
+            else:
+                # skip subdirectories and anything else that isn't a
+                # regular file (this is what libgeda does)
+                entries = (entry for entry in os.listdir(self.directory)
+                           if stat.S_ISREG(os.stat(
+                               os.path.join(self.directory, entry)).st_mode))
+                if self._cache is not None:
+                    entries = list(entries)
+                    self._listing = mtime, entries
+                    self._cache.store_listing(self._listing)
         else:
-            entries = (entry for dirpath, dirnames, filenames
-                          in sorted(os.walk(self.directory))
-                       for entry in sorted(filenames))
+            self._scan()
+            entries = (entry for dirpath in sorted(self._dirs)
+                       for entry in self._dirs[dirpath][1])
 
         return (entry for entry in entries
                 # skip hidden files ("." and ".." are excluded by
@@ -149,17 +263,38 @@ class DirectorySource:
             if not os.path.isfile(path):  # resolves symlinks
                 path = None
         else:
-            path = None
-            for dirpath, dirnames, filenames in \
-                    sorted(os.walk(self.directory)):
-                if symbol in filenames:
-                    path = os.path.join(dirpath, symbol)
-                    break
-
-        if path is not None:
+            if self._paths is None:
+                self._scan()
+            path = self._paths.get(symbol)
+            if path is None or not os.path.exists(path):
+                # the tree has changed since the last scan
+                self._scan()
+                path = self._paths.get(symbol)
+
+        if path is None:
+            raise ValueError, 'symbol "%s" not found in library' % symbol
+
+        if self._cache is None:
             return gaf.read.read(path, load_pixmaps = load_pixmaps)
 
-        raise ValueError, 'symbol "%s" not found in library' % symbol
+        cached = self._cache.load_symbol(path, load_pixmaps)
+        if cached is not None:
+            rev, messages = cached
+            # repeat the warnings printed when the file was read
+            for message in messages:
+                gaf.read.write_message(message)
+            return xorn.proxy.RevisionProxy(rev)
+        st = os.stat(path)
+        messages = []
+        previous = gaf.read.capture_messages(messages)
+        try:
+            rev = gaf.read.read(path, load_pixmaps = load_pixmaps)
+        finally:
+            gaf.read.capture_messages(previous)
+            for message in messages:
+                gaf.read.write_message(message)
+        self._cache.store_symbol(path, st, load_pixmaps, rev.rev, messages)
+        return rev
 
 
 ## Source object representing a pair of symbol-generating commands.
@@ -180,13 +315,52 @@ class DirectorySource:
 # If the command cannot successfully complete, it should exit with
 # non-zero exit status.  Anything it has output on stdout will be
 # ignored, so stderr should be used for diagnostics.
+#
+# Starting the get command once per symbol can be slow.  If \a
+# server_cmd is given, up to \a pool_size instances of it are started
+# on demand and kept running, and symbols are requested from them
+# using the following protocol: for each request, the symbol name is
+# written to the server's standard input, followed by a newline.  The
+# server answers on its standard output with either a line
+# <tt>OK <i>length</i></tt> followed by \e length bytes of gEDA
+# symbol data, or a line <tt>ERROR <i>message</i></tt> if the symbol
+# can't be retrieved.  The server should exit when its standard input
+# is closed.
+#
+# If a server can't be started, doesn't answer within \a timeout
+# seconds, or violates the protocol, it is terminated and the get
+# command is used instead for all further requests.
 
 class CommandSource:
-    def __init__(self, list_cmd, get_cmd):
+    ## Maximum number of get commands run at the same time by
+    ## \ref preload_symbols.
+
+    max_jobs = 4
+
+    def __init__(self, list_cmd, get_cmd,
+                 server_cmd = None, pool_size = 4, timeout = 30.):
         ## Command and arguments for listing available symbols
         self.list_cmd = list_cmd
         ## Command and arguments for retrieving symbol data
         self.get_cmd = get_cmd
+        ## Command and arguments for starting a symbol server, or \c None
+        self.server_cmd = server_cmd
+        ## Maximum number of symbol servers running at the same time
+        self.pool_size = pool_size
+        ## Seconds to wait for a symbol server to answer a request
+        self.timeout = timeout
+
+        if server_cmd is not None:
+            self.max_jobs = pool_size
+
+        self._lock = threading.Lock()
+        self._server_available = threading.Condition(self._lock)
+        # Running servers which aren't currently handling a request
+        self._idle_servers = []
+        # Total number of running servers
+        self._server_count = 0
+        # Whether a server has failed and the get command is used instead
+        self._server_failed = False
 
     ## Poll the library command for symbols.
     #
@@ -211,10 +385,88 @@ class CommandSource:
     ## Get symbol data for a given symbol name.
 
     def get(self, symbol):
+        if self.server_cmd is not None and not self._server_failed:
+            data = self._request(symbol)
+            if data is not None:
+                return gaf.read.read_file(
+                    cStringIO.StringIO(data), '<pipe>',
+                    gaf.fileformat.FORMAT_SYM, load_pixmaps = load_pixmaps)
+
         return _run_source_command(
             shlex.split(self.get_cmd) + [symbol],
             lambda f: gaf.read.read_file(
-                f, '<pipe>', load_pixmaps = load_pixmaps))
+                f, '<pipe>', gaf.fileformat.FORMAT_SYM,
+                load_pixmaps = load_pixmaps))
+
+    ## Terminate all running symbol servers.
+
+    def close(self):
+        with self._lock:
+            servers = self._idle_servers[:]
+            del self._idle_servers[:]
+            self._server_count -= len(servers)
+        for server in servers:
+            server.close(self.timeout)
+
+    ## Request symbol data from a symbol server.
+    #
+    # Returns \c None if the server failed and the get command should
+    # be used instead.
+    #
+    # \throws ValueError if the server reported an error
+
+    def _request(self, symbol):
+        with self._lock:
+            while not self._server_failed and not self._idle_servers and \
+                    self._server_count >= self.pool_size:
+                self._server_available.wait()
+            if self._server_failed:
+                return None
+            if self._idle_servers:
+                server = self._idle_servers.pop()
+            else:
+                server = None
+                self._server_count += 1
+
+        try:
+            if server is None:
+                server = _SymbolServer(shlex.split(self.server_cmd))
+            data = server.request(symbol, self.timeout)
+        except _SymbolServerError as e:
+            if server is not None:
+                server.kill()
+            with self._lock:
+                self._server_count -= 1
+                if not self._server_failed:
+                    sys.stderr.write(_("Library server failed [%s]: %s\n")
+                                     % (self.server_cmd, e))
+                    self._server_failed = True
+                self._server_available.notify_all()
+            self.close()
+            return None
+        except ValueError:
+            # the server is still usable after it reported an error
+            self._release(server)
+            raise
+        except:
+            if server is not None:
+                server.kill()
+            with self._lock:
+                self._server_count -= 1
+                self._server_available.notify()
+            raise
+        self._release(server)
+        return data
+
+    def _release(self, server):
+        with self._lock:
+            if not self._server_failed:
+                self._idle_servers.append(server)
+                self._server_available.notify()
+                return
+            self._server_count -= 1
+            self._server_available.notify()
+        server.close(self.timeout)
 
 
 ## Execute a library command.
@@ -233,14 +485,14 @@ class CommandSource:
 
 def _run_source_command(args, callback):
     p = subprocess.Popen(
-        args, bufsize = 4096, executable = executable,
+        args, bufsize = 4096,
         stdout = subprocess.PIPE, close_fds = True) # cwd = virtual_cwd
 
     try:
         return callback(p.stdout)
     finally:
         try:
-            p.read()  # avoid deadlock
+            p.stdout.read()  # avoid deadlock
         finally:
             p.wait()
             if p.returncode < 0:
@@ -250,6 +502,113 @@ def _run_source_command(args, callback):
                 raise ValueError, "Library command failed [%s]: "\
                     "returned exit status %d" % (args[0], p.returncode)
 
+## Raised by _SymbolServer if the server process failed.
+
+class _SymbolServerError(Exception):
+    pass
+
+## A running symbol server process.
+#
+# See CommandSource for a description of the protocol.
+
+class _SymbolServer:
+    def __init__(self, args):
+        try:
+            self.p = subprocess.Popen(
+                args, bufsize = 0, stdin = subprocess.PIPE,
+                stdout = subprocess.PIPE, close_fds = True)
+        except OSError as e:
+            raise _SymbolServerError, e.strerror
+        # Data which has been read from the server but not processed yet
+        self.buf = ''
+
+    ## Read more data from the server into \c self.buf.
+
+    def _read(self, deadline):
+        fd = self.p.stdout.fileno()
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise _SymbolServerError, "timed out"
+            if select.select([fd], [], [], remaining)[0]:
+                break
+        data = os.read(fd, 65536)
+        if not data:
+            raise _SymbolServerError, "unexpected end of output"
+        self.buf += data
+
+    ## Request the data of a symbol.
+    #
+    # \throws ValueError          if the server reported an error
+    # \throws _SymbolServerError  if the server failed
+
+    def request(self, symbol, timeout):
+        if isinstance(symbol, unicode):
+            symbol = symbol.encode('utf-8')
+        if '\n' in symbol:
+            raise ValueError, "Symbol name contains a newline"
+        deadline = None if timeout is None else time.time() + timeout
+
+        try:
+            self.p.stdin.write(symbol + '\n')
+            self.p.stdin.flush()
+        except (IOError, OSError) as e:
+            raise _SymbolServerError, e.strerror
+
+        while '\n' not in self.buf:
+            self._read(deadline)
+        header, self.buf = self.buf.split('\n', 1)
+
+        if header.startswith('ERROR'):
+            raise ValueError, "Library server failed to get symbol " \
+                "[%s]: %s" % (symbol, header[6:])
+        if not header.startswith('OK '):
+            raise _SymbolServerError, "invalid response"
+        try:
+            length = int(header[3:])
+        except ValueError:
+            raise _SymbolServerError, "invalid response"
+        if length < 0:
+            raise _SymbolServerError, "invalid response"
+
+        while len(self.buf) < length:
+            self._read(deadline)
+        data, self.buf = self.buf[:length], self.buf[length:]
+        return data
+
+    ## Close the server's standard input and wait for it to exit.
+    #
+    # If the server doesn't exit within \a timeout seconds, it is
+    # killed.
+
+    def close(self, timeout = None):
+        try:
+            self.p.stdin.close()
+        except (IOError, OSError):
+            pass
+        if timeout is not None:
+            deadline = time.time() + timeout
+            while self.p.poll() is None:
+                if time.time() >= deadline:
+                    self._kill()
+                    break
+                time.sleep(.01)
+        self.p.wait()
+
+    ## Terminate the server without waiting for it to exit cleanly.
+
+    def kill(self):
+        self._kill()
+        self.close()
+
+    def _kill(self):
+        try:
+            self.p.kill()
+        except OSError:
+            pass
+
 ## Update list of symbols available from a component source.
 #
 # Calls \c source.callback.list() and performs type and uniqueness
@@ -267,16 +626,18 @@ def _update_symbol_list(source):
         raise TypeError, "Failed to scan library [%s]: " \
             "Python function returned non-list" % source.name
 
-    found = set()
+    counts = {}
     duplicate = set()
     for symbol in symbols:
         if not isinstance(symbol, str) and \
            not isinstance(symbol, unicode):
             raise TypeError, "Non-string symbol name " \
                 "while scanning library [%s]" % source.name
-        if symbol in found:
+        if symbol in counts:
             duplicate.add(symbol)
-        found.add(symbol)
+            counts[symbol] += 1
+        else:
+            counts[symbol] = 1
 
     if duplicate:
         if source.name:
@@ -290,6 +651,8 @@ def _update_symbol_list(source):
 
     symbols.sort()
     source.symbols[:] = symbols
+    source.symbol_counts.clear()
+    source.symbol_counts.update(counts)
 
 
 ## Add a component source to the library.
@@ -311,7 +674,7 @@ def add_source(callback, name):
             raise ValueError, "There is already a source called '%s'" % name
 
     # Sources added later get scanned earlier
-    source = Source(callback, [], name)
+    source = Source(callback, [], name, {})
     _update_symbol_list(source)
     _sources.insert(0, source)
 
@@ -364,13 +727,21 @@ def refresh():
 
     _search_cache.clear()
     _symbol_cache.clear()
+    _preload_errors.clear()
+    _preload_messages.clear()
 
 ## Remove all component library sources.
 
 def reset():
+    for source in _sources:
+        close = getattr(source.callback, 'close', None)
+        if close is not None:
+            close()
     del _sources[:]
     _search_cache.clear()
     _symbol_cache.clear()
+    _preload_errors.clear()
+    _preload_messages.clear()
 
 
 ## Get symbol object for a given source object and symbol name.
@@ -386,14 +757,30 @@ def get_symbol(source, symbol):
     assert source is not None
     assert symbol is not None
 
+    # Print messages which were logged while preloading the symbol.
+    for message in _preload_messages.pop((id(source), symbol), []):
+        sys.stderr.write(message)
+
     # First, try the cache.
     try:
         return _symbol_cache[id(source), symbol]
     except KeyError:
         pass
 
+    # Re-raise errors which occurred while preloading the symbol.
+    try:
+        exc_info = _preload_errors.pop((id(source), symbol))
+    except KeyError:
+        pass
+    else:
+        raise exc_info[0], exc_info[1], exc_info[2]
+
     # If the symbol wasn't found in the cache, get it directly.
-    data = source.callback.get(symbol)
+    return _add_symbol(source, symbol, source.callback.get(symbol))
+
+## Create and cache a symbol object from data returned by a source.
+
+def _add_symbol(source, symbol, data):
     if isinstance(data, xorn.proxy.RevisionProxy):
         data = data.rev
     if not isinstance(data, xorn.storage.Revision):
@@ -415,7 +802,99 @@ def invalidate_symbol_data(source, symbol):
         del _symbol_cache[id(source), symbol]
     except KeyError:
         pass
+    try:
+        del _preload_errors[id(source), symbol]
+    except KeyError:
+        pass
+    try:
+        del _preload_messages[id(source), symbol]
+    except KeyError:
+        pass
+
+## Load several symbols concurrently.
+#
+# Looks up the given symbol names in the library and fetches the data
+# of those which aren't cached yet using up to \ref preload_jobs
+# threads, so subsequent calls to \ref lookup_symbol for these names
+# don't have to wait for the sources.  Source objects which have a \c
+# max_jobs attribute are accessed by at most that many threads at a
+# time.
+#
+# Names which aren't found or are ambiguous are ignored; the error is
+# raised when the symbol is looked up.  Messages logged while reading
+# the symbols are printed when the symbol is looked up, too.
+
+def preload_symbols(names):
+    tasks = []
+    keys = set()
+    for name in names:
+        try:
+            symlist = search(name)
+        except DuplicateError:
+            continue
+        if not symlist:
+            continue
+        source, symbol = symlist[0]
+        key = id(source), symbol
+        if key not in _symbol_cache and key not in _preload_errors \
+                and key not in keys:
+            keys.add(key)
+            tasks.append((source, symbol))
+
+    if preload_jobs < 2 or len(tasks) < 2:
+        return
+
+    semaphores = {}
+    for source, symbol in tasks:
+        if id(source) not in semaphores:
+            max_jobs = getattr(source.callback, 'max_jobs', None)
+            if max_jobs is not None:
+                semaphores[id(source)] = threading.BoundedSemaphore(max_jobs)
+            else:
+                semaphores[id(source)] = None
+
+    def fetch(task):
+        source, symbol = task
+        semaphore = semaphores[id(source)]
+        if semaphore is not None:
+            semaphore.acquire()
+        messages = []
+        previous = gaf.read.capture_messages(messages)
+        try:
+            return source.callback.get(symbol), None, messages
+        except Exception:
+            return None, sys.exc_info(), messages
+        finally:
+            gaf.read.capture_messages(previous)
+            if semaphore is not None:
+                semaphore.release()
+
+    pool = multiprocessing.pool.ThreadPool(min(preload_jobs, len(tasks)))
+    try:
+        results = pool.map(fetch, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+    for (source, symbol), (data, exc_info, messages) in zip(tasks, results):
+        if messages:
+            _preload_messages[id(source), symbol] = messages
+        if exc_info is None:
+            try:
+                _add_symbol(source, symbol, data)
+                continue
+            except ValueError:
+                exc_info = sys.exc_info()
+        _preload_errors[id(source), symbol] = exc_info
+
 
+## Return the part of a glob pattern before the first wildcard.
+
+def _glob_prefix(pattern):
+    for i, c in enumerate(pattern):
+        if c in '*?[':
+            return pattern[:i]
+    return pattern
 
 ## Find all symbols matching a pattern.
 #
@@ -434,16 +913,27 @@ def search(pattern, glob = False):
     except KeyError:
         pass
 
+    if glob:
+        prefix = _glob_prefix(pattern)
+
     result = []
     for source in _sources:
         if glob:
-            for symbol in fnmatch.filter(source.symbols, pattern):
+            # only look at the symbols starting with the literal
+            # part of the pattern
+            symbols = source.symbols
+            start = end = bisect.bisect_left(symbols, prefix)
+            while end < len(symbols) and symbols[end].startswith(prefix):
+                end += 1
+            for symbol in fnmatch.filter(symbols[start:end], pattern):
                 result.append((source, symbol))
-        elif pattern in source.symbols:
-            if source.symbols.count(pattern) > 1:
+        else:
+            count = source.symbol_counts.get(pattern, 0)
+            if count > 1:
                 raise DuplicateError, \
                     "More than one component found with name [%s]" % pattern
-            result.append((source, pattern))
+            if count:
+                result.append((source, pattern))
 
     _search_cache[pattern, glob] = result
     return result[:]
@@ -496,10 +986,9 @@ def lookup_symbol(name):
 
 def used_symbols0(rev):
     symbols = []
-    for ob in rev.all_objects():
-        data = ob.data()
-        if isinstance(data, xorn.storage.Component) \
-               and data.symbol not in symbols:
+    for ob, data, attached_to, pos in \
+            rev.objects_with_data(xorn.storage.Component):
+        if data.symbol not in symbols:
             symbols.append(data.symbol)
     return symbols
 
@@ -516,11 +1005,8 @@ def used_symbols0(rev):
 def used_symbols1(rev):
     result = []
 
-    for ob in rev.all_objects():
-        data = ob.data()
-        if not isinstance(data, xorn.storage.Component):
-            continue
-
+    for ob, data, attached_to, pos in \
+            rev.objects_with_data(xorn.storage.Component):
         # ignore embedded symbols
         if data.symbol.embedded:
             continue
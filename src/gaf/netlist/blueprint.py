@@ -24,6 +24,7 @@
 # knowing anything about the rest of the hierarchy.
 
 import sys
+import weakref
 from gettext import gettext as _
 import xorn.hybridnum
 import xorn.proxy
@@ -31,15 +32,30 @@ import xorn.storage
 import gaf.attrib
 import gaf.netlist.conn
 
+## Collect all net instances connected to \a instance into \a netY.
+#
+# The instances are visited depth-first in the order returned by
+# \c cmap.connected_to.  An explicit stack is used instead of
+# recursion so long chains of net segments don't exceed Python's
+# recursion limit.
+
 def traverse_net(cmap, instance, netsY_by_instance, netY):
     if instance in netsY_by_instance:
         return
 
     netY.append(instance)
     netsY_by_instance[instance] = netY
-
-    for other_instance in cmap.connected_to(instance):
-        traverse_net(cmap, other_instance, netsY_by_instance, netY)
+    stack = [iter(cmap.connected_to(instance))]
+
+    while stack:
+        for other_instance in stack[-1]:
+            if other_instance not in netsY_by_instance:
+                netY.append(other_instance)
+                netsY_by_instance[other_instance] = netY
+                stack.append(iter(cmap.connected_to(other_instance)))
+                break
+        else:
+            stack.pop()
 
 ## A netlist for a single schematic.
 
@@ -58,9 +74,9 @@ class Schematic:
         # populated by gaf.netlist.pp_hierarchy
         self.ports = None
 
-        for ob in rev.toplevel_objects():
-            data = ob.data()
-            if not isinstance(data, xorn.storage.Component):
+        for ob, data, attached_to, pos in \
+                rev.objects_with_data(xorn.storage.Component):
+            if attached_to is not None:
                 continue
 
             if data.symbol.prim_objs is None:
@@ -121,6 +137,51 @@ class Schematic:
 def format_coord(coord):
     return xorn.hybridnum.format(coord, 3)
 
+## Return the pins in a symbol.
+#
+# \return A list of xorn.proxy.ObjectProxy instances.
+
+def symbol_pins(prim_objs):
+    pins = []
+    for ob, data, attached_to, pos in \
+            xorn.proxy.RevisionProxy(prim_objs).objects_with_data(
+                xorn.storage.Net):
+        if attached_to is not None:
+            continue
+        assert data.is_pin
+        pins.append(ob)
+    return pins
+
+## Information about a symbol shared by all components using it.
+#
+# Only exists for symbols with finalized contents (which is the case
+# for all symbols loaded from a library); otherwise, the symbol might
+# change between uses.
+
+class SymbolTemplate:
+    def __init__(self, prim_objs):
+        self.pin_obs = symbol_pins(prim_objs)
+
+        # populated by gaf.netlist.pp_slotting
+        self.parsed_slotdefs = {}
+
+        # populated by gaf.netlist.pp_netattrib
+        self.inherited_net_attribs = None
+
+_symbol_templates = weakref.WeakKeyDictionary()
+
+## Return the template for a symbol, or \c None if the symbol
+## contents are transient.
+
+def symbol_template(prim_objs):
+    if prim_objs.is_transient():
+        return None
+    try:
+        return _symbol_templates[prim_objs]
+    except KeyError:
+        template = _symbol_templates[prim_objs] = SymbolTemplate(prim_objs)
+        return template
+
 ## %Component in a single schematic's netlist.
 
 class Component:
@@ -183,13 +244,16 @@ class Component:
         assert isinstance(data, xorn.storage.Component)
         assert data.symbol.prim_objs is not None
 
-        for pin_ob in xorn.proxy.RevisionProxy(
-                data.symbol.prim_objs).toplevel_objects():
-            pin_data = pin_ob.data()
-            if not isinstance(pin_data, xorn.storage.Net):
-                continue
+        ## Shared symbol information, or \c None if the symbol is
+        ## transient.
+        self.template = symbol_template(data.symbol.prim_objs)
+
+        if self.template is not None:
+            pin_obs = self.template.pin_obs
+        else:
+            pin_obs = symbol_pins(data.symbol.prim_objs)
 
-            assert pin_data.is_pin
+        for pin_ob in pin_obs:
             assert pin_ob not in self.pins_by_ob
 
             pin = Pin(self, pin_ob)
@@ -430,7 +494,9 @@ class Net:
                     schematic.components_by_ob[path[0]].pins_by_ob[ob])
 
         # sort net segments and pins to achieve a stable output order
-        self.net_segments.sort(key = lambda ob: ob.location()[1])
+        locations = schematic.rev.object_locations(self.net_segments)
+        self.net_segments = [ob for location, ob in sorted(
+            zip(locations, self.net_segments), key = lambda x: x[0][1])]
         self.pins.sort(key = lambda pin: (pin.component.ob.location()[1],
                                           pin.ob.location()[1]))
 
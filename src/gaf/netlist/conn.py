@@ -26,7 +26,7 @@
 # next component or (in the case of the last component) the net, and
 # \c ob is the actual net object.
 
-import collections
+import bisect, collections
 
 import xorn.proxy
 import xorn.storage
@@ -127,6 +127,102 @@ def all_net_instances_in_object(ob, path = ()):
         return []
 
 
+## Index of intervals on a line supporting stabbing queries.
+#
+# Used to look up the net segments on a given horizontal or vertical
+# line which strictly contain a given point.  The intervals are kept
+# in a centered interval tree which is rebuilt lazily on the first
+# query after a change, so a batch of changes only causes a single
+# rebuild.  Queries take O(log n + k) time (plus sorting the k
+# results back into insertion order).
+
+class IntervalIndex:
+    def __init__(self):
+        self.intervals = {}
+        self.counter = 0
+        self.tree = None
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.intervals)
+
+    ## Add an item spanning the closed interval between \a a and \a b.
+
+    def add(self, a, b, item):
+        self.intervals[item] = min(a, b), max(a, b), self.counter, item
+        self.counter += 1
+        self.dirty = True
+
+    def remove(self, item):
+        del self.intervals[item]
+        self.dirty = True
+
+    ## Return all items whose interval contains \a value, excluding
+    ## those for which \a value is an endpoint.
+    #
+    # The items are returned in the order in which they were added.
+
+    def stab(self, value):
+        if self.dirty:
+            self.tree = _build_interval_tree(self.intervals.values())
+            self.dirty = False
+
+        result = []
+        node = self.tree
+        while node is not None:
+            center, by_lo, by_hi, left, right = node
+            if value < center:
+                for entry in by_lo:
+                    if entry[0] >= value:
+                        break
+                    result.append(entry)
+                node = left
+            elif value > center:
+                for entry in by_hi:
+                    if entry[1] <= value:
+                        break
+                    result.append(entry)
+                node = right
+            else:
+                for entry in by_lo:
+                    if entry[0] >= value:
+                        break
+                    if entry[1] > value:
+                        result.append(entry)
+                break
+
+        result.sort(key = lambda entry: entry[2])
+        return [entry[3] for entry in result]
+
+def _build_interval_tree(entries):
+    if not entries:
+        return None
+
+    points = sorted(x for entry in entries for x in entry[:2])
+    center = points[len(points) // 2]
+
+    left, here, right = [], [], []
+    for entry in entries:
+        if entry[1] < center:
+            left.append(entry)
+        elif entry[0] > center:
+            right.append(entry)
+        else:
+            here.append(entry)
+
+    return (center,
+            sorted(here, key = lambda entry: entry[0]),
+            sorted(here, key = lambda entry: entry[1], reverse = True),
+            _build_interval_tree(left),
+            _build_interval_tree(right))
+
+def _stab(indices, key, value):
+    try:
+        index = indices[key]
+    except KeyError:
+        return []
+    return index.stab(value)
+
 ## Return all connections of a net instance.
 #
 # This function searches for all geometrical conections of the net
@@ -218,8 +314,8 @@ def s_conn_update_line_object((path, ob), instances_by_endpoint,
 
     for end in ends0:
       for path1, ob1 in \
-                vertical_instances.get(x0[end], []) + \
-                horizontal_instances.get(y0[end], []):
+                _stab(vertical_instances, x0[end], y0[end]) + \
+                _stab(horizontal_instances, y0[end], x0[end]):
         if ob1 == ob0:
             continue
 
@@ -264,31 +360,122 @@ def _append_or_create(d, key, item):
         l = d[key] = []
     l.append(item)
 
+def _add_interval(d, key, a, b, item):
+    try:
+        index = d[key]
+    except KeyError:
+        index = d[key] = IntervalIndex()
+    index.add(a, b, item)
+
+def _remove_interval(d, key, item):
+    index = d[key]
+    index.remove(item)
+    if not index:
+        del d[key]
+
+def _remove_and_prune(d, key, item):
+    l = d[key]
+    l.remove(item)
+    if not l:
+        del d[key]
+
+## Return the coordinates in the list \c d[key] which are strictly
+## between \a a and \a b.
+#
+# The list is sorted first if \a key is in \a unsorted.  Removing
+# items doesn't change the order of the others, so it stays sorted
+# until new coordinates are appended.
+
+def _coordinates_between(d, unsorted, key, a, b):
+    try:
+        l = d[key]
+    except KeyError:
+        return []
+    if key in unsorted:
+        l.sort()
+        unsorted.remove(key)
+    return l[bisect.bisect_right(l, min(a, b)):
+             bisect.bisect_left(l, max(a, b))]
+
 ## Tracks the connections of the net segments in a revision at a time.
+#
+# Connections are indexed by the instance at either end, so updating
+# the map after a change only touches the connections of the net
+# instances which have actually been changed.
 
 class ConnectionMap:
     def __init__(self, rev):
         self.rev = None
-        self.connections = []
-        self.connection_dict = {}
+        self.connection_dict = {}  # connections by (path0, ob0)
+        self.incoming_dict = {}    # connections by (path1, ob1)
+        self.instances_by_object = {}
 
         self.instances_by_endpoint = {}
+        self.endpoints_by_x = {}   # y coordinates of endpoints by x
+        self.endpoints_by_y = {}   # x coordinates of endpoints by y
+        # keys of the lists above which need to be sorted before use
+        self.unsorted_x = set()
+        self.unsorted_y = set()
         self.horizontal_instances = {}
         self.vertical_instances = {}
 
         self.goto(rev)
 
+    def _add_endpoint(self, x, y, instance):
+        try:
+            self.instances_by_endpoint[x, y].append(instance)
+        except KeyError:
+            self.instances_by_endpoint[x, y] = [instance]
+            _append_or_create(self.endpoints_by_x, x, y)
+            _append_or_create(self.endpoints_by_y, y, x)
+            self.unsorted_x.add(x)
+            self.unsorted_y.add(y)
+
+    def _remove_endpoint(self, x, y, instance):
+        _remove_and_prune(self.instances_by_endpoint, (x, y), instance)
+        if (x, y) not in self.instances_by_endpoint:
+            _remove_and_prune(self.endpoints_by_x, x, y)
+            _remove_and_prune(self.endpoints_by_y, y, x)
+
+    ## Return the instances having an endpoint strictly inside a
+    ## horizontal or vertical net instance.
+
+    def _instances_ending_inside(self, instance):
+        (x0, x1), (y0, y1) = endpoints(instance)
+        result = []
+        if x0 == x1:
+            for y in _coordinates_between(self.endpoints_by_x,
+                                          self.unsorted_x, x0, y0, y1):
+                result += self.instances_by_endpoint[x0, y]
+        if y0 == y1:
+            for x in _coordinates_between(self.endpoints_by_y,
+                                          self.unsorted_y, y0, x0, x1):
+                result += self.instances_by_endpoint[x, y0]
+        return result
+
+    def _add_connections(self, instance):
+        for conn in s_conn_update_line_object(instance,
+                                              self.instances_by_endpoint,
+                                              self.horizontal_instances,
+                                              self.vertical_instances):
+            if (conn.path0, conn.ob0) not in self.connection_dict or \
+                   conn not in self.connection_dict[conn.path0, conn.ob0]:
+                _append_or_create(
+                    self.connection_dict, (conn.path0, conn.ob0), conn)
+                _append_or_create(
+                    self.incoming_dict, (conn.path1, conn.ob1), conn)
+
     def goto(self, rev):
         if rev.is_transient():
             raise ValueError
 
         if self.rev is not None:
             removed_objects = \
-                xorn.storage.get_removed_objects(self.rev, rev)
+                xorn.storage.get_removed_objects(self.rev.rev, rev.rev)
             modified_objects = \
-                xorn.storage.get_modified_objects(self.rev, rev)
+                xorn.storage.get_modified_objects(self.rev.rev, rev.rev)
             added_objects = \
-                xorn.storage.get_added_objects(self.rev, rev)
+                xorn.storage.get_added_objects(self.rev.rev, rev.rev)
         else:
             removed_objects = []
             modified_objects = []
@@ -297,53 +484,68 @@ class ConnectionMap:
         # remove objects
         removed_instances = [instance
                              for ob in removed_objects + modified_objects
-                             for instance in all_net_instances_in_object(
-                                 xorn.proxy.ObjectProxy(self.rev.rev, ob))]
+                             for instance in
+                                 self.instances_by_object.pop(ob, [])]
 
         for instance in removed_instances:
             (x0, x1), (y0, y1) = endpoints(instance)
-            self.instances_by_endpoint[x0, y0].remove(instance)
+            self._remove_endpoint(x0, y0, instance)
             if not instance[1].data().is_pin:
-                self.instances_by_endpoint[x1, y1].remove(instance)
+                self._remove_endpoint(x1, y1, instance)
                 if x0 == x1:
-                    self.vertical_instances[x0].remove(instance)
+                    _remove_interval(self.vertical_instances, x0, instance)
                 if y0 == y1:
-                    self.horizontal_instances[y0].remove(instance)
+                    _remove_interval(self.horizontal_instances, y0, instance)
 
-            for conn in self.connections:
-                if (conn.path0, conn.ob0) == instance or \
-                   (conn.path1, conn.ob1) == instance:
-                    self.connections.remove(conn)
-                    self.connection_dict[conn.path0, conn.ob0].remove(conn)
+            for conn in self.connection_dict.pop(instance, []):
+                _remove_and_prune(
+                    self.incoming_dict, (conn.path1, conn.ob1), conn)
+            for conn in self.incoming_dict.pop(instance, []):
+                _remove_and_prune(
+                    self.connection_dict, (conn.path0, conn.ob0), conn)
 
         self.rev = rev
 
         # add objects
-        added_instances = [instance
-                           for ob in modified_objects + added_objects
-                           for instance in all_net_instances_in_object(
-                               xorn.proxy.ObjectProxy(self.rev.rev, ob))]
+        added_instances = []
+        added_count = 0
+        for ob in modified_objects + added_objects:
+            instances = list(all_net_instances_in_object(
+                xorn.proxy.ObjectProxy(self.rev.rev, ob)))
+            if instances:
+                self.instances_by_object[ob] = instances
+                added_instances += instances
+                added_count += 1
 
         for instance in added_instances:
             (x0, x1), (y0, y1) = endpoints(instance)
-            _append_or_create(self.instances_by_endpoint, (x0, y0), instance)
+            self._add_endpoint(x0, y0, instance)
             if not instance[1].data().is_pin:
-                _append_or_create(self.instances_by_endpoint, (x1, y1), instance)
+                self._add_endpoint(x1, y1, instance)
                 if x0 == x1:
-                    _append_or_create(self.vertical_instances, x0, instance)
+                    _add_interval(self.vertical_instances, x0,
+                                  y0, y1, instance)
                 if y0 == y1:
-                    _append_or_create(self.horizontal_instances, y0, instance)
+                    _add_interval(self.horizontal_instances, y0,
+                                  x0, x1, instance)
 
         for instance in added_instances:
-            for conn in s_conn_update_line_object(instance,
-                                                  self.instances_by_endpoint,
-                                                  self.horizontal_instances,
-                                                  self.vertical_instances):
-                if (conn.path0, conn.ob0) not in self.connection_dict or \
-                       conn not in self.connection_dict[conn.path0, conn.ob0]:
-                    self.connections.append(conn)
-                    _append_or_create(
-                        self.connection_dict, (conn.path0, conn.ob0), conn)
+            self._add_connections(instance)
+
+        # s_conn_update_line_object only finds midpoint connections
+        # at the endpoints of the instance it is called for, so
+        # unchanged instances ending inside an added horizontal or
+        # vertical instance have to be checked again (unless there
+        # aren't any, e.g. when building the map from scratch)
+        if len(self.instances_by_object) == added_count:
+            return
+        added_set = set(added_instances)
+        for instance in added_instances:
+            if instance[1].data().is_pin:
+                continue
+            for other in self._instances_ending_inside(instance):
+                if other not in added_set:
+                    self._add_connections(other)
 
     ## Return all net instances directly connected to a net instance.
 
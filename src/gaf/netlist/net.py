@@ -34,6 +34,9 @@ class Net:
         self.unnamed_counter = None  # only for unnamed nets/buses
         self.is_unconnected_pin = False
 
+        # set by merge_into; see find_net
+        self.merged_into = None
+
         self.component_pins = []
         self.connections = None  # populated by gaf.netlist.package
 
@@ -66,6 +69,13 @@ class Net:
                 pass
         return l
 
+    ## Merge this net into another net.
+    #
+    # Moves the local nets and names of this net to \a other.  This
+    # net is not removed from \c netlist.nets; the caller is expected
+    # to filter out all merged nets (those whose \c merged_into
+    # attribute isn't \c None) once it is done merging.
+
     def merge_into(self, other):
         if not isinstance(other, Net):
             raise ValueError
@@ -73,6 +83,8 @@ class Net:
             raise ValueError
         if other == self:
             raise ValueError
+        if self.merged_into is not None or other.merged_into is not None:
+            raise ValueError
 
         for local_net in self.local_nets:
             assert local_net.net == self
@@ -88,7 +100,7 @@ class Net:
         del self.names[False][:]
         del self.names[True][:]
 
-        self.netlist.nets.remove(self)
+        self.merged_into = other
 
     def error(self, msg):
         sys.stderr.write(_("net `%s': error: %s\n") % (self.name, msg))
@@ -97,10 +109,24 @@ class Net:
     def warn(self, msg):
         sys.stderr.write(_("net `%s': warning: %s\n") % (self.name, msg))
 
+## Return the net into which a net has been merged, if any.
+#
+# Follows the chain of \c merged_into references and shortens it
+# along the way so subsequent lookups take constant time.
+
+def find_net(net):
+    root = net
+    while root.merged_into is not None:
+        root = root.merged_into
+    while net is not root:
+        net.merged_into, net = root, net.merged_into
+    return root
+
 def postproc_instances(netlist, flat_namespace, prefer_netname_attribute,
                                 default_net_name, default_bus_name):
     netlist.nets = []
-    net_dict = {}
+    net_dict = {}  # may map to merged nets, so look up through find_net
+    net_index = {}
 
     # Naming nets
     for sheet in netlist.sheets:
@@ -121,9 +147,10 @@ def postproc_instances(netlist, flat_namespace, prefer_netname_attribute,
                     net_name = sheet.namespace, net_name
 
                 try:
-                    net = net_dict[net_name]
+                    net = find_net(net_dict[net_name])
                 except KeyError:
                     net = Net(netlist)
+                    net_index[net] = len(netlist.nets)
                     netlist.nets.append(net)
                     net_dict[net_name] = net
 
@@ -137,17 +164,16 @@ def postproc_instances(netlist, flat_namespace, prefer_netname_attribute,
                     local_net.net = net
                     net.local_nets.append(local_net)
                 else:
-                    a = netlist.nets.index(local_net.net)
-                    b = netlist.nets.index(net)
-                    dst = netlist.nets[min(a, b)]
-                    src = netlist.nets[max(a, b)]
-
-                    for name in set(src.names[False] + src.names[True]):
-                        assert net_dict[name] == src
-                        net_dict[name] = dst
+                    # keep the net which has been created first
+                    if net_index[local_net.net] < net_index[net]:
+                        dst, src = local_net.net, net
+                    else:
+                        dst, src = net, local_net.net
 
                     src.merge_into(dst)
-                    assert local_net in dst.local_nets
+                    assert local_net.net == dst
+
+    netlist.nets = [net for net in netlist.nets if net.merged_into is None]
 
     # prioritize net names
     prio = not prefer_netname_attribute
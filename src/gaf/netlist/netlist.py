@@ -189,6 +189,7 @@ class Netlist:
                         component.composite_sources.append(
                             self.schematics_by_filename[full_filename])
 
+        gaf.read.preload_symbols(toplevel_filenames)
         for filename in toplevel_filenames:
             load_schematic(filename)
 
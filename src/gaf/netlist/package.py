@@ -20,9 +20,24 @@
 ## \namespace gaf.netlist.package
 ## Grouping components with the same refdes into a package.
 
-import sys
+import re, sys
 from gettext import gettext as _
 
+## Matches a <tt>$(name)</tt> parameter reference in an attribute value.
+
+PARAMETER_REFERENCE = re.compile(r'\$\(([^)]*)\)')
+
+## Replace parameter references in \a value with their values.
+#
+# References to parameters which aren't in \a parameters are left
+# unchanged.  Substituted values aren't searched for references again.
+
+def substitute_parameters(value, parameters):
+    if not parameters or '$(' not in value:
+        return value
+    return PARAMETER_REFERENCE.sub(
+        lambda match: parameters.get(match.group(1), match.group(0)), value)
+
 class Package:
     def __init__(self, netlist, namespace, unmangled_refdes):
         self.netlist = netlist
@@ -33,6 +48,15 @@ class Package:
         self.pins = []
         self.pins_by_number = {}
 
+        # Resolved attribute values by name, as returned by
+        # get_all_attributes.  The components of a package don't
+        # change once the netlist has been built, so each attribute
+        # only needs to be resolved once.
+        self._attribute_values = {}
+        # Distinct non-None values of each attribute in order of
+        # their first occurrence.
+        self._distinct_attribute_values = {}
+
     ## Get attribute value(s) from a package with given refdes.
     #
     # This function returns the values of a specific attribute type
@@ -49,9 +73,17 @@ class Package:
     # \returns a list of attribute values as strings and \c None
 
     def get_all_attributes(self, name):
+        return list(self._get_all_attributes(name))
+
+    def _get_all_attributes(self, name):
         if not isinstance(name, basestring):
             raise ValueError
 
+        try:
+            return self._attribute_values[name]
+        except KeyError:
+            pass
+
         # search for refdes instances and through the entire list
         l = []
         for component in self.components:
@@ -61,12 +93,11 @@ class Package:
                 l.append(None)
             else:
                 if component.sheet.instantiating_component is not None:
-                    for param_name, param_value in \
-                            component.sheet.instantiating_component \
-                                .blueprint.parameters.iteritems():
-                        value = value.replace(
-                            '$(%s)' % param_name, param_value)
+                    value = substitute_parameters(
+                        value, component.sheet.instantiating_component
+                                        .blueprint.parameters)
                 l.append(value)
+        self._attribute_values[name] = l
         return l
 
     ## Return the value associated with attribute \a name on the package.
@@ -80,10 +111,14 @@ class Package:
     # not \c "slot", raises an error.
 
     def get_attribute(self, name, default = KeyError):
-        values = []
-        for value in self.get_all_attributes(name):
-            if value is not None and value not in values:
-                values.append(value)
+        try:
+            values = self._distinct_attribute_values[name]
+        except KeyError:
+            values = []
+            for value in self._get_all_attributes(name):
+                if value is not None and value not in values:
+                    values.append(value)
+            self._distinct_attribute_values[name] = values
 
         if len(values) > 1:
             self.error(_("attribute conflict for \"%s\": %s") % (
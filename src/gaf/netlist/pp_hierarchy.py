@@ -153,6 +153,7 @@ def postproc_instances(netlist):
 
     netlist.components = [component for component in netlist.components
                           if component not in remove_components]
+    netlist.nets = [net for net in netlist.nets if net.merged_into is None]
 
     for component in netlist.components:
         if component.blueprint.has_portname_attrib:
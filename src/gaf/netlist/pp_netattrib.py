@@ -41,6 +41,27 @@ def strtok(s, delim):
             yield s[start:end]
         start = end + 1
 
+## Split the values of \c "net=" attributes into net name and pin
+## numbers.
+#
+# \return A list of tuples <tt>(value, netname, pinnumbers)</tt>.
+#          For invalid values, \a netname and \a pinnumbers are
+#          \c None.
+
+def parse_net_attribs(values):
+    parsed = []
+    for value in values:
+        try:
+            pos = value.index(':')
+        except ValueError:
+            parsed.append((value, None, None))
+            continue
+
+        # skip over first colon
+        parsed.append((value, value[:pos], list(strtok(
+            value[pos + 1:], NET_ATTRIB_DELIMITERS))))
+    return parsed
+
 def postproc_blueprints(netlist):
     # Handle a "net=name:pin,pin..." attribute by creating appropriate
     # Pin objects.
@@ -51,28 +72,37 @@ def postproc_blueprints(netlist):
             pinnumbers = []
             assignments = {}
 
-            for is_inherited, func in [
-                    (True, gaf.attrib.search_inherited),
-                    (False, gaf.attrib.search_attached)]:
-                for value in func(component.ob, 'net'):
+            # components using the same symbol share the parsed
+            # inherited attributes
+            template = component.template
+            if template is not None:
+                if template.inherited_net_attribs is None:
+                    template.inherited_net_attribs = parse_net_attribs(
+                        gaf.attrib.search_inherited(component.ob, 'net'))
+                inherited = template.inherited_net_attribs
+            else:
+                inherited = parse_net_attribs(
+                    gaf.attrib.search_inherited(component.ob, 'net'))
+
+            for is_inherited, parsed in [
+                    (True, inherited),
+                    (False, parse_net_attribs(
+                        gaf.attrib.search_attached(component.ob, 'net')))]:
+                for value, netname, pinnumbers_in_value in parsed:
                     # A "net=" attribute has been found in the component.
 
-                    try:
-                        pos = value.index(':')
-                    except ValueError:
+                    if netname is None:
                         component.error(
                             _("invalid net= attribute: \"%s\"") % value)
                         continue
 
-                    # skip over first colon
-                    for pinnumber in strtok(
-                            value[pos + 1:], NET_ATTRIB_DELIMITERS):
+                    for pinnumber in pinnumbers_in_value:
                         try:
                             l = assignments[pinnumber]
                         except KeyError:
                             pinnumbers.append(pinnumber)
                             l = assignments[pinnumber] = []
-                        l.append((value[:pos], is_inherited))
+                        l.append((netname, is_inherited))
 
             for pinnumber in pinnumbers:
                 try:
@@ -101,7 +101,16 @@ def get_slotdef(component_blueprint):
                                     "missing definition for slot %d") % slot)
         return None
 
-    return list(strtok(cptr, SLOTDEF_ATTRIB_DELIMITERS))
+    # components using the same symbol share the parsed definitions
+    template = component_blueprint.template
+    if template is None:
+        return list(strtok(cptr, SLOTDEF_ATTRIB_DELIMITERS))
+    try:
+        return template.parsed_slotdefs[slotdef]
+    except KeyError:
+        pinnumbers = template.parsed_slotdefs[slotdef] = \
+            list(strtok(cptr, SLOTDEF_ATTRIB_DELIMITERS))
+        return pinnumbers
 
 def postproc_blueprints(netlist):
     for schematic in netlist.schematics:
@@ -188,12 +188,17 @@ def read_file(f, name, log, load_symbol, load_pixmap,
     # "Stack" of outer contexts for embedded components
     object_lists_save = []
 
-    # Last read object.  Attributes and embedded components attach to this.
+    # Index of the last read object in the pending item list.
+    # Attributes and embedded components attach to this.
     ob = None
 
     # This is where read objects end up.  Will be swapped for embedded comps.
     rev = xorn.storage.Revision()
 
+    # Objects which have been read but not yet added to the revision,
+    # as (data, attach_to) tuples suitable for Revision.add_objects.
+    items = []
+
     format = FileFormat(0, 0)  # no file format definition at all
 
     for line in f:
@@ -204,53 +209,64 @@ def read_file(f, name, log, load_symbol, load_pixmap,
         if objtype == OBJ_LINE:
             data = read_line(line, format, log)
             if data is not None:
-                ob = rev.add_object(data)
+                ob = len(items)
+                items.append((data, None))
         elif objtype == OBJ_NET:
             data = read_net(line, format, log)
             if data is not None:
-                ob = rev.add_object(data)
+                ob = len(items)
+                items.append((data, None))
         elif objtype == OBJ_BUS:
             data = read_bus(line, format, log)
             if data is not None:
-                ob = rev.add_object(data)
+                ob = len(items)
+                items.append((data, None))
         elif objtype == OBJ_BOX:
             data = read_box(line, format, log)
             if data is not None:
-                ob = rev.add_object(data)
+                ob = len(items)
+                items.append((data, None))
         elif objtype == OBJ_PICTURE:
             data = read_picture(line, f, format, log, load_pixmap)
             if data is not None:
-                ob = rev.add_object(data)
+                ob = len(items)
+                items.append((data, None))
         elif objtype == OBJ_CIRCLE:
             data = read_circle(line, format, log)
             if data is not None:
-                ob = rev.add_object(data)
+                ob = len(items)
+                items.append((data, None))
         elif objtype == OBJ_COMPLEX:
             data = read_complex(line, format, log, load_symbol)
             if data is not None:
-                ob = rev.add_object(data)
+                ob = len(items)
+                items.append((data, None))
         elif objtype == OBJ_TEXT:
             data = read_text(line, f, format, log)
             if data is not None:
-                ob = rev.add_object(data)
+                ob = len(items)
+                items.append((data, None))
         elif objtype == OBJ_PATH:
             data = read_path(line, f, format, log)
             if data is not None:
-                ob = rev.add_object(data)
+                ob = len(items)
+                items.append((data, None))
         elif objtype == OBJ_PIN:
             data = read_pin(line, format, log)
             if data is not None:
-                ob = rev.add_object(data)
+                ob = len(items)
+                items.append((data, None))
         elif objtype == OBJ_ARC:
             data = read_arc(line, format, log)
             if data is not None:
-                ob = rev.add_object(data)
+                ob = len(items)
+                items.append((data, None))
         elif objtype == STARTATTACH_ATTR:
             if ob is None:
                 log.error(_("unexpected attribute list start marker"))
                 continue
-            if not isinstance(rev.get_object_data(ob), xorn.storage.Net) and \
-               not isinstance(rev.get_object_data(ob), xorn.storage.Component):
+            if not isinstance(items[ob][0], xorn.storage.Net) and \
+               not isinstance(items[ob][0], xorn.storage.Component):
                 log.error(_("can't attach attributes to this object type"))
                 continue
 
@@ -274,14 +290,14 @@ def read_file(f, name, log, load_symbol, load_pixmap,
 
                 attrib = read_text(line, f, format, log)
                 if attrib is not None:
-                    rev.relocate_object(rev.add_object(attrib), ob, None)
+                    items.append((attrib, ob))
 
             ob = None
         elif objtype == START_EMBEDDED:
             if ob is None:
                 log.error(_("unexpected embedded symbol start marker"))
                 continue
-            component_data = rev.get_object_data(ob)
+            component_data = items[ob][0]
             if type(component_data) != xorn.storage.Component:
                 log.error(_("embedded symbol start marker following "
                             "non-component object"))
@@ -294,14 +310,17 @@ def read_file(f, name, log, load_symbol, load_pixmap,
                 log.error(_("embedded symbol start marker following "
                             "embedded symbol"))
                 continue
-            object_lists_save.append((rev, ob))
+            object_lists_save.append((rev, items, ob))
             rev = xorn.storage.Revision()
+            items = []
+            ob = None
             component_data.symbol.prim_objs = rev
         elif objtype == END_EMBEDDED:
             if not object_lists_save:
                 log.error(_("unexpected embedded symbol end marker"))
                 continue
-            rev, ob = object_lists_save.pop()
+            rev.add_objects(items)
+            rev, items, ob = object_lists_save.pop()
         elif objtype == ENDATTACH_ATTR:
             log.error(_("unexpected attribute list end marker"))
         elif objtype == INFO_FONT:
@@ -337,6 +356,10 @@ def read_file(f, name, log, load_symbol, load_pixmap,
         else:
             log.error(_("read garbage"))
 
+    rev.add_objects(items)
+    for saved_rev, saved_items, saved_ob in object_lists_save:
+        saved_rev.add_objects(saved_items)
+
     for ob in rev.get_objects():
         data = rev.get_object_data(ob)
         if not isinstance(data, xorn.storage.Component) \
@@ -368,6 +391,31 @@ def read_file(f, name, log, load_symbol, load_pixmap,
 
     return xorn.proxy.RevisionProxy(rev)
 
+## Return the names of the library symbols referenced by a file.
+#
+# Scans the string \a data for component lines without parsing the
+# rest of the file.  The names are returned in the order in which they
+# first appear.  The result may contain false positives from lines of
+# multi-line text which happen to look like a component line.
+
+def referenced_symbol_names(data):
+    names = []
+    seen = set()
+    for line in data.splitlines():
+        if not line.startswith(OBJ_COMPLEX + ' '):
+            continue
+        fields = line.split()
+        if len(fields) != 7 or fields[6].startswith('EMBEDDED'):
+            continue
+        try:
+            name = fields[6].decode('utf-8')
+        except UnicodeDecodeError:
+            continue
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
 ## Guess the orientation of pins.
 #
 # Calculates the bounding box of all pins in the revision.  The end of
@@ -379,7 +427,7 @@ def read_file(f, name, log, load_symbol, load_pixmap,
 # \warning This function is not implemented.  See Xorn bug #148.
 
 def pin_update_whichend(rev, force_boundingbox, log):
-    for ob in rev.get_objects():
+    for ob in rev.iter_objects():
         data = rev.get_object_data(ob)
         if isinstance(data, xorn.storage.Net) and data.is_pin:
             log.error(_("file is lacking pin orientation information"))
@@ -104,9 +104,9 @@ def bus_ripper_direction(bus_ob):
     bus_data = bus_ob.data()
     found_neg = False
     found_pos = False
-    for ob in xorn.proxy.RevisionProxy(bus_ob.rev).toplevel_objects():
-        data = ob.data()
-        if not isinstance(data, xorn.storage.Component) \
+    for ob, data, attached_to, pos in \
+            bus_ob.rev.get_objects_with_data(xorn.storage.Component):
+        if attached_to is not None \
                or data.symbol.basename != 'busripper-1.sym':
             continue
 
@@ -20,7 +20,7 @@
 ## \namespace gaf.read
 ## Reading schematic/symbol files.
 
-import os.path, sys
+import cStringIO, os.path, sys, threading
 from gettext import gettext as _
 import gaf.clib
 import gaf.fileformat
@@ -41,7 +41,9 @@ class ParseError(Exception):
 #
 # The behavior of DefaultLog is to print any messages to \c sys.stderr
 # along with the file name passed to the constructor, and to raise a
-# ParseError exception on error.
+# ParseError exception on error.  If messages are being captured in
+# the current thread (see \ref capture_messages), they are collected
+# instead of being printed.
 
 class DefaultLog:
     def __init__(self, name):
@@ -49,14 +51,49 @@ class DefaultLog:
         self.lineno = 0
 
     def error(self, message):
-        sys.stderr.write("%s:%d: error: %s\n" % (
+        write_message("%s:%d: error: %s\n" % (
             self.name, self.lineno + 1, message))
         raise ParseError
 
     def warn(self, message):
-        sys.stderr.write("%s:%d: warning: %s\n" % (
+        write_message("%s:%d: warning: %s\n" % (
             self.name, self.lineno + 1, message))
 
+## Thread-local state of \ref capture_messages.
+
+_capture = threading.local()
+
+## Collect the messages of DefaultLog in the current thread.
+#
+# While capturing, any message written by a DefaultLog instance in
+# the calling thread is appended to the list \a messages instead of
+# being printed to \c sys.stderr.  Passing \c None stops capturing.
+#
+# This is used by gaf.clib.preload_symbols so messages from symbols
+# loaded in worker threads can be printed later in the main thread,
+# and by gaf.clib.DirectorySource to cache the messages along with
+# the symbol.
+#
+# \returns the list previously used for capturing, or \c None
+
+def capture_messages(messages):
+    previous = getattr(_capture, 'messages', None)
+    _capture.messages = messages
+    return previous
+
+## Write a message the way DefaultLog does.
+#
+# Appends the message to the list passed to \ref capture_messages if
+# messages are being captured in the current thread, and writes it to
+# \c sys.stderr otherwise.
+
+def write_message(message):
+    messages = getattr(_capture, 'messages', None)
+    if messages is not None:
+        messages.append(message)
+    else:
+        sys.stderr.write(message)
+
 ## Read a symbol or schematic file.
 #
 # See \ref read_file for a description of the keyword arguments.
@@ -106,6 +143,13 @@ def read_file(f, name, format, log = None,
     if log is None:
         log = DefaultLog(name)
 
+    if load_symbols:
+        # Fetch all referenced symbols at once so slow sources can be
+        # accessed concurrently instead of one symbol at a time.
+        data = f.read()
+        gaf.clib.preload_symbols(referenced_symbol_names(data, format))
+        f = cStringIO.StringIO(data)
+
     # Mock-ups for referenced symbols if we aren't loading them
     referenced_symbols = {}
     # Mock-ups for or already loaded pixmaps
@@ -180,3 +224,40 @@ def read_file(f, name, format, log = None,
         return gaf.xmlread.read_file(
             f, name, log, load_symbol, load_pixmap, **kwds)
     raise ValueError
+
+## Return the names of the library symbols referenced by a file.
+#
+# \a data is the contents of a file in format \a format.  The names
+# are returned in the order in which they first appear in the file.
+
+def referenced_symbol_names(data, format):
+    if format == gaf.fileformat.FORMAT_SYM or \
+       format == gaf.fileformat.FORMAT_SCH:
+        return gaf.plainread.referenced_symbol_names(data)
+    if format == gaf.fileformat.FORMAT_SYM_XML or \
+       format == gaf.fileformat.FORMAT_SCH_XML:
+        return gaf.xmlread.referenced_symbol_names(data)
+    raise ValueError
+
+## Load the library symbols referenced by several files concurrently.
+#
+# This allows starting to load the symbols for all files at once
+# before reading the files one by one.  Files which can't be read are
+# ignored; the error is reported when they are actually read.
+#
+# See gaf.clib.preload_symbols.
+
+def preload_symbols(paths):
+    names = []
+    for path in paths:
+        try:
+            format = gaf.fileformat.guess_format(path)
+            f = open(path, 'rb')
+            try:
+                data = f.read()
+            finally:
+                f.close()
+        except (gaf.fileformat.UnknownFormatError, IOError):
+            continue
+        names += referenced_symbol_names(data, format)
+    gaf.clib.preload_symbols(names)
@@ -0,0 +1,254 @@
+# gaf - Python library for manipulating gEDA files
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+## \namespace gaf.symcache
+## On-disk cache for directory symbol sources.
+#
+# A SymbolCache stores the directory listing of a gaf.clib.DirectorySource
+# and the contents of the symbol files read from it in a cache
+# directory, so later runs don't have to scan the library and parse
+# the symbol files again.  Directory listings are validated by the
+# directory's mtime, symbol files by their mtime and size.  The
+# messages logged while reading a symbol file are cached as well, so
+# they can be repeated when the symbol is loaded from the cache.
+#
+# Each source gets its own subdirectory of the cache directory, named
+# after a hash of the source's path.  It contains a file \c index-...
+# holding the directory listing for each set of source settings (e.g.,
+# whether the directory is scanned recursively), named after a hash of
+# the settings, and one file per cached symbol named after a hash of
+# the symbol file's path.  All files are pickles whose
+# first item is \ref CACHE_VERSION.
+#
+# The cache is only an optimization: unreadable or outdated cache
+# files are ignored, and failing to write the cache is not an error.
+
+import cPickle, hashlib, os, tempfile
+import gaf.ref
+import xorn.storage
+
+## Version of the cache file layout.
+#
+# Cache files with a different version are ignored.
+
+CACHE_VERSION = 2
+
+## Fields of the object data types which can be cached.
+
+_FIELDS = {
+    xorn.storage.LineAttr: (
+        'width', 'cap_style', 'dash_style', 'dash_length', 'dash_space'),
+    xorn.storage.FillAttr: (
+        'type', 'width', 'angle0', 'pitch0', 'angle1', 'pitch1'),
+    xorn.storage.Arc: (
+        'x', 'y', 'radius', 'startangle', 'sweepangle', 'color', 'line'),
+    xorn.storage.Box: (
+        'x', 'y', 'width', 'height', 'color', 'line', 'fill'),
+    xorn.storage.Circle: (
+        'x', 'y', 'radius', 'color', 'line', 'fill'),
+    xorn.storage.Line: (
+        'x', 'y', 'width', 'height', 'color', 'line'),
+    xorn.storage.Net: (
+        'x', 'y', 'width', 'height', 'color',
+        'is_bus', 'is_pin', 'is_inverted'),
+    xorn.storage.Path: (
+        'pathdata', 'color', 'line', 'fill'),
+    xorn.storage.Picture: (
+        'x', 'y', 'width', 'height', 'angle', 'mirror', 'pixmap'),
+    xorn.storage.Text: (
+        'x', 'y', 'color', 'text_size', 'visibility', 'show_name_value',
+        'angle', 'alignment', 'text')
+}
+
+_TYPES = dict((cls.__name__, cls) for cls in _FIELDS)
+
+## Raised by \ref dump_revision if a revision can't be cached.
+#
+# This is the case if it contains a component, since the referenced
+# symbol can't be stored along with it.
+
+class UncacheableError(Exception):
+    pass
+
+def _dump_data(data):
+    try:
+        fields = _FIELDS[type(data)]
+    except KeyError:
+        raise UncacheableError
+    values = []
+    for name in fields:
+        value = getattr(data, name)
+        if type(value) in _FIELDS:
+            value = _dump_data(value)
+        elif value is not None and \
+                not isinstance(value, (bool, int, long, float, basestring,
+                                       gaf.ref.Pixmap)):
+            raise UncacheableError
+        values.append(value)
+    return type(data).__name__, tuple(values)
+
+def _load_data(dumped):
+    typename, values = dumped
+    cls = _TYPES[typename]
+    data = cls()
+    for name, value in zip(_FIELDS[cls], values):
+        if isinstance(value, tuple):
+            value = _load_data(value)
+        setattr(data, name, value)
+    return data
+
+## Convert the contents of a revision to a picklable list.
+#
+# The list contains a tuple <tt>(data, attach_to)</tt> for each
+# object, suitable for passing to \ref load_revision.
+#
+# \throws UncacheableError if the revision contains an object which
+#                          can't be cached
+
+def dump_revision(rev):
+    items = []
+    def dump_objects(ob, attach_to):
+        for child in xorn.storage.get_objects_attached_to(rev, ob):
+            items.append((_dump_data(rev.get_object_data(child)), attach_to))
+            dump_objects(child, len(items) - 1)
+    dump_objects(None, None)
+    return items
+
+## Create a new transient revision from a list returned by
+## \ref dump_revision.
+
+def load_revision(items):
+    rev = xorn.storage.Revision()
+    rev.add_objects([(_load_data(data), attach_to)
+                     for data, attach_to in items])
+    return rev
+
+def _hash(path):
+    return hashlib.sha1(os.path.abspath(path)).hexdigest()
+
+class SymbolCache:
+    ## Create a cache for the symbol source at \a path.
+    #
+    # \a cache_directory is the directory in which all caches are
+    # stored.  \a key should describe any further settings of the
+    # source which affect its listing; cached listings with a
+    # different key are ignored.
+
+    def __init__(self, cache_directory, path, key = None):
+        ## Directory holding the cache files of this source.
+        self.directory = os.path.join(cache_directory, _hash(path))
+        ## Additional settings which must match for a listing to be used.
+        self.key = key
+        # Sources with different settings on the same path get
+        # separate listings instead of overwriting each other's.
+        self._index = 'index-' + hashlib.sha1(repr(key)).hexdigest()
+
+    def _load(self, filename):
+        try:
+            f = open(os.path.join(self.directory, filename), 'rb')
+        except IOError:
+            return None
+        try:
+            try:
+                content = cPickle.load(f)
+            finally:
+                f.close()
+        except Exception:
+            # corrupt cache file
+            return None
+        if not isinstance(content, tuple) or len(content) != 3 \
+                or content[0] != CACHE_VERSION:
+            return None
+        return content[1:]
+
+    def _store(self, filename, stamp, value):
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            fd, tmp_path = tempfile.mkstemp(dir = self.directory)
+            try:
+                f = os.fdopen(fd, 'wb')
+                try:
+                    cPickle.dump((CACHE_VERSION, stamp, value), f,
+                                 cPickle.HIGHEST_PROTOCOL)
+                finally:
+                    f.close()
+                # replace the old file atomically so concurrent
+                # readers never see a partially written file
+                os.rename(tmp_path, os.path.join(self.directory, filename))
+            except:
+                os.unlink(tmp_path)
+                raise
+        except (IOError, OSError, cPickle.PicklingError):
+            pass
+
+    ## Return the directory listing stored by \ref store_listing, or
+    ## \c None if there is none.
+
+    def load_listing(self):
+        content = self._load(self._index)
+        if content is None or content[0] != self.key:
+            return None
+        return content[1]
+
+    ## Store an arbitrary picklable representation of the source's
+    ## directory listing.
+
+    def store_listing(self, listing):
+        self._store(self._index, self.key, listing)
+
+    ## Return the cached contents of a symbol file.
+    #
+    # \a load_pixmaps is the flag with which the symbol is going to be
+    # read; symbols which have been read with a different flag aren't
+    # returned.
+    #
+    # \returns a pair <tt>(rev, messages)</tt> of a new transient
+    #          revision and the list of messages logged while reading
+    #          the file, or \c None if the symbol isn't cached or has
+    #          changed since
+
+    def load_symbol(self, path, load_pixmaps):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        content = self._load(_hash(path))
+        if content is None or \
+                content[0] != (st.st_mtime, st.st_size, load_pixmaps):
+            return None
+        try:
+            items, messages = content[1]
+            return load_revision(items), list(messages)
+        except Exception:
+            return None
+
+    ## Store the contents of a symbol file.
+    #
+    # Revisions containing objects which can't be cached are ignored.
+    #
+    # \a st is the result of calling \c os.stat on the symbol file
+    # before it was read, and \a messages is a list of the messages
+    # logged while reading it.
+
+    def store_symbol(self, path, st, load_pixmaps, rev, messages = ()):
+        try:
+            items = dump_revision(rev)
+        except UncacheableError:
+            return
+        self._store(_hash(path), (st.st_mtime, st.st_size, load_pixmaps),
+                    (items, list(messages)))
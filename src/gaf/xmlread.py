@@ -74,9 +74,9 @@ class OverbarHandler(NullHandler):
         self.text.append('\\_')
 
 class TextHandler(NullHandler):
-    def __init__(self, log, rev, attached_to, data, attribute_name):
+    def __init__(self, log, items, attached_to, data, attribute_name):
         self.log = log
-        self.rev = rev
+        self.items = items
         self.attached_to = attached_to
         self.data = data
         self.text = []
@@ -99,14 +99,12 @@ class TextHandler(NullHandler):
 
     def end_element(self, name):
         self.data.text = ''.join(self.text).encode('utf-8')
-        ob = self.rev.add_object(self.data)
-        if self.attached_to is not None:
-            self.rev.relocate_object(ob, self.attached_to, None)
+        self.items.append((self.data, self.attached_to))
 
 class PathHandler(NullHandler):
-    def __init__(self, log, rev, data):
+    def __init__(self, log, items, data):
         self.log = log
-        self.rev = rev
+        self.items = items
         self.data = data
         self.fragments = []
 
@@ -125,7 +123,7 @@ class PathHandler(NullHandler):
 
     def end_element(self, name):
         self.data.pathdata = ''.join(self.fragments)
-        self.rev.add_object(self.data)
+        self.items.append((self.data, None))
 
 def parse_angle(x):
     angle = int(x)
@@ -134,10 +132,10 @@ def parse_angle(x):
     return angle
 
 class ContentHandler(NullHandler):
-    def __init__(self, c, rev, attached_to):
+    def __init__(self, c, items, attached_to):
         self.log = c.log
         self.c = c
-        self.rev = rev
+        self.items = items
         self.attached_to = attached_to
 
     def start_element(self, name, attributes):
@@ -178,14 +176,14 @@ class ContentHandler(NullHandler):
             else:
                 name = None
             return TextHandler(
-                self.c.log, self.rev, self.attached_to, data, name)
+                self.c.log, self.items, self.attached_to, data, name)
 
-        if self.attached_to:
+        if self.attached_to is not None:
             self.c.log.error(_("non-text element can't be attached"))
             return VoidHandler()
 
         if name == 'arc':
-            self.rev.add_object(
+            self.items.append((
                 xorn.storage.Arc(
                     x = self.c.parse_attribute(
                         attributes, 'x', None,
@@ -205,11 +203,11 @@ class ContentHandler(NullHandler):
                     color = self.c.parse_attribute(
                         attributes, 'color', 3,
                         ENUM_COLOR.index, 'color'),
-                    line = self.c.parse_line(attributes)))
+                    line = self.c.parse_line(attributes)), None))
             return NullHandler(self.c.log)
 
         if name == 'box':
-            self.rev.add_object(
+            self.items.append((
                 xorn.storage.Box(
                     x = self.c.parse_attribute(
                         attributes, 'x', None,
@@ -227,11 +225,11 @@ class ContentHandler(NullHandler):
                         attributes, 'color', 3,
                         ENUM_COLOR.index, 'color'),
                     line = self.c.parse_line(attributes),
-                    fill = self.c.parse_fill(attributes)))
+                    fill = self.c.parse_fill(attributes)), None))
             return NullHandler(self.c.log)
 
         if name == 'circle':
-            self.rev.add_object(
+            self.items.append((
                 xorn.storage.Circle(
                     x = self.c.parse_attribute(
                         attributes, 'x', None,
@@ -246,27 +244,28 @@ class ContentHandler(NullHandler):
                         attributes, 'color', 3,
                         ENUM_COLOR.index, 'color'),
                     line = self.c.parse_line(attributes),
-                    fill = self.c.parse_fill(attributes)))
+                    fill = self.c.parse_fill(attributes)), None))
             return NullHandler(self.c.log)
 
         if name == 'component':
-            ob = self.rev.add_object(
-                xorn.storage.Component(
-                    x = self.c.parse_attribute(
-                        attributes, 'x', None,
-                        self.c.parse, 'X coordinate'),
-                    y = self.c.parse_attribute(
-                        attributes, 'y', None,
-                        self.c.parse, 'Y coordinate'),
-                    selectable = self.c.parse_attribute(
-                        attributes, 'selectable', True,
-                        ENUM_BOOLEAN.index, 'selectability'),
-                    angle = self.c.parse_attribute(
-                        attributes, 'angle', 0,
-                        parse_angle, 'angle'),
-                    mirror = self.c.parse_attribute(
-                        attributes, 'mirror', False,
-                        ENUM_BOOLEAN.index, 'mirror flag')))
+            data = xorn.storage.Component(
+                x = self.c.parse_attribute(
+                    attributes, 'x', None,
+                    self.c.parse, 'X coordinate'),
+                y = self.c.parse_attribute(
+                    attributes, 'y', None,
+                    self.c.parse, 'Y coordinate'),
+                selectable = self.c.parse_attribute(
+                    attributes, 'selectable', True,
+                    ENUM_BOOLEAN.index, 'selectability'),
+                angle = self.c.parse_attribute(
+                    attributes, 'angle', 0,
+                    parse_angle, 'angle'),
+                mirror = self.c.parse_attribute(
+                    attributes, 'mirror', False,
+                    ENUM_BOOLEAN.index, 'mirror flag'))
+            ob = len(self.items)
+            self.items.append((data, None))
             try:
                 symbol_id = attributes.pop('symbol')
             except KeyError:
@@ -276,9 +275,9 @@ class ContentHandler(NullHandler):
                     self.c.log.error(_("symbol id can't be empty"))
                 else:
                     self.c.symbol_refs.append(
-                        (self.rev, ob, symbol_id, self.c.log.lineno))
+                        (data, symbol_id, self.c.log.lineno))
 
-            return ContentHandler(self.c, self.rev, ob)
+            return ContentHandler(self.c, self.items, ob)
 
         if name == 'line':
             x0 = self.c.parse_attribute(attributes, 'x0', None,
@@ -289,13 +288,13 @@ class ContentHandler(NullHandler):
                                         self.c.parse, 'second X coordinate')
             y1 = self.c.parse_attribute(attributes, 'y1', None,
                                         self.c.parse, 'second Y coordinate')
-            self.rev.add_object(
+            self.items.append((
                 xorn.storage.Line(
                     x = x0, y = y0, width = x1 - x0, height = y1 - y0,
                     color = self.c.parse_attribute(
                         attributes, 'color', 3,
                         ENUM_COLOR.index, 'color'),
-                    line = self.c.parse_line(attributes)))
+                    line = self.c.parse_line(attributes)), None))
             return NullHandler(self.c.log)
 
         if name == 'net' or name == 'pin':
@@ -322,7 +321,8 @@ class ContentHandler(NullHandler):
                                         self.c.parse, 'second X coordinate')
             y1 = self.c.parse_attribute(attributes, 'y1', None,
                                         self.c.parse, 'second Y coordinate')
-            ob = self.rev.add_object(
+            ob = len(self.items)
+            self.items.append((
                 xorn.storage.Net(
                     x = x0, y = y0, width = x1 - x0, height = y1 - y0,
                     color = self.c.parse_attribute(
@@ -330,38 +330,38 @@ class ContentHandler(NullHandler):
                         ENUM_COLOR.index, 'color'),
                     is_bus = is_bus,
                     is_pin = is_pin,
-                    is_inverted = is_inverted))
-            return ContentHandler(self.c, self.rev, ob)
+                    is_inverted = is_inverted), None))
+            return ContentHandler(self.c, self.items, ob)
 
         if name == 'path':
-            return PathHandler(self.c.log, self.rev, xorn.storage.Path(
+            return PathHandler(self.c.log, self.items, xorn.storage.Path(
                 color = self.c.parse_attribute(attributes, 'color', 3,
                                                ENUM_COLOR.index, 'color'),
                 line = self.c.parse_line(attributes),
                 fill = self.c.parse_fill(attributes)))
 
         if name == 'picture':
-            ob = self.rev.add_object(
-                xorn.storage.Picture(
-                    x = self.c.parse_attribute(
-                        attributes, 'x', None,
-                        self.c.parse, 'X coordinate'),
-                    y = self.c.parse_attribute(
-                        attributes, 'y', None,
-                        self.c.parse, 'Y coordinate'),
-                    width = self.c.parse_attribute(
-                        attributes, 'width', None,
-                        self.c.parse, 'width'),
-                    height = self.c.parse_attribute(
-                        attributes, 'height', None,
-                        self.c.parse, 'height'),
-                    angle = self.c.parse_attribute(
-                        attributes, 'angle', 0,
-                        parse_angle, 'angle'),
-                    mirror = self.c.parse_attribute(
-                        attributes, 'mirrored', False,
-                        ENUM_BOOLEAN.index, 'mirror flag'),
-                    pixmap = None))
+            data = xorn.storage.Picture(
+                x = self.c.parse_attribute(
+                    attributes, 'x', None,
+                    self.c.parse, 'X coordinate'),
+                y = self.c.parse_attribute(
+                    attributes, 'y', None,
+                    self.c.parse, 'Y coordinate'),
+                width = self.c.parse_attribute(
+                    attributes, 'width', None,
+                    self.c.parse, 'width'),
+                height = self.c.parse_attribute(
+                    attributes, 'height', None,
+                    self.c.parse, 'height'),
+                angle = self.c.parse_attribute(
+                    attributes, 'angle', 0,
+                    parse_angle, 'angle'),
+                mirror = self.c.parse_attribute(
+                    attributes, 'mirrored', False,
+                    ENUM_BOOLEAN.index, 'mirror flag'),
+                pixmap = None)
+            self.items.append((data, None))
             try:
                 pixmap_id = attributes.pop('pixmap')
             except KeyError:
@@ -371,7 +371,7 @@ class ContentHandler(NullHandler):
                     self.c.log.error(_("pixmap id can't be empty"))
                 else:
                     self.c.pixmap_refs.append(
-                        (self.rev, ob, pixmap_id, self.c.log.lineno))
+                        (data, pixmap_id, self.c.log.lineno))
 
             return NullHandler(self.c.log)
 
@@ -409,6 +409,7 @@ class LoadContext:
         self.pixmaps = {}
         self.symbol_refs = []
         self.pixmap_refs = []
+        self.pending_items = []
         self.load_symbol = load_symbol
         self.load_pixmap = load_pixmap
         self.use_hybridnum = False
@@ -485,7 +486,9 @@ class RootElementHandler(NullHandler):
         self.log = c.log
         self.c = c
         self.rev = xorn.storage.Revision()
+        self.items = []
         self.had_content = False
+        c.pending_items.append((self.rev, self.items))
 
     def start_element(self, name, attributes):
         if name == 'content':
@@ -493,7 +496,7 @@ class RootElementHandler(NullHandler):
                 self.c.log.error(_("duplicate content tag"))
                 return VoidHandler()
             self.had_content = True
-            return ContentHandler(self.c, self.rev, None)
+            return ContentHandler(self.c, self.items, None)
 
         if name == 'symbol':
             try:
@@ -609,6 +612,34 @@ class RootElementHandler(NullHandler):
         if not self.had_content:
             self.c.log.error(_("content missing"))
 
+## Return the names of the library symbols referenced by a file.
+#
+# Scans the string \a data for non-embedded symbol elements without
+# interpreting the rest of the file.  The names are returned in the
+# order in which they first appear.  Malformed files yield the names
+# found up to the first syntax error.
+
+def referenced_symbol_names(data):
+    names = []
+    seen = set()
+
+    def StartElementHandler(name, attributes):
+        if name.rsplit(NSSEP, 1)[-1] != 'symbol' or \
+           attributes.get('mode') not in ['omitted', 'referenced']:
+            return
+        name = attributes.get('name')
+        if name is not None and name not in seen:
+            seen.add(name)
+            names.append(name)
+
+    p = xml.parsers.expat.ParserCreate(namespace_separator = NSSEP)
+    p.StartElementHandler = StartElementHandler
+    try:
+        p.Parse(data, True)
+    except xml.parsers.expat.ExpatError:
+        pass
+    return names
+
 def read_file(f, name, log, load_symbol, load_pixmap):
     context = LoadContext(log, load_symbol, load_pixmap)
     reh = RootElementHandler(context)
@@ -635,23 +666,24 @@ def read_file(f, name, log, load_symbol, load_pixmap):
 
     read_xml_file(f, log, NAMESPACE, start_root_element)
 
-    for rev, ob, symbol_id, lineno in context.symbol_refs:
+    for data, symbol_id, lineno in context.symbol_refs:
         if symbol_id not in context.symbols:
             log.lineno = lineno
             log.error(_("undefined symbol \"%s\"") % symbol_id)
             continue
-        data = rev.get_object_data(ob)
         data.symbol = context.symbols[symbol_id]
-        rev.set_object_data(ob, data)
 
-    for rev, ob, pixmap_id, lineno in context.pixmap_refs:
+    for data, pixmap_id, lineno in context.pixmap_refs:
         if pixmap_id not in context.pixmaps:
             log.lineno = lineno
             log.error(_("undefined pixmap \"%s\"") % pixmap_id)
             continue
-        data = rev.get_object_data(ob)
         data.pixmap = context.pixmaps[pixmap_id]
-        rev.set_object_data(ob, data)
+
+    # The objects are only added once all references have been
+    # resolved, so each revision is populated in a single step.
+    for rev, items in context.pending_items:
+        rev.add_objects(items)
 
     return xorn.proxy.RevisionProxy(reh.rev)
 
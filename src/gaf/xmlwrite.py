@@ -276,8 +276,7 @@ class Writer:
             ids.add(id)
             return id
 
-        for ob in rev.all_objects():
-            data = ob.data()
+        for ob, data, attached_to, pos in rev.objects_with_data():
             if isinstance(data, xorn.storage.Component):
                 if data.symbol not in self.symbol_ids:
                     tmp = data.symbol.basename
@@ -305,8 +304,7 @@ class Writer:
 
         written_symbols = set()
         written_pixmaps = set()
-        for ob in rev.all_objects():
-            data = ob.data()
+        for ob, data, attached_to, pos in rev.objects_with_data():
             if isinstance(data, xorn.storage.Component):
                 if data.symbol not in written_symbols:
                     self.write_symbol(data.symbol)
@@ -43,10 +43,31 @@ class RevisionProxy:
     def all_objects(self):
         return [ObjectProxy(self.rev, ob) for ob in self.rev.get_objects()]
 
+    def iter_objects(self):
+        for ob in self.rev.iter_objects():
+            yield ObjectProxy(self.rev, ob)
+
+    def objects_with_data(self, type = None):
+        result = []
+        for ob, data, attached_to, pos in self.rev.get_objects_with_data(type):
+            if attached_to is not None:
+                attached_to = ObjectProxy(self.rev, attached_to)
+            result.append((ObjectProxy(self.rev, ob), data, attached_to, pos))
+        return result
+
     def selected_objects(self, sel):
         return [ObjectProxy(self.rev, ob)
                 for ob in xorn.storage.get_selected_objects(self.rev, sel)]
 
+    def object_locations(self, obs):
+        result = []
+        for attached_to, pos in self.rev.get_object_locations(
+                [ob.ob for ob in obs]):
+            if attached_to is not None:
+                attached_to = ObjectProxy(self.rev, attached_to)
+            result.append((attached_to, pos))
+        return result
+
     def add_object(self, data):
         return ObjectProxy(self.rev, self.rev.add_object(data))
 
@@ -89,6 +89,39 @@ class Revision:
     def get_objects(self):
         pass
 
+    ## Return an iterator over all objects in a revision.
+    #
+    # The objects are returned in the same order as by \ref
+    # get_objects, but they are looked up one at a time, so no list
+    # of all objects is created.  This is useful when the caller
+    # stops before reaching the end.
+    #
+    # \throw RuntimeError if the object most recently returned has
+    #                     been deleted when the next object is
+    #                     requested
+
+    def iter_objects(self):
+        pass
+
+    ## Return a list of all objects in a revision along with their
+    ## data and location.
+    #
+    # Equivalent to calling \ref get_object_data and \ref
+    # get_object_location for each object returned by \ref
+    # get_objects, but done in a single call.
+    #
+    # If \a type is given, only objects whose data is an instance of
+    # this class (e.g., \ref Net) are returned.
+    #
+    # \return Returns a list of tuples <tt>(ob, data, attached_to,
+    # pos)</tt> in the order of the objects in the revision.
+    #
+    # \throw TypeError   if \a type is not \c None or a data class
+    # \throw MemoryError if there is not enough memory
+
+    def get_objects_with_data(self, type = None):
+        pass
+
     ## Return whether an object exists in a revision.
 
     def object_exists(self, ob):
@@ -123,6 +156,21 @@ class Revision:
     def get_object_location(self, ob):
         pass
 
+    ## Get the locations of several objects at once.
+    #
+    # Equivalent to calling \ref get_object_location for each object
+    # in \a obs, but faster for a large number of objects.
+    #
+    # \return Returns a list of tuples <tt>(attached_to, pos)</tt> in
+    # the same order as \a obs.
+    #
+    # \throw KeyError    if an object doesn't exist in the revision
+    # \throw TypeError   if \a obs contains something else than objects
+    # \throw MemoryError if there is not enough memory
+
+    def get_object_locations(self, obs):
+        pass
+
     ## Add a new object to a transient revision.
     #
     # The object is appended to the end of the object list.
@@ -143,6 +191,32 @@ class Revision:
     def add_object(self, data):
         pass
 
+    ## Add several new objects to a transient revision at once.
+    #
+    # \a items is a sequence of <tt>(data, attach_to)</tt> tuples.
+    # \a data is the data of the new object (as for \ref add_object),
+    # and \a attach_to is either \c None or the index of a preceding
+    # item to whose object the new object should be attached.
+    #
+    # This has the same effect as calling \ref add_object and \ref
+    # relocate_object for each item, but all objects are added in a
+    # single step.  If an error occurs, the revision is left
+    # unchanged.
+    #
+    # \return Returns a list of the new objects.
+    #
+    # \throw ValueError  if the revision isn't transient
+    # \throw TypeError   if an item doesn't have a valid type
+    # \throw IndexError  if \a attach_to doesn't refer to a preceding item
+    # \throw ValueError  if the data of an item contains an invalid value
+    # \throw ValueError  if an object other than text is to be
+    #                    attached, or an object is to be attached to
+    #                    something other than a net or component
+    # \throw MemoryError if there is not enough memory
+
+    def add_objects(self, items):
+        pass
+
     ## Set the data of an object in a transient revision.
     #
     # If the object does not exist in the revision, it is created and
@@ -377,6 +451,22 @@ def get_removed_objects(from, to):
 def get_modified_objects(from, to):
     pass
 
+## Return information about the memory used by the storage library.
+#
+# Returns a dictionary with the following keys:
+#
+# - \c reserved: number of bytes reserved for object data and internal
+#   data structures
+# - \c used: number of those bytes which are currently in use
+# - \c objects: number of distinct object states
+# - \c strings: number of bytes used for string data (each distinct
+#   string is stored and counted only once)
+#
+# Memory is shared between revisions, so this covers all revisions.
+
+def get_memory_usage():
+    pass
+
 ## Return an empty selection.
 #
 # \throw MemoryError if there is not enough memory
@@ -15,6 +15,8 @@
    Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
 
 #include "internal.h"
+#include "key_iterator.h"
+#include <algorithm>
 #include <stdlib.h>
 #include <string.h>
 
@@ -444,6 +446,123 @@ public:
 
 /****************************************************************************/
 
+/* Get the value of an attribute from an object's data.  Returns false
+   if objects of the given type don't have the attribute.  */
+
+template<typename Attr> static bool get_value(
+    typename Attr::basic_type &v, xorn_obtype_t type, void const *data)
+{
+    switch (type) {
+    case xornsch_obtype_arc:
+	return Attr::get(v, (struct xornsch_arc const *)data);
+    case xornsch_obtype_box:
+	return Attr::get(v, (struct xornsch_box const *)data);
+    case xornsch_obtype_circle:
+	return Attr::get(v, (struct xornsch_circle const *)data);
+    case xornsch_obtype_component:
+	return Attr::get(v, (struct xornsch_component const *)data);
+    case xornsch_obtype_line:
+	return Attr::get(v, (struct xornsch_line const *)data);
+    case xornsch_obtype_net:
+	return Attr::get(v, (struct xornsch_net const *)data);
+    case xornsch_obtype_path:
+	return Attr::get(v, (struct xornsch_path const *)data);
+    case xornsch_obtype_picture:
+	return Attr::get(v, (struct xornsch_picture const *)data);
+    case xornsch_obtype_text:
+	return Attr::get(v, (struct xornsch_text const *)data);
+    default:
+	return false;
+    }
+}
+
+/* Attributes for which each revision keeps a secondary index
+   (xorn_revision::by_attr).  Index<Attr>::find returns false for
+   attributes which aren't indexed; otherwise, it sets result to the
+   set of objects having the given value (or NULL if there are none)
+   and returns true.  */
+
+template<typename Attr> class Index {
+public:
+    static bool find(xorn_revision_t, typename Attr::basic_type const &,
+		     object_set const *&) {
+	return false;
+    }
+};
+
+#define INDEXED_ATTRIBUTE(name, n)					\
+    template<> class Index<Attr_##name> {				\
+    public:								\
+	static std::pair<int, int> key(Attr_##name::basic_type v) {	\
+	    return std::make_pair(n, (int) v);				\
+	}								\
+	static bool find(xorn_revision_t rev,				\
+			 Attr_##name::basic_type const &value,		\
+			 object_set const *&result) {			\
+	    result = rev->by_attr.find(key(value));			\
+	    return true;						\
+	}								\
+    };
+
+INDEXED_ATTRIBUTE(color, 0)
+INDEXED_ATTRIBUTE(is_bus, 1)
+INDEXED_ATTRIBUTE(is_pin, 2)
+INDEXED_ATTRIBUTE(visibility, 3)
+
+template<typename Attr> static void update_index(
+    xorn_revision_t rev, xorn_object_t ob, obstate const *state, bool add)
+{
+    typename Attr::basic_type v;
+    clear(v);
+    if (!get_value<Attr>(v, state->type, state->data))
+	return;
+
+    std::pair<int, int> key = Index<Attr>::key(v);
+    object_set const *p = rev->by_attr.find(key);
+    object_set obs;
+    if (p != NULL)
+	obs = *p;
+
+    if (add)
+	obs.set(ob, true);
+    else
+	obs.erase(ob);
+
+    if (obs.empty())
+	rev->by_attr.erase(key);
+    else
+	rev->by_attr.set(key, obs);
+}
+
+static void update_indexes(
+    xorn_revision_t rev, xorn_object_t ob, obstate const *state, bool add)
+{
+    update_index<Attr_color>(rev, ob, state, add);
+    update_index<Attr_is_bus>(rev, ob, state, add);
+    update_index<Attr_is_pin>(rev, ob, state, add);
+    update_index<Attr_visibility>(rev, ob, state, add);
+}
+
+void set_obstate(xorn_revision_t rev, xorn_object_t ob, obstate *state)
+{
+    obstate *const *old = rev->obstates.find(ob);
+    if (old != NULL)
+	update_indexes(rev, ob, *old, false);
+    update_indexes(rev, ob, state, true);
+    rev->obstates.set(ob, state);
+}
+
+void erase_obstate(xorn_revision_t rev, xorn_object_t ob)
+{
+    obstate *const *old = rev->obstates.find(ob);
+    if (old == NULL)
+	return;
+    update_indexes(rev, ob, *old, false);
+    rev->obstates.erase(ob);
+}
+
+/****************************************************************************/
+
 template<typename Attr> static void get_attr(
     xorn_revision_t rev, xorn_selection_t sel,
     xorn_attst_t *state_return, typename Attr::basic_type *value_return)
@@ -452,9 +571,9 @@ template<typename Attr> static void get_attr(
     typename Attr::basic_type result;
     clear(result);
 
-    std::map<xorn_object_t, obstate *>::const_iterator i
+    pmap<xorn_object_t, obstate *>::const_iterator i
 	= rev->obstates.begin();
-    std::set<xorn_object_t>::const_iterator j = sel->begin();
+    xorn_selection::const_iterator j = sel->begin();
 
     while (i != rev->obstates.end() && j != sel->end())
 	if (i->first < *j)
@@ -469,24 +588,7 @@ template<typename Attr> static void get_attr(
 	    ++i;
 	    ++j;
 
-	    if ((type != xornsch_obtype_arc ||
-		     !Attr::get(v, (struct xornsch_arc *)data)) &&
-		(type != xornsch_obtype_box ||
-		     !Attr::get(v, (struct xornsch_box *)data)) &&
-		(type != xornsch_obtype_circle ||
-		     !Attr::get(v, (struct xornsch_circle *)data)) &&
-		(type != xornsch_obtype_component ||
-		     !Attr::get(v, (struct xornsch_component *)data)) &&
-		(type != xornsch_obtype_line ||
-		     !Attr::get(v, (struct xornsch_line *)data)) &&
-		(type != xornsch_obtype_net ||
-		     !Attr::get(v, (struct xornsch_net *)data)) &&
-		(type != xornsch_obtype_path ||
-		     !Attr::get(v, (struct xornsch_path *)data)) &&
-		(type != xornsch_obtype_picture ||
-		     !Attr::get(v, (struct xornsch_picture *)data)) &&
-		(type != xornsch_obtype_text ||
-		     !Attr::get(v, (struct xornsch_text *)data)))
+	    if (!get_value<Attr>(v, type, data))
 		continue;
 
 	    if (!found) {
@@ -519,22 +621,11 @@ template<typename Attr> static int set_attr(
 	return -1;
     }
 
-    std::map<xorn_object_t, obstate *> new_obstates;
     try {
-	new_obstates = rev->obstates;
-    } catch (std::bad_alloc const &) {
-	if (err != NULL)
-	    *err = xorn_error_out_of_memory;
-	return -1;
-    }
-    for (std::map<xorn_object_t, obstate *>::const_iterator i
-	     = new_obstates.begin(); i != new_obstates.end(); ++i)
-	i->second->inc_refcnt();
-
-    try {
-	std::map<xorn_object_t, obstate *>::const_iterator i
+	xorn_revision new_rev(rev);
+	pmap<xorn_object_t, obstate *>::const_iterator i
 	    = rev->obstates.begin();
-	std::set<xorn_object_t>::const_iterator j = sel->begin();
+	xorn_selection::const_iterator j = sel->begin();
 
 	while (i != rev->obstates.end() && j != sel->end())
 	    if (i->first < *j)
@@ -576,38 +667,26 @@ template<typename Attr> static int set_attr(
 		}
 
 		try {
-		    obstate *tmp = new obstate(type, data);
+		    obstate *state = obstate::create(type, data);
 		    try {
-			obstate *&p = new_obstates[ob];
-			if (p != NULL)
-			    p->dec_refcnt();
-			p = tmp;
+			set_obstate(&new_rev, ob, state);
 		    } catch (std::bad_alloc const &) {
-			tmp->dec_refcnt();
+			state->dec_refcnt();
 			throw;
 		    }
+		    state->dec_refcnt();
 		} catch (std::bad_alloc const &) {
 		    free(data);
 		    throw;
 		}
 		free(data);
 	    }
+	*rev = new_rev;
     } catch (std::bad_alloc const &) {
-	for (std::map<xorn_object_t, obstate *>::const_iterator
-		 i = new_obstates.begin();
-	     i != new_obstates.end(); ++i)
-	    i->second->dec_refcnt();
 	if (err != NULL)
 	    *err = xorn_error_out_of_memory;
 	return -1;
     }
-
-    for (std::map<xorn_object_t, obstate *>::const_iterator
-	     i = rev->obstates.begin();
-	 i != rev->obstates.end(); ++i)
-	i->second->dec_refcnt();
-
-    rev->obstates = new_obstates;
     return 0;
 }
 
@@ -622,7 +701,16 @@ template<typename Attr> static xorn_selection_t select_by_attr(
     }
 
     try {
-	for (std::map<xorn_object_t, obstate *>::const_iterator
+	object_set const *indexed;
+	if (Index<Attr>::find(rev, value, indexed)) {
+	    if (indexed != NULL)
+		copy(iterate_keys(indexed->begin()),
+		     iterate_keys(indexed->end()),
+		     back_inserter(*rsel));
+	    return rsel;
+	}
+
+	for (pmap<xorn_object_t, obstate *>::const_iterator
 		 i = rev->obstates.begin();
 	     i != rev->obstates.end(); ++i) {
 	    typename Attr::basic_type v;
@@ -631,28 +719,11 @@ template<typename Attr> static xorn_selection_t select_by_attr(
 	    xorn_obtype_t type = i->second->type;
 	    void *data = i->second->data;
 
-	    if ((type != xornsch_obtype_arc ||
-		     !Attr::get(v, (struct xornsch_arc *)data)) &&
-		(type != xornsch_obtype_box ||
-		     !Attr::get(v, (struct xornsch_box *)data)) &&
-		(type != xornsch_obtype_circle ||
-		     !Attr::get(v, (struct xornsch_circle *)data)) &&
-		(type != xornsch_obtype_component ||
-		     !Attr::get(v, (struct xornsch_component *)data)) &&
-		(type != xornsch_obtype_line ||
-		     !Attr::get(v, (struct xornsch_line *)data)) &&
-		(type != xornsch_obtype_net ||
-		     !Attr::get(v, (struct xornsch_net *)data)) &&
-		(type != xornsch_obtype_path ||
-		     !Attr::get(v, (struct xornsch_path *)data)) &&
-		(type != xornsch_obtype_picture ||
-		     !Attr::get(v, (struct xornsch_picture *)data)) &&
-		(type != xornsch_obtype_text ||
-		     !Attr::get(v, (struct xornsch_text *)data)))
+	    if (!get_value<Attr>(v, type, data))
 		continue;
 
 	    if (equals(v, value))
-		rsel->insert(ob);
+		rsel->push_back(ob);
 	}
     } catch (std::bad_alloc const &) {
 	delete rsel;
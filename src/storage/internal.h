@@ -18,38 +18,86 @@
 #define INTERNAL_H
 
 #include <xornstorage.h>
-#include <map>
+#include <stdint.h>
 #include <vector>
-#include <set>
+#include "pmap.h"
 
 bool data_is_valid(xorn_obtype_t type, void const *data);
 
 void *copy_data(xorn_obtype_t type, void const *src);
 
+/* The state of an object is stored in a single block together with
+   the object data.  Blocks are allocated from slabs (see slab.cc), so
+   states of the same object type are kept close together.  */
+
 class obstate {
+	obstate(xorn_obtype_t type, void *data);
 	~obstate();
 	unsigned int refcnt;
 public:
-	obstate(xorn_obtype_t type, void const *data);
+	static obstate *create(xorn_obtype_t type, void const *data);
 	void inc_refcnt();
 	void dec_refcnt();
 	xorn_obtype_t const type;
 	void *const data;
 };
 
+template<> struct pmap_value_traits<obstate *> {
+	static void retain(obstate *const &p) {
+		p->inc_refcnt();
+	}
+	static void release(obstate *const &p) {
+		p->dec_refcnt();
+	}
+};
+
+/* Objects attached to the same object (or to no object) are ordered
+   by a sort key.  Keys are spaced apart so an object can usually be
+   inserted between two siblings without renumbering them.  */
+
+typedef uint64_t sortkey_t;
+typedef pmap<sortkey_t, xorn_object_t> sibling_map;
+
+struct location {
+	xorn_object_t attached_to;
+	sortkey_t sortkey;
+};
+
+/* Sets of objects are represented as persistent maps whose values
+   aren't used.  For some commonly selected scalar attributes, each
+   revision keeps a secondary index mapping an (attribute, value) pair
+   to the set of objects having that value; see attributes.cc.  */
+
+typedef pmap<xorn_object_t, bool> object_set;
+typedef pmap<std::pair<int, int>, object_set> attribute_index;
+
+/* All maps are persistent, so copying a revision takes constant time
+   and the copy shares its memory with the original until either of
+   them is changed.  */
+
 struct xorn_revision {
 	xorn_revision();
 	xorn_revision(xorn_revision_t rev);
-	~xorn_revision();
 	bool is_transient;
-	std::map<xorn_object_t, obstate *> obstates;
-	std::map<xorn_object_t, std::vector<xorn_object_t> > children;
-	std::map<xorn_object_t, xorn_object_t> parent;
+	pmap<xorn_object_t, obstate *> obstates;
+	pmap<xorn_object_t, sibling_map> children;
+	pmap<xorn_object_t, location> parent;
+	attribute_index by_attr;
 };
 
+/* Change or remove the state of an object, keeping the attribute
+   index up to date.  May throw std::bad_alloc and leave the revision
+   in an inconsistent state.  */
+
+void set_obstate(xorn_revision_t rev, xorn_object_t ob, obstate *state);
+void erase_obstate(xorn_revision_t rev, xorn_object_t ob);
+
 /* There is no struct xorn_object. */
 
-struct xorn_selection : public std::set<xorn_object_t> {
+/* A selection is a sorted vector of distinct objects, so it takes a
+   single allocation and set operations can be done by merging.  */
+
+struct xorn_selection : public std::vector<xorn_object_t> {
 };
 
 #endif
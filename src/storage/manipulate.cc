@@ -15,25 +15,111 @@
    Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
 
 #include "internal.h"
-#include <assert.h>
-#include <algorithm>
 
 static const char *next_object_id = NULL;
 
+/* distance between the sort keys of adjacent objects after renumbering */
+#define SORTKEY_STEP ((sortkey_t) 1 << 32)
+
+/* All of the following helper functions may throw std::bad_alloc and
+   leave the revision in an inconsistent state.  They are therefore
+   only called on a temporary copy of the revision which is assigned
+   to the original revision once all changes have succeeded.  */
+
 
 static void set_object_data(xorn_revision_t rev, xorn_object_t ob,
 			    xorn_obtype_t type, void const *data)
 {
-	obstate *tmp = new obstate(type, data);
+	obstate *tmp = obstate::create(type, data);
 	try {
-		obstate *&p = rev->obstates[ob];
-		if (p != NULL)
-			p->dec_refcnt();
-		p = tmp;
+		set_obstate(rev, ob, tmp);
 	} catch (std::bad_alloc const &) {
 		tmp->dec_refcnt();
 		throw;
 	}
+	tmp->dec_refcnt();
+}
+
+/* Assign evenly spaced sort keys to the objects attached to attach_to. */
+
+static void renumber_children(xorn_revision_t rev, xorn_object_t attach_to)
+{
+	sibling_map const *siblings = rev->children.find(attach_to);
+	sibling_map new_siblings;
+	sortkey_t sortkey = 0;
+
+	for (sibling_map::const_iterator i = siblings->begin();
+	     i != siblings->end(); ++i) {
+		sortkey += SORTKEY_STEP;
+		new_siblings.set(sortkey, i->second);
+		location loc = { attach_to, sortkey };
+		rev->parent.set(i->second, loc);
+	}
+	rev->children.set(attach_to, new_siblings);
+}
+
+/* Attach ob to attach_to (or to nothing if attach_to is NULL), either
+   before insert_before, which must already be attached to attach_to,
+   or at the end if insert_before is NULL.  Overwrites the location
+   of ob but doesn't remove it from its previous sibling list.  */
+
+static void insert_child(xorn_revision_t rev, xorn_object_t ob,
+			 xorn_object_t attach_to, xorn_object_t insert_before)
+{
+	sibling_map const *siblings = rev->children.find(attach_to);
+	sortkey_t sortkey;
+
+	for (;;) {
+		if (insert_before == NULL) {
+			sibling_map::value_type const *last =
+				siblings == NULL ? NULL : siblings->last();
+			if (last == NULL) {
+				sortkey = SORTKEY_STEP;
+				break;
+			}
+			if (last->first <= (sortkey_t) -1 - SORTKEY_STEP) {
+				sortkey = last->first + SORTKEY_STEP;
+				break;
+			}
+		} else {
+			sortkey_t upper =
+				rev->parent.find(insert_before)->sortkey;
+			sibling_map::value_type const *prev =
+				siblings->predecessor(upper);
+			sortkey_t lower = prev == NULL ? 0 : prev->first;
+			if (upper - lower >= 2) {
+				sortkey = lower + (upper - lower) / 2;
+				break;
+			}
+		}
+		/* no room left--spread the existing keys apart */
+		renumber_children(rev, attach_to);
+		siblings = rev->children.find(attach_to);
+	}
+
+	sibling_map new_siblings;
+	if (siblings != NULL)
+		new_siblings = *siblings;
+	new_siblings.set(sortkey, ob);
+	rev->children.set(attach_to, new_siblings);
+
+	location loc = { attach_to, sortkey };
+	rev->parent.set(ob, loc);
+}
+
+/* Remove ob from the list of objects attached to its parent.  Leaves
+   the location of ob untouched.  */
+
+static void remove_child(xorn_revision_t rev, xorn_object_t ob)
+{
+	location loc = *rev->parent.find(ob);
+	sibling_map siblings = *rev->children.find(loc.attached_to);
+
+	siblings.erase(loc.sortkey);
+	if (siblings.empty())
+		rev->children.erase(loc.attached_to);
+	else
+		rev->children.set(loc.attached_to, siblings);
 }
 
 /** \brief Add a new object to a transient revision.
@@ -103,30 +189,141 @@ xorn_object_t xorn_add_object(xorn_revision_t rev,
 
 	xorn_object_t ob = (xorn_object_t)++next_object_id;
 	try {
-		rev->children[NULL].push_back(ob);
+		xorn_revision tmp(rev);
+		insert_child(&tmp, ob, NULL, NULL);
+		set_object_data(&tmp, ob, type, data);
+		*rev = tmp;
 	} catch (std::bad_alloc const &) {
 		if (err != NULL)
 			*err = xorn_error_out_of_memory;
 		return NULL;
 	}
-	try {
-		rev->parent[ob] = NULL;
-	} catch (std::bad_alloc const &) {
-		rev->children[NULL].pop_back();
+	return ob;
+}
+
+/** \brief Add a sequence of new objects to a transient revision.
+ *
+ * This is equivalent to adding the objects one by one using \ref
+ * xorn_add_object and attaching each of them via \ref
+ * xorn_relocate_object, but all changes are done in a single step.
+ * Either all objects are added or, if an error occurs, the revision
+ * is left unchanged.
+ *
+ * Objects which aren't attached are appended to the end of the
+ * object list.  Objects which are attached are appended to the end
+ * of the list of objects attached to their parent.
+ *
+ * \param rev             Revision to be changed (must be transient)
+ * \param count           Number of objects to add
+ * \param types           Array of \a count object types
+ * \param data            Array of \a count pointers to data structures
+ *                        matching the respective object type.  As with
+ *                        \ref xorn_add_object, the data is copied.
+ * \param attach_to       Array of \a count indices into the sequence
+ *                        of added objects, or \c -1 for objects which
+ *                        shouldn't be attached.  An object can only be
+ *                        attached to an object which comes before it
+ *                        in the sequence.  May be \c NULL if no object
+ *                        should be attached.
+ * \param objects_return  Array of \a count elements which will be
+ *                        filled with the newly created objects.
+ * \param err             Pointer to a variable of type \c xorn_error_t
+ *                        which, if an error occurs, will be set to the
+ *                        appropriate error code.  May be \c NULL if the
+ *                        caller is not interested in the error code.
+ *
+ * \return Returns \c 0 if the objects have been added.  Returns \c -1
+ * and sets the error code
+ * - to \ref xorn_error_revision_not_transient if the revision isn't
+ *   transient,
+ * - to \ref xorn_error_invalid_argument if one of the types is not a
+ *   valid Xorn object type, one of the data pointers is NULL, or an
+ *   index in \a attach_to doesn't refer to a preceding object,
+ * - to \ref xorn_error_invalid_object_data if the data of one of the
+ *   objects contains an invalid value,
+ * - to \ref xorn_error_invalid_parent if an object which isn't a
+ *   schematic text is to be attached or an object is to be attached
+ *   to something other than a schematic net or component, or
+ * - to \ref xorn_error_out_of_memory if there is not enough memory.  */
+
+int xorn_add_objects(xorn_revision_t rev, size_t count,
+		     xorn_obtype_t const *types, void const *const *data,
+		     ptrdiff_t const *attach_to, xorn_object_t *objects_return,
+		     xorn_error_t *err)
+{
+	for (size_t i = 0; i < count; i++) {
+		switch (types[i]) {
+		case xornsch_obtype_arc:
+		case xornsch_obtype_box:
+		case xornsch_obtype_circle:
+		case xornsch_obtype_component:
+		case xornsch_obtype_line:
+		case xornsch_obtype_net:
+		case xornsch_obtype_path:
+		case xornsch_obtype_picture:
+		case xornsch_obtype_text:
+			break;
+		default:
+			if (err != NULL)
+				*err = xorn_error_invalid_argument;
+			return -1;
+		}
+		if (data[i] == NULL) {
+			if (err != NULL)
+				*err = xorn_error_invalid_argument;
+			return -1;
+		}
+		if (attach_to == NULL || attach_to[i] == -1)
+			continue;
+		if (attach_to[i] < 0 || (size_t) attach_to[i] >= i) {
+			if (err != NULL)
+				*err = xorn_error_invalid_argument;
+			return -1;
+		}
+	}
+
+	if (!rev->is_transient) {
 		if (err != NULL)
-			*err = xorn_error_out_of_memory;
-		return NULL;
+			*err = xorn_error_revision_not_transient;
+		return -1;
 	}
+
+	for (size_t i = 0; i < count; i++) {
+		if (!data_is_valid(types[i], data[i])) {
+			if (err != NULL)
+				*err = xorn_error_invalid_object_data;
+			return -1;
+		}
+		if (attach_to == NULL || attach_to[i] == -1)
+			continue;
+		xorn_obtype_t parent_type = types[attach_to[i]];
+		if (types[i] != xornsch_obtype_text ||
+		    (parent_type != xornsch_obtype_net &&
+		     parent_type != xornsch_obtype_component)) {
+			if (err != NULL)
+				*err = xorn_error_invalid_parent;
+			return -1;
+		}
+	}
+
 	try {
-		set_object_data(rev, ob, type, data);
+		xorn_revision tmp(rev);
+		for (size_t i = 0; i < count; i++) {
+			xorn_object_t ob = (xorn_object_t)++next_object_id;
+			insert_child(&tmp, ob,
+				     attach_to == NULL || attach_to[i] == -1
+					 ? NULL : objects_return[attach_to[i]],
+				     NULL);
+			set_object_data(&tmp, ob, types[i], data[i]);
+			objects_return[i] = ob;
+		}
+		*rev = tmp;
 	} catch (std::bad_alloc const &) {
-		rev->parent.erase(rev->parent.find(ob));
-		rev->children[NULL].pop_back();
 		if (err != NULL)
 			*err = xorn_error_out_of_memory;
-		return NULL;
+		return -1;
 	}
-	return ob;
+	return 0;
 }
 
 /** \brief Set an object in a transient revision to the given object
@@ -221,51 +418,29 @@ int xorn_set_object_data(xorn_revision_t rev, xorn_object_t ob,
 
 	if (type != xornsch_obtype_net &&
 	    type != xornsch_obtype_component) {
-		std::map<xorn_object_t,
-			 std::vector<xorn_object_t> >::const_iterator i
-			= rev->children.find(ob);
-		if (i != rev->children.end() && !i->second.empty()) {
+		sibling_map const *children = rev->children.find(ob);
+		if (children != NULL && !children->empty()) {
 			if (err != NULL)
 				*err = xorn_error_invalid_existing_child;
 			return -1;
 		}
 	}
 
-	std::map<xorn_object_t, xorn_object_t>::const_iterator i
-		= rev->parent.find(ob);
+	location const *loc = rev->parent.find(ob);
 	if (type != xornsch_obtype_text &&
-	    i != rev->parent.end() && i->second != NULL) {
+	    loc != NULL && loc->attached_to != NULL) {
 		if (err != NULL)
 			*err = xorn_error_invalid_parent;
 		return -1;
 	}
 
-	bool add = i == rev->parent.end();
-	if (add) {
-		try {
-			rev->children[NULL].push_back(ob);
-		} catch (std::bad_alloc const &) {
-			if (err != NULL)
-				*err = xorn_error_out_of_memory;
-			return -1;
-		}
-		try {
-			rev->parent[ob] = NULL;
-		} catch (std::bad_alloc const &) {
-			rev->children[NULL].pop_back();
-			if (err != NULL)
-				*err = xorn_error_out_of_memory;
-			return -1;
-		}
-	}
-
 	try {
-		set_object_data(rev, ob, type, data);
+		xorn_revision tmp(rev);
+		if (loc == NULL)
+			insert_child(&tmp, ob, NULL, NULL);
+		set_object_data(&tmp, ob, type, data);
+		*rev = tmp;
 	} catch (std::bad_alloc const &) {
-		if (add) {
-			rev->parent.erase(rev->parent.find(ob));
-			rev->children[NULL].pop_back();
-		}
 		if (err != NULL)
 			*err = xorn_error_out_of_memory;
 		return -1;
@@ -365,70 +540,51 @@ int xorn_relocate_object(xorn_revision_t rev, xorn_object_t ob,
 		return -1;
 	}
 
-	xorn_object_t &parent = rev->parent[ob];
-	std::vector<xorn_object_t> &old_children = rev->children[parent];
-	std::vector<xorn_object_t> &new_children = rev->children[attach_to];
-
-	std::vector<xorn_object_t>::iterator i = find(old_children.begin(),
-						      old_children.end(), ob);
-	assert(i != old_children.end());
-	std::vector<xorn_object_t>::size_type pos = i - old_children.begin();
-
-	/* Try adding the new entry first, removing the old one won't fail. */
+	if (insert_before != NULL) {
+		location const *loc = rev->parent.find(insert_before);
+		if (loc == NULL) {
+			if (err != NULL)
+				*err = xorn_error_successor_doesnt_exist;
+			return -1;
+		}
+		if (loc->attached_to != attach_to) {
+			if (err != NULL)
+				*err = xorn_error_successor_not_sibling;
+			return -1;
+		}
+		if (insert_before == ob)
+			return 0;
+	}
 
 	try {
-		if (insert_before == NULL)
-			new_children.push_back(ob);
-		else {
-			std::vector<xorn_object_t>::iterator j =
-				find(new_children.begin(),
-				     new_children.end(), insert_before);
-			if (j == new_children.end()) {
-			    if (err != NULL) {
-				if (xorn_object_exists_in_revision(
-					    rev, insert_before))
-				    *err = xorn_error_successor_not_sibling;
-				else
-				    *err = xorn_error_successor_doesnt_exist;
-			    }
-			    return -1;
-			}
-			if (&new_children == &old_children && j <= i)
-				++pos;
-			new_children.insert(j, ob);
-		}
+		xorn_revision tmp(rev);
+		remove_child(&tmp, ob);
+		insert_child(&tmp, ob, attach_to, insert_before);
+		*rev = tmp;
 	} catch (std::bad_alloc const &) {
 		if (err != NULL)
 			*err = xorn_error_out_of_memory;
 		return -1;
 	}
-
-	old_children.erase(old_children.begin() + pos);
-	parent = attach_to;
 	return 0;
 }
 
 static void delete_object_but_leave_entry(
 	xorn_revision_t rev, xorn_object_t ob)
 {
-	std::map<xorn_object_t, obstate *>::iterator i
-		= rev->obstates.find(ob);
-	i->second->dec_refcnt();
-	rev->obstates.erase(i);
-
-	rev->parent.erase(rev->parent.find(ob));
+	erase_obstate(rev, ob);
+	rev->parent.erase(ob);
 
-	std::map<xorn_object_t, std::vector<xorn_object_t> >::iterator j
-		= rev->children.find(ob);
-
-	if (j == rev->children.end())
+	sibling_map const *p = rev->children.find(ob);
+	if (p == NULL)
 		return;
 
-	for (std::vector<xorn_object_t>::const_iterator k = j->second.begin();
-	     k != j->second.end(); ++k)
-		delete_object_but_leave_entry(rev, *k);
+	sibling_map children = *p;
+	for (sibling_map::const_iterator i = children.begin();
+	     i != children.end(); ++i)
+		delete_object_but_leave_entry(rev, i->second);
 
-	rev->children.erase(j);
+	rev->children.erase(ob);
 }
 
 /** \brief Delete an object from a transient revision.
@@ -441,9 +597,10 @@ static void delete_object_but_leave_entry(
  * \return Returns \c 0 if the object has been deleted.  Returns \c -1
  * and sets the error code
  * - to \ref xorn_error_revision_not_transient if the revision isn't
- *   transient or
+ *   transient,
  * - to \ref xorn_error_object_doesnt_exist if the object doesn't
- *   exist in the revision.  */
+ *   exist in the revision, or
+ * - to \ref xorn_error_out_of_memory if there is not enough memory.  */
 
 int xorn_delete_object(xorn_revision_t rev, xorn_object_t ob,
 		       xorn_error_t *err)
@@ -454,19 +611,22 @@ int xorn_delete_object(xorn_revision_t rev, xorn_object_t ob,
 		return -1;
 	}
 
-	std::map<xorn_object_t, xorn_object_t>::const_iterator i
-		= rev->parent.find(ob);
-	if (i == rev->parent.end()) {
+	if (rev->parent.find(ob) == NULL) {
 		if (err != NULL)
 			*err = xorn_error_object_doesnt_exist;
 		return -1;
 	}
-	xorn_object_t parent = i->second;
 
-	delete_object_but_leave_entry(rev, ob);
-
-	std::vector<xorn_object_t> &children = rev->children[parent];
-	children.erase(find(children.begin(), children.end(), ob));
+	try {
+		xorn_revision tmp(rev);
+		remove_child(&tmp, ob);
+		delete_object_but_leave_entry(&tmp, ob);
+		*rev = tmp;
+	} catch (std::bad_alloc const &) {
+		if (err != NULL)
+			*err = xorn_error_out_of_memory;
+		return -1;
+	}
 	return 0;
 }
 
@@ -481,8 +641,11 @@ int xorn_delete_object(xorn_revision_t rev, xorn_object_t ob,
  *
  * \return Returns \c 0 if the revision is transient (this doesn't
  * necessarily mean that any objects have been deleted).  Otherwise,
- * returns \c -1 and sets the error code to \ref
- * xorn_error_revision_not_transient.  */
+ * returns \c -1 and sets the error code
+ * - to \ref xorn_error_revision_not_transient if the revision isn't
+ *   transient or
+ * - to \ref xorn_error_out_of_memory if there is not enough memory.
+ *   In this case, no objects are deleted.  */
 
 int xorn_delete_selected_objects(xorn_revision_t rev, xorn_selection_t sel,
 				 xorn_error_t *err)
@@ -493,49 +656,38 @@ int xorn_delete_selected_objects(xorn_revision_t rev, xorn_selection_t sel,
 		return -1;
 	}
 
-	for (std::set<xorn_object_t>::const_iterator i = sel->begin();
-	     i != sel->end(); ++i)
-		(void) xorn_delete_object(rev, *i, NULL);
-
+	try {
+		xorn_revision tmp(rev);
+		for (xorn_selection::const_iterator i = sel->begin();
+		     i != sel->end(); ++i)
+			if (tmp.parent.find(*i) != NULL) {
+				remove_child(&tmp, *i);
+				delete_object_but_leave_entry(&tmp, *i);
+			}
+		*rev = tmp;
+	} catch (std::bad_alloc const &) {
+		if (err != NULL)
+			*err = xorn_error_out_of_memory;
+		return -1;
+	}
 	return 0;
 }
 
 static xorn_object_t copy_object(
 	xorn_revision_t dest, xorn_revision_t src, xorn_object_t src_ob,
-	obstate *obstate, xorn_object_t attach_to,
-	std::vector<xorn_object_t> &copied)
+	obstate *obstate, xorn_object_t attach_to)
 {
 	xorn_object_t dest_ob = (xorn_object_t)++next_object_id;
-	dest->children[attach_to].push_back(dest_ob);
-	try {
-		dest->parent[dest_ob] = attach_to;
-	} catch (std::bad_alloc const &) {
-		dest->children[attach_to].pop_back();
-		throw;
-	}
-	try {
-		dest->obstates[dest_ob] = obstate;
-		obstate->inc_refcnt();
-	} catch (std::bad_alloc const &) {
-		dest->parent.erase(dest->parent.find(dest_ob));
-		dest->children[attach_to].pop_back();
-		throw;
-	}
-	try {
-		copied.push_back(dest_ob);
-	} catch (std::bad_alloc const &) {
-		(void) xorn_delete_object(dest, dest_ob, NULL);
-		throw;
-	}
+	insert_child(dest, dest_ob, attach_to, NULL);
+	set_obstate(dest, dest_ob, obstate);
 
-	std::map<xorn_object_t, std::vector<xorn_object_t> >::const_iterator i
-		= src->children.find(src_ob);
+	sibling_map const *children = src->children.find(src_ob);
 
-	if (i != src->children.end())
-		for (std::vector<xorn_object_t>::const_iterator j
-			     = i->second.begin(); j != i->second.end(); ++j)
-			copy_object(dest, src, *j, src->obstates[*j],
-				    dest_ob, copied);
+	if (children != NULL)
+		for (sibling_map::const_iterator i = children->begin();
+		     i != children->end(); ++i)
+			copy_object(dest, src, i->second,
+				    *src->obstates.find(i->second), dest_ob);
 
 	return dest_ob;
 }
@@ -572,23 +724,20 @@ xorn_object_t xorn_copy_object(xorn_revision_t dest,
 		return NULL;
 	}
 
-	std::map<xorn_object_t, obstate *>::const_iterator i
-		= src->obstates.find(ob);
+	obstate *const *p = src->obstates.find(ob);
 
-	if (i == src->obstates.end()) {
+	if (p == NULL) {
 		if (err != NULL)
 			*err = xorn_error_object_doesnt_exist;
 		return NULL;
 	}
 
-	std::vector<xorn_object_t> copied;
-
 	try {
-		return copy_object(dest, src, ob, i->second, NULL, copied);
+		xorn_revision tmp(dest);
+		xorn_object_t dest_ob = copy_object(&tmp, src, ob, *p, NULL);
+		*dest = tmp;
+		return dest_ob;
 	} catch (std::bad_alloc const &) {
-		for (std::vector<xorn_object_t>::const_iterator i
-			     = copied.begin(); i != copied.end(); ++i)
-			(void) xorn_delete_object(dest, *i, NULL);
 		if (err != NULL)
 			*err = xorn_error_out_of_memory;
 		return NULL;
@@ -638,33 +787,32 @@ xorn_selection_t xorn_copy_objects(xorn_revision_t dest,
 		return NULL;
 	}
 
-	std::map<xorn_object_t, obstate *>::const_iterator i
+	pmap<xorn_object_t, obstate *>::const_iterator i
 		= src->obstates.begin();
-	std::set<xorn_object_t>::const_iterator j = sel->begin();
-	std::vector<xorn_object_t> copied;
-
-	while (i != src->obstates.end() && j != sel->end())
-	    if (i->first < *j)
-		++i;
-	    else if (i->first > *j)
-		++j;
-	    else {
-		try {
-			xorn_object_t ob = copy_object(
-			    dest, src, i->first, i->second, NULL, copied);
-			rsel->insert(ob);
-		} catch (std::bad_alloc const &) {
-			for (std::vector<xorn_object_t>::const_iterator i
-				     = copied.begin(); i != copied.end(); ++i)
-				(void) xorn_delete_object(dest, *i, NULL);
-			delete rsel;
-			if (err != NULL)
-				*err = xorn_error_out_of_memory;
-			return NULL;
-		}
-		++i;
-		++j;
-	    }
+	xorn_selection::const_iterator j = sel->begin();
+
+	try {
+		xorn_revision tmp(dest);
+		while (i != src->obstates.end() && j != sel->end())
+			if (i->first < *j)
+				++i;
+			else if (i->first > *j)
+				++j;
+			else {
+				/* new objects are allocated in ascending
+				   order, so rsel stays sorted */
+				rsel->push_back(copy_object(&tmp, src, i->first,
+							    i->second, NULL));
+				++i;
+				++j;
+			}
+		*dest = tmp;
+	} catch (std::bad_alloc const &) {
+		delete rsel;
+		if (err != NULL)
+			*err = xorn_error_out_of_memory;
+		return NULL;
+	}
 
 	return rsel;
 }
@@ -24,7 +24,7 @@
 
 bool xorn_object_exists_in_revision(xorn_revision_t rev, xorn_object_t ob)
 {
-	return rev->obstates.find(ob) != rev->obstates.end();
+	return rev->obstates.find(ob) != NULL;
 }
 
 /** \brief Get the type of an object in a given revision.
@@ -34,13 +34,12 @@ bool xorn_object_exists_in_revision(xorn_revision_t rev, xorn_object_t ob)
 
 xorn_obtype_t xorn_get_object_type(xorn_revision_t rev, xorn_object_t ob)
 {
-	std::map<xorn_object_t, obstate *>::const_iterator i
-		= rev->obstates.find(ob);
+	obstate *const *p = rev->obstates.find(ob);
 
-	if (i == rev->obstates.end())
+	if (p == NULL)
 		return xorn_obtype_none;
 
-	return i->second->type;
+	return (*p)->type;
 }
 
 /** \brief Get a pointer to an object's data in a given revision.
@@ -64,13 +63,12 @@ xorn_obtype_t xorn_get_object_type(xorn_revision_t rev, xorn_object_t ob)
 void const *xorn_get_object_data(xorn_revision_t rev, xorn_object_t ob,
 				 xorn_obtype_t type)
 {
-	std::map<xorn_object_t, obstate *>::const_iterator i
-		= rev->obstates.find(ob);
+	obstate *const *p = rev->obstates.find(ob);
 
-	if (i == rev->obstates.end() || i->second->type != type)
+	if (p == NULL || (*p)->type != type)
 		return NULL;
 
-	return i->second->data;
+	return (*p)->data;
 }
 
 /** \brief Get the location of an object in the object structure.
@@ -86,6 +84,10 @@ void const *xorn_get_object_data(xorn_revision_t rev, xorn_object_t ob,
  * Both pointer arguments may be \c NULL to indicate that the caller
  * isn't interested in the return value.
  *
+ * The position is computed in logarithmic time from the size of the
+ * subtrees in the sibling map, so it doesn't need to be updated when
+ * objects are added, moved, or deleted.
+ *
  * \return Returns \c 0 and writes the appropriate values to \a
  * attached_to_return and \a position_return if \a ob exists in \a
  * rev.  Otherwise, doesn't touch the values and returns \c -1.  */
@@ -94,36 +96,71 @@ int xorn_get_object_location(xorn_revision_t rev, xorn_object_t ob,
 			     xorn_object_t *attached_to_return,
 			     unsigned int *position_return)
 {
-	std::map<xorn_object_t, xorn_object_t>::const_iterator i
-		= rev->parent.find(ob);
-	if (i == rev->parent.end())
+	location const *loc = rev->parent.find(ob);
+	if (loc == NULL)
 		return -1;
 
 	if (attached_to_return != NULL)
-		*attached_to_return = i->second;
+		*attached_to_return = loc->attached_to;
 
-	if (position_return != NULL) {
-		std::vector<xorn_object_t> const &children
-			= rev->children[i->second];
-		*position_return = find(children.begin(),
-					children.end(), ob) - children.begin();
-	}
+	if (position_return != NULL)
+		*position_return = rev->children.find(
+			loc->attached_to)->rank(loc->sortkey);
+	return 0;
+}
+
+/** \brief Get the locations of several objects at once.
+ *
+ * \param rev                Revision to examine
+ * \param objects            Objects whose locations to return
+ * \param count              Number of objects
+ * \param attached_to_return Array of \a count elements where to write
+ *                           the objects to which the objects are
+ *                           attached
+ * \param positions_return   Array of \a count elements where to write
+ *                           the indices of the objects relative to
+ *                           their sibling objects
+ *
+ * This is equivalent to calling \ref xorn_get_object_location for
+ * each object but avoids the per-call overhead in language bindings.
+ * Looking up the position of an object takes logarithmic time in the
+ * number of its siblings.
+ *
+ * Both array arguments may be \c NULL to indicate that the caller
+ * isn't interested in the return values.
+ *
+ * \return Returns \c 0 if all objects exist in \a rev.  Otherwise,
+ * returns \c -1; in this case, the contents of the arrays are
+ * undefined.  */
+
+int xorn_get_object_locations(xorn_revision_t rev,
+			      xorn_object_t const *objects, size_t count,
+			      xorn_object_t *attached_to_return,
+			      unsigned int *positions_return)
+{
+	for (size_t i = 0; i < count; i++)
+		if (xorn_get_object_location(
+			    rev, objects[i],
+			    attached_to_return == NULL
+				? NULL : &attached_to_return[i],
+			    positions_return == NULL
+				? NULL : &positions_return[i]) == -1)
+			return -1;
 	return 0;
 }
 
 static void dump_children(xorn_revision_t rev, xorn_object_t attached_to,
 			  xorn_object_t **objects_return, size_t *count_return)
 {
-	std::map<xorn_object_t, std::vector<xorn_object_t> >::const_iterator i
-		= rev->children.find(attached_to);
+	sibling_map const *siblings = rev->children.find(attached_to);
 
-	if (i == rev->children.end())
+	if (siblings == NULL)
 		return;
 
-	for (std::vector<xorn_object_t>::const_iterator j
-		     = i->second.begin(); j != i->second.end(); ++j) {
-		(*objects_return)[(*count_return)++] = *j;
-		dump_children(rev, *j, objects_return, count_return);
+	for (sibling_map::const_iterator i = siblings->begin();
+	     i != siblings->end(); ++i) {
+		(*objects_return)[(*count_return)++] = i->second;
+		dump_children(rev, i->second, objects_return, count_return);
 	}
 }
 
@@ -160,6 +197,40 @@ int xorn_get_objects(
 	return 0;
 }
 
+/** \brief Return the object following a given object in a revision.
+ *
+ * Objects are visited in the same order as they are returned by \ref
+ * xorn_get_objects: each object is followed by the objects attached
+ * to it, and then by its next sibling.  If \a ob is \c NULL, returns
+ * the first object in the revision.
+ *
+ * This allows walking through a revision without allocating a list
+ * of all objects.  Each step takes logarithmic time.
+ *
+ * \return Returns the next object, or \c NULL if \a ob is the last
+ *         object in \a rev or doesn't exist in \a rev.  */
+
+xorn_object_t xorn_get_next_object(xorn_revision_t rev, xorn_object_t ob)
+{
+	sibling_map const *siblings = rev->children.find(ob);
+
+	if (ob != NULL && rev->obstates.find(ob) == NULL)
+		return NULL;
+	if (siblings != NULL)
+		return siblings->first()->second;
+
+	while (ob != NULL) {
+		location const *loc = rev->parent.find(ob);
+		sibling_map::value_type const *next =
+			rev->children.find(loc->attached_to)->successor(
+				loc->sortkey);
+		if (next != NULL)
+			return next->second;
+		ob = loc->attached_to;
+	}
+	return NULL;
+}
+
 /** \brief Return a list of objects in a revision which are attached
  *         to a certain object.
  *
@@ -177,30 +248,28 @@ int xorn_get_objects_attached_to(
 	xorn_revision_t rev, xorn_object_t ob,
 	xorn_object_t **objects_return, size_t *count_return)
 {
-	if (ob != NULL && rev->obstates.find(ob) == rev->obstates.end())
+	if (ob != NULL && rev->obstates.find(ob) == NULL)
 		return -1;
-	std::map<xorn_object_t, std::vector<xorn_object_t> >::const_iterator i
-		= rev->children.find(ob);
+	sibling_map const *siblings = rev->children.find(ob);
 	if (objects_return == NULL) {
-		*count_return =
-			i == rev->children.end() ? 0 : i->second.size();
+		*count_return = siblings == NULL ? 0 : siblings->size();
 		return 0;
 	}
-	if (i == rev->children.end()) {
+	if (siblings == NULL) {
 		*objects_return = NULL;
 		*count_return = 0;
 		return 0;
 	}
 
 	*objects_return = (xorn_object_t *) malloc(
-		i->second.size() * sizeof(xorn_object_t));
+		siblings->size() * sizeof(xorn_object_t));
 	*count_return = 0;
-	if (*objects_return == NULL && !i->second.empty())
+	if (*objects_return == NULL && !siblings->empty())
 		return -1;
 
-	for (std::vector<xorn_object_t>::const_iterator j
-		     = i->second.begin(); j != i->second.end(); ++j)
-		(*objects_return)[(*count_return)++] = *j;
+	for (sibling_map::const_iterator i = siblings->begin();
+	     i != siblings->end(); ++i)
+		(*objects_return)[(*count_return)++] = i->second;
 	return 0;
 }
 
@@ -234,12 +303,41 @@ int xorn_get_selected_objects(
 	return 0;
 }
 
+/* Collects the objects which differ between two revisions.  Lists
+   the caller isn't interested in may be NULL.  */
+
+class object_diff {
+public:
+	object_diff(xorn_object_t *added, xorn_object_t *removed,
+		    xorn_object_t *modified)
+		: added_end(added), removed_end(removed),
+		  modified_end(modified) {
+	}
+	void added(xorn_object_t ob, obstate *) {
+		if (added_end != NULL)
+			*added_end++ = ob;
+	}
+	void removed(xorn_object_t ob, obstate *) {
+		if (removed_end != NULL)
+			*removed_end++ = ob;
+	}
+	void common(xorn_object_t ob, obstate *from, obstate *to) {
+		if (modified_end != NULL && from != to)
+			*modified_end++ = ob;
+	}
+	xorn_object_t *added_end, *removed_end, *modified_end;
+};
+
 /** \brief Return a list of objects which are in a revision but not in
  *         another.
  *
  * The returned list contains all objects in \a to_rev which are not
  * in \a from_rev.  They are not necessarily returned in a meaningful order.
  *
+ * Parts of the revisions which haven't changed since one was copied
+ * from the other are skipped, so this function takes time roughly
+ * proportional to the number of changes.
+ *
  * The same semantics apply as in \ref xorn_get_objects.  See there
  * for a more detailed description.  */
 
@@ -253,13 +351,16 @@ int xorn_get_added_objects(
 	if (*objects_return == NULL && !to_rev->obstates.empty())
 		return -1;
 
-	xorn_object_t *ptr = set_difference(
-		iterate_keys(to_rev->obstates.begin()),
-		iterate_keys(to_rev->obstates.end()),
-		iterate_keys(from_rev->obstates.begin()),
-		iterate_keys(from_rev->obstates.end()), *objects_return);
+	object_diff d(*objects_return, NULL, NULL);
+	try {
+		from_rev->obstates.diff(to_rev->obstates, d);
+	} catch (std::bad_alloc const &) {
+		free(*objects_return);
+		*objects_return = NULL;
+		return -1;
+	}
 
-	*count_return = ptr - *objects_return;
+	*count_return = d.added_end - *objects_return;
 	*objects_return = (xorn_object_t *) realloc(
 		*objects_return, *count_return * sizeof(xorn_object_t));
 	return 0;
@@ -271,6 +372,10 @@ int xorn_get_added_objects(
  * The returned list contains all objects in \a from_rev which are not
  * in \a to_rev.  They are not necessarily returned in a meaningful order.
  *
+ * Parts of the revisions which haven't changed since one was copied
+ * from the other are skipped, so this function takes time roughly
+ * proportional to the number of changes.
+ *
  * The same semantics apply as in \ref xorn_get_objects.  See there
  * for a more detailed description.  */
 
@@ -284,13 +389,16 @@ int xorn_get_removed_objects(
 	if (*objects_return == NULL && !from_rev->obstates.empty())
 		return -1;
 
-	xorn_object_t *ptr = set_difference(
-		iterate_keys(from_rev->obstates.begin()),
-		iterate_keys(from_rev->obstates.end()),
-		iterate_keys(to_rev->obstates.begin()),
-		iterate_keys(to_rev->obstates.end()), *objects_return);
+	object_diff d(NULL, *objects_return, NULL);
+	try {
+		from_rev->obstates.diff(to_rev->obstates, d);
+	} catch (std::bad_alloc const &) {
+		free(*objects_return);
+		*objects_return = NULL;
+		return -1;
+	}
 
-	*count_return = ptr - *objects_return;
+	*count_return = d.removed_end - *objects_return;
 	*objects_return = (xorn_object_t *) realloc(
 		*objects_return, *count_return * sizeof(xorn_object_t));
 	return 0;
@@ -301,6 +409,10 @@ int xorn_get_removed_objects(
  *
  * The objects are not necessarily returned in a meaningful order.
  *
+ * Parts of the revisions which haven't changed since one was copied
+ * from the other are skipped, so this function takes time roughly
+ * proportional to the number of changes.
+ *
  * The same semantics apply as in \ref xorn_get_objects.  See there
  * for a more detailed description.  */
 
@@ -316,24 +428,16 @@ int xorn_get_modified_objects(
 				    && !to_rev->obstates.empty())
 		return -1;
 
-	std::map<xorn_object_t, obstate *>::const_iterator i
-		= from_rev->obstates.begin();
-	std::map<xorn_object_t, obstate *>::const_iterator j
-		= to_rev->obstates.begin();
-
-	while (i != from_rev->obstates.end() && j != to_rev->obstates.end())
-		if (i->first < j->first)
-			++i;
-		else if (i->first > j->first)
-			++j;
-		else {
-			if (i->second != j->second)
-				(*objects_return)[(*count_return)++] =
-					i->first;
-			++i;
-			++j;
-		}
+	object_diff d(NULL, NULL, *objects_return);
+	try {
+		from_rev->obstates.diff(to_rev->obstates, d);
+	} catch (std::bad_alloc const &) {
+		free(*objects_return);
+		*objects_return = NULL;
+		return -1;
+	}
 
+	*count_return = d.modified_end - *objects_return;
 	*objects_return = (xorn_object_t *) realloc(
 		*objects_return, *count_return * sizeof(xorn_object_t));
 	return 0;
@@ -17,24 +17,35 @@
 #include "internal.h"
 #include <stdlib.h>
 #include <string.h>
+#include <map>
+#include <new>
 
 
-void *copy_data(xorn_obtype_t type, void const *src)
-{
-	size_t size;
+/* Number of object states and bytes of interned string data which
+   are currently allocated (see xorn_get_memory_usage).  */
 
+static size_t obstate_count = 0;
+static size_t string_bytes = 0;
+
+static size_t data_size(xorn_obtype_t type)
+{
 	switch (type) {
-	case xornsch_obtype_arc:       size = sizeof(xornsch_arc); break;
-	case xornsch_obtype_box:       size = sizeof(xornsch_box); break;
-	case xornsch_obtype_circle:    size = sizeof(xornsch_circle); break;
-	case xornsch_obtype_component: size = sizeof(xornsch_component); break;
-	case xornsch_obtype_line:      size = sizeof(xornsch_line); break;
-	case xornsch_obtype_net:       size = sizeof(xornsch_net); break;
-	case xornsch_obtype_path:      size = sizeof(xornsch_path); break;
-	case xornsch_obtype_picture:   size = sizeof(xornsch_picture); break;
-	case xornsch_obtype_text:      size = sizeof(xornsch_text); break;
+	case xornsch_obtype_arc:       return sizeof(xornsch_arc);
+	case xornsch_obtype_box:       return sizeof(xornsch_box);
+	case xornsch_obtype_circle:    return sizeof(xornsch_circle);
+	case xornsch_obtype_component: return sizeof(xornsch_component);
+	case xornsch_obtype_line:      return sizeof(xornsch_line);
+	case xornsch_obtype_net:       return sizeof(xornsch_net);
+	case xornsch_obtype_path:      return sizeof(xornsch_path);
+	case xornsch_obtype_picture:   return sizeof(xornsch_picture);
+	case xornsch_obtype_text:      return sizeof(xornsch_text);
 	default:                       throw std::bad_alloc();
 	}
+}
+
+void *copy_data(xorn_obtype_t type, void const *src)
+{
+	size_t size = data_size(type);
 
 	void *dest = malloc(size);
 	if (dest == NULL)
@@ -44,18 +55,69 @@ void *copy_data(xorn_obtype_t type, void const *src)
 	return dest;
 }
 
-static void duplicate_string(xorn_string &str)
+/* Strings are interned: all object states containing a string with
+   the same contents share a single buffer.  Attribute texts like
+   "pintype=io" typically occur many times across a schematic and its
+   symbols.  The pool maps the contents of each buffer (pointing into
+   the buffer itself) to the number of strings using it.  */
+
+struct string_key {
+	char const *s;
+	size_t len;
+
+	bool operator<(string_key const &x) const {
+		int r = memcmp(s, x.s, len < x.len ? len : x.len);
+		return r < 0 || (r == 0 && len < x.len);
+	}
+};
+
+static std::map<string_key, unsigned int> string_pool;
+
+static void intern_string(xorn_string &str)
 {
 	if (str.len == 0) {
 		str.s = NULL;
 		return;
 	}
 
+	string_key key = { str.s, str.len };
+	std::map<string_key, unsigned int>::iterator i
+		= string_pool.find(key);
+	if (i != string_pool.end()) {
+		++i->second;
+		str.s = i->first.s;
+		return;
+	}
+
 	char *buf = (char *)malloc(str.len);
 	if (buf == NULL)
 		throw std::bad_alloc();
 	memcpy(buf, str.s, str.len);
+	key.s = buf;
+	try {
+		string_pool.insert(std::make_pair(key, 1u));
+	} catch (std::bad_alloc const &) {
+		free(buf);
+		throw;
+	}
 	str.s = buf;
+	string_bytes += str.len;
+}
+
+static void release_string(xorn_string &str)
+{
+	if (str.len == 0)
+		return;
+
+	string_key key = { str.s, str.len };
+	std::map<string_key, unsigned int>::iterator i
+		= string_pool.find(key);
+	if (--i->second != 0)
+		return;
+
+	string_pool.erase(i);
+	free(const_cast<char *>(str.s));
+	string_bytes -= str.len;
 }
 
 static void incref_pointer(xorn_pointer &pointer)
@@ -91,60 +153,76 @@ static void normalize_fill_attr(xornsch_fill_attr &fill)
 	}
 }
 
-obstate::obstate(xorn_obtype_t type, void const *data)
-	: refcnt(1), type(type), data(copy_data(type, data))
+/* Normalize the data of a new object state and take ownership of
+   the strings and pointers it references.  */
+
+static void prepare_data(xorn_obtype_t type, void *data)
+{
+	switch(type) {
+	case xornsch_obtype_arc:
+		normalize_line_attr(((xornsch_arc *)data)->line);
+		break;
+	case xornsch_obtype_box:
+		normalize_line_attr(((xornsch_box *)data)->line);
+		normalize_fill_attr(((xornsch_box *)data)->fill);
+		break;
+	case xornsch_obtype_circle:
+		normalize_line_attr(((xornsch_circle *)data)->line);
+		normalize_fill_attr(((xornsch_circle *)data)->fill);
+		break;
+	case xornsch_obtype_component:
+		incref_pointer(((xornsch_component *)data)->symbol);
+		break;
+	case xornsch_obtype_line:
+		normalize_line_attr(((xornsch_line *)data)->line);
+		break;
+	case xornsch_obtype_net:
+		/* nothing to do */
+		break;
+	case xornsch_obtype_path:
+		intern_string(((xornsch_path *)data)->pathdata);
+		normalize_line_attr(((xornsch_path *)data)->line);
+		normalize_fill_attr(((xornsch_path *)data)->fill);
+		break;
+	case xornsch_obtype_picture:
+		incref_pointer(((xornsch_picture *)data)->pixmap);
+		break;
+	case xornsch_obtype_text:
+		intern_string(((xornsch_text *)data)->text);
+		break;
+	default:
+		throw std::bad_alloc();  /* bad object type */
+	}
+}
+
+/* size of the part of a block preceding the object data */
+#define HEADER_SIZE ((sizeof(obstate) + sizeof(max_align) - 1) \
+		     / sizeof(max_align) * sizeof(max_align))
+
+obstate::obstate(xorn_obtype_t type, void *data)
+	: refcnt(1), type(type), data(data)
+{
+}
+
+/* Create a new object state with a reference count of one.  The data
+   is copied, so the caller remains responsible for \a data.  */
+
+obstate *obstate::create(xorn_obtype_t type, void const *data)
 {
+	size_t size = data_size(type);
+	char *block = (char *)slab_alloc(HEADER_SIZE + size);
+	void *copy = block + HEADER_SIZE;
+
+	memcpy(copy, data, size);
 	try {
-		switch(type) {
-		case xornsch_obtype_arc:
-			normalize_line_attr(
-				((xornsch_arc *)this->data)->line);
-			break;
-		case xornsch_obtype_box:
-			normalize_line_attr(
-				((xornsch_box *)this->data)->line);
-			normalize_fill_attr(
-				((xornsch_box *)this->data)->fill);
-			break;
-		case xornsch_obtype_circle:
-			normalize_line_attr(
-				((xornsch_circle *)this->data)->line);
-			normalize_fill_attr(
-				((xornsch_circle *)this->data)->fill);
-			break;
-		case xornsch_obtype_component:
-			incref_pointer(
-				((xornsch_component *)this->data)->symbol);
-			break;
-		case xornsch_obtype_line:
-			normalize_line_attr(
-				((xornsch_line *)this->data)->line);
-			break;
-		case xornsch_obtype_net:
-			/* nothing to do */
-			break;
-		case xornsch_obtype_path:
-			duplicate_string(
-				((xornsch_path *)this->data)->pathdata);
-			normalize_line_attr(
-				((xornsch_path *)this->data)->line);
-			normalize_fill_attr(
-				((xornsch_path *)this->data)->fill);
-			break;
-		case xornsch_obtype_picture:
-			incref_pointer(
-				((xornsch_picture *)this->data)->pixmap);
-			break;
-		case xornsch_obtype_text:
-			duplicate_string(((xornsch_text *)this->data)->text);
-			break;
-		default:
-			throw std::bad_alloc();  /* bad object type */
-		}
+		prepare_data(type, copy);
 	} catch (std::bad_alloc const &) {
-		free(this->data);
+		slab_free(block, HEADER_SIZE + size);
 		throw;
 	}
+
+	obstate_count++;
+	return new (block) obstate(type, copy);
 }
 
 obstate::~obstate()
@@ -154,18 +232,17 @@ obstate::~obstate()
 		decref_pointer(((xornsch_component *)data)->symbol);
 		break;
 	case xornsch_obtype_path:
-		free(const_cast<char *>(((xornsch_path *)data)->pathdata.s));
+		release_string(((xornsch_path *)data)->pathdata);
 		break;
 	case xornsch_obtype_picture:
 		decref_pointer(((xornsch_picture *)data)->pixmap);
 		break;
 	case xornsch_obtype_text:
-		free(const_cast<char *>(((xornsch_text *)data)->text.s));
+		release_string(((xornsch_text *)data)->text);
 		break;
 	default:
 		/* do nothing */;
 	}
-	free(this->data);
 }
 
 void obstate::inc_refcnt()
@@ -175,6 +252,30 @@ void obstate::inc_refcnt()
 
 void obstate::dec_refcnt()
 {
-	if (--refcnt == 0)
-		delete this;
+	if (--refcnt != 0)
+		return;
+
+	size_t size = HEADER_SIZE + data_size(type);
+	this->~obstate();
+	slab_free(this, size);
+	obstate_count--;
+}
+
+/** \brief Return information about the memory used by the library.
+ *
+ * Since memory is shared between revisions, this is reported for all
+ * revisions together rather than for a single revision.
+ *
+ * \a usage->reserved and \a usage->used include memory used for the
+ * object data and internal data structures, but not for strings.
+ * Since strings are shared between all objects containing the same
+ * text, \a usage->strings counts each distinct string once.
+ * Memory which is no longer used is kept for reuse, so \a reserved
+ * doesn't shrink when revisions are freed.  */
+
+void xorn_get_memory_usage(struct xorn_memory_usage *usage)
+{
+	slab_usage(&usage->reserved, &usage->used);
+	usage->objects = obstate_count;
+	usage->strings = string_bytes;
 }
@@ -0,0 +1,467 @@
+/* Copyright (C) 2013-2021 Roland Lutz
+
+   This program is free software; you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation; either version 2 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program; if not, write to the Free Software Foundation,
+   Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
+
+#ifndef PMAP_H
+#define PMAP_H
+
+#include <stddef.h>
+#include <iterator>
+#include <new>
+#include <utility>
+#include <vector>
+#include "slab.h"
+
+/* Persistent map implemented as an AVL tree with reference-counted,
+   immutable nodes.
+
+   Copying a map takes constant time since the copy shares all nodes
+   with the original.  Changing a map creates new nodes along the
+   path from the root to the affected entry (O(log n) allocations)
+   and leaves all other copies untouched.  Nodes are allocated from
+   slabs (see slab.cc) to avoid the overhead of malloc per node.
+
+   All operations which may allocate memory either succeed or throw
+   std::bad_alloc, in which case the map is left unchanged.  Copying,
+   assigning and destroying a map never throws.
+
+   If values need to be reference-counted themselves, specialize
+   pmap_value_traits: retain is called whenever a node referencing a
+   value is created, release whenever such a node is destroyed.  */
+
+template<typename V> struct pmap_value_traits {
+	static void retain(V const &) {
+	}
+	static void release(V const &) {
+	}
+};
+
+/* Maximum height of an AVL tree with 2^64 entries is < 1.45 * 64. */
+#define PMAP_MAX_HEIGHT 96
+
+template<typename K, typename V> class pmap {
+public:
+	typedef std::pair<K, V> value_type;
+
+private:
+	struct node {
+		node(node *left, K const &key, V const &value, node *right)
+			: refcnt(1), left(left), right(right),
+			  entry(key, value) {
+			int hl = height_of(left), hr = height_of(right);
+			height = (hl > hr ? hl : hr) + 1;
+			size = size_of(left) + size_of(right) + 1;
+			retain(left);
+			retain(right);
+			pmap_value_traits<V>::retain(entry.second);
+		}
+		~node() {
+			pmap_value_traits<V>::release(entry.second);
+			release(left);
+			release(right);
+		}
+		static void *operator new(size_t size) {
+			return slab_alloc(size);
+		}
+		static void operator delete(void *p, size_t size) {
+			slab_free(p, size);
+		}
+		unsigned int refcnt;
+		int height;
+		size_t size;
+		node *left, *right;
+		value_type entry;
+	};
+
+	/* owning reference to a node which is released when the
+	   reference goes out of scope */
+	class ref {
+		node *n;
+		ref(ref const &);
+		ref &operator=(ref const &);
+	public:
+		explicit ref(node *n) : n(n) {
+		}
+		~ref() {
+			release(n);
+		}
+		node *get() const {
+			return n;
+		}
+	};
+
+	node *root;
+
+	static void retain(node *n) {
+		if (n != NULL)
+			++n->refcnt;
+	}
+	static void release(node *n) {
+		if (n != NULL && --n->refcnt == 0)
+			delete n;
+	}
+	static int height_of(node const *n) {
+		return n == NULL ? 0 : n->height;
+	}
+	static size_t size_of(node const *n) {
+		return n == NULL ? 0 : n->size;
+	}
+
+	/* All of the following functions return a new reference.
+	   Arguments are borrowed. */
+
+	static node *create(node *l, K const &k, V const &v, node *r) {
+		return new node(l, k, v, r);
+	}
+
+	static node *balance(node *l, K const &k, V const &v, node *r) {
+		int hl = height_of(l), hr = height_of(r);
+		if (hl > hr + 1) {
+			if (height_of(l->left) >= height_of(l->right)) {
+				ref b(create(l->right, k, v, r));
+				return create(l->left, l->entry.first,
+					      l->entry.second, b.get());
+			}
+			node *lr = l->right;
+			ref a(create(l->left, l->entry.first,
+				     l->entry.second, lr->left));
+			ref b(create(lr->right, k, v, r));
+			return create(a.get(), lr->entry.first,
+				      lr->entry.second, b.get());
+		}
+		if (hr > hl + 1) {
+			if (height_of(r->right) >= height_of(r->left)) {
+				ref a(create(l, k, v, r->left));
+				return create(a.get(), r->entry.first,
+					      r->entry.second, r->right);
+			}
+			node *rl = r->left;
+			ref a(create(l, k, v, rl->left));
+			ref b(create(rl->right, r->entry.first,
+				     r->entry.second, r->right));
+			return create(a.get(), rl->entry.first,
+				      rl->entry.second, b.get());
+		}
+		return create(l, k, v, r);
+	}
+
+	static node *insert(node *n, K const &k, V const &v) {
+		if (n == NULL)
+			return create(NULL, k, v, NULL);
+		if (k < n->entry.first) {
+			ref l(insert(n->left, k, v));
+			return balance(l.get(), n->entry.first,
+				       n->entry.second, n->right);
+		}
+		if (n->entry.first < k) {
+			ref r(insert(n->right, k, v));
+			return balance(n->left, n->entry.first,
+				       n->entry.second, r.get());
+		}
+		return create(n->left, k, v, n->right);
+	}
+
+	static node *remove_min(node *n) {
+		if (n->left == NULL) {
+			retain(n->right);
+			return n->right;
+		}
+		ref l(remove_min(n->left));
+		return balance(l.get(), n->entry.first,
+			       n->entry.second, n->right);
+	}
+
+	static node *merge(node *a, node *b) {
+		if (a == NULL) {
+			retain(b);
+			return b;
+		}
+		if (b == NULL) {
+			retain(a);
+			return a;
+		}
+		node *m = b;
+		while (m->left != NULL)
+			m = m->left;
+		ref r(remove_min(b));
+		return balance(a, m->entry.first, m->entry.second, r.get());
+	}
+
+	/* key must be present in the tree */
+	static node *remove(node *n, K const &k) {
+		if (k < n->entry.first) {
+			ref l(remove(n->left, k));
+			return balance(l.get(), n->entry.first,
+				       n->entry.second, n->right);
+		}
+		if (n->entry.first < k) {
+			ref r(remove(n->right, k));
+			return balance(n->left, n->entry.first,
+				       n->entry.second, r.get());
+		}
+		return merge(n->left, n->right);
+	}
+
+	node const *find_node(K const &k) const {
+		node const *n = root;
+		while (n != NULL)
+			if (k < n->entry.first)
+				n = n->left;
+			else if (n->entry.first < k)
+				n = n->right;
+			else
+				return n;
+		return NULL;
+	}
+
+	void replace_root(node *n) {
+		release(root);
+		root = n;
+	}
+
+public:
+	class const_iterator {
+		node const *stack[PMAP_MAX_HEIGHT];
+		int depth;
+
+		void push_left(node const *n) {
+			while (n != NULL) {
+				stack[depth++] = n;
+				n = n->left;
+			}
+		}
+	public:
+		typedef typename pmap::value_type value_type;
+		typedef ptrdiff_t difference_type;
+		typedef value_type const *pointer;
+		typedef value_type const &reference;
+		typedef std::forward_iterator_tag iterator_category;
+
+		const_iterator() : depth(0) {
+		}
+		explicit const_iterator(node const *root) : depth(0) {
+			push_left(root);
+		}
+		const_iterator &operator++() {
+			node const *n = stack[--depth];
+			push_left(n->right);
+			return *this;
+		}
+		const_iterator operator++(int) {
+			const_iterator tmp(*this);
+			++*this;
+			return tmp;
+		}
+		bool operator==(const_iterator const &x) const {
+			return depth == 0 ? x.depth == 0 :
+				x.depth != 0 &&
+				stack[depth - 1] == x.stack[x.depth - 1];
+		}
+		bool operator!=(const_iterator const &x) const {
+			return !(*this == x);
+		}
+		reference operator*() const {
+			return stack[depth - 1]->entry;
+		}
+		pointer operator->() const {
+			return &stack[depth - 1]->entry;
+		}
+	};
+
+	pmap() : root(NULL) {
+	}
+	pmap(pmap const &x) : root(x.root) {
+		retain(root);
+	}
+	~pmap() {
+		release(root);
+	}
+	pmap &operator=(pmap const &x) {
+		retain(x.root);
+		replace_root(x.root);
+		return *this;
+	}
+
+	bool empty() const {
+		return root == NULL;
+	}
+	size_t size() const {
+		return size_of(root);
+	}
+	const_iterator begin() const {
+		return const_iterator(root);
+	}
+	const_iterator end() const {
+		return const_iterator();
+	}
+
+	/* Return a pointer to the value associated with a key, or NULL
+	   if the key isn't present.  The pointer is valid as long as
+	   the map isn't changed. */
+	V const *find(K const &k) const {
+		node const *n = find_node(k);
+		return n == NULL ? NULL : &n->entry.second;
+	}
+
+	/* Return the number of entries with a key less than k.  Takes
+	   logarithmic time since each node knows the size of its
+	   subtree. */
+	size_t rank(K const &k) const {
+		node const *n = root;
+		size_t result = 0;
+		while (n != NULL)
+			if (n->entry.first < k) {
+				result += size_of(n->left) + 1;
+				n = n->right;
+			} else
+				n = n->left;
+		return result;
+	}
+
+	/* Return the entry with the smallest key, or NULL if the map
+	   is empty. */
+	value_type const *first() const {
+		node const *n = root;
+		if (n == NULL)
+			return NULL;
+		while (n->left != NULL)
+			n = n->left;
+		return &n->entry;
+	}
+
+	/* Return the entry with the greatest key, or NULL if the map
+	   is empty. */
+	value_type const *last() const {
+		node const *n = root;
+		if (n == NULL)
+			return NULL;
+		while (n->right != NULL)
+			n = n->right;
+		return &n->entry;
+	}
+
+	/* Return the entry with the greatest key less than k, or NULL
+	   if there is no such entry. */
+	value_type const *predecessor(K const &k) const {
+		node const *n = root, *result = NULL;
+		while (n != NULL)
+			if (n->entry.first < k) {
+				result = n;
+				n = n->right;
+			} else
+				n = n->left;
+		return result == NULL ? NULL : &result->entry;
+	}
+
+	/* Return the entry with the smallest key greater than k, or
+	   NULL if there is no such entry. */
+	value_type const *successor(K const &k) const {
+		node const *n = root, *result = NULL;
+		while (n != NULL)
+			if (k < n->entry.first) {
+				result = n;
+				n = n->left;
+			} else
+				n = n->right;
+		return result == NULL ? NULL : &result->entry;
+	}
+
+	/* Associate a key with a value, replacing the previous value
+	   if the key is already present. */
+	void set(K const &k, V const &v) {
+		replace_root(insert(root, k, v));
+	}
+
+	/* Remove a key.  Returns whether the key was present. */
+	bool erase(K const &k) {
+		if (find_node(k) == NULL)
+			return false;
+		replace_root(remove(root, k));
+		return true;
+	}
+
+	/* Compare this map with another one.  For each key which is
+	   only present in this map, d.removed(key, value) is called;
+	   for each key only present in x, d.added(key, value) is
+	   called; and for each key present in both maps,
+	   d.common(key, value, x_value) is called unless the entries
+	   are known to be identical because they are shared between
+	   the maps.  Keys are passed in ascending order.
+
+	   Subtrees shared by both maps are skipped, so comparing a map
+	   with a modified copy takes time proportional to the number
+	   of changes rather than the size of the map. */
+	template<typename D> void diff(pmap const &x, D &d) const {
+		std::vector<std::pair<node const *, bool> > a, b;
+		a.push_back(std::make_pair(root, false));
+		b.push_back(std::make_pair(x.root, false));
+
+		for (;;) {
+			/* each stack holds the remaining entries in
+			   ascending order (from top to bottom) as a mix
+			   of whole subtrees and single nodes */
+			while (!a.empty() && a.back().first == NULL)
+				a.pop_back();
+			while (!b.empty() && b.back().first == NULL)
+				b.pop_back();
+			if (a.empty() && b.empty())
+				break;
+
+			if (!a.empty() && !b.empty() && a.back() == b.back()) {
+				a.pop_back();
+				b.pop_back();
+				continue;
+			}
+
+			std::vector<std::pair<node const *, bool> > *s = NULL;
+			if (!a.empty() && !a.back().second)
+				s = &a;
+			if (!b.empty() && !b.back().second &&
+			    (s == NULL || height_of(b.back().first) >
+					  height_of(a.back().first)))
+				s = &b;
+			if (s != NULL) {
+				/* expand the subtree on top of the stack */
+				node const *n = s->back().first;
+				s->back() = std::make_pair(n->right, false);
+				s->push_back(std::make_pair(n, true));
+				s->push_back(std::make_pair(n->left, false));
+				continue;
+			}
+
+			if (b.empty() ||
+			    (!a.empty() && a.back().first->entry.first
+					 < b.back().first->entry.first)) {
+				d.removed(a.back().first->entry.first,
+					  a.back().first->entry.second);
+				a.pop_back();
+			} else if (a.empty() ||
+				   b.back().first->entry.first
+					< a.back().first->entry.first) {
+				d.added(b.back().first->entry.first,
+					b.back().first->entry.second);
+				b.pop_back();
+			} else {
+				d.common(a.back().first->entry.first,
+					 a.back().first->entry.second,
+					 b.back().first->entry.second);
+				a.pop_back();
+				b.pop_back();
+			}
+		}
+	}
+};
+
+#endif
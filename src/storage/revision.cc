@@ -23,18 +23,9 @@ xorn_revision::xorn_revision() : is_transient(true)
 
 xorn_revision::xorn_revision(xorn_revision_t rev)
 	: is_transient(true), obstates(rev->obstates),
-	  children(rev->children), parent(rev->parent)
+	  children(rev->children), parent(rev->parent),
+	  by_attr(rev->by_attr)
 {
-	for (std::map<xorn_object_t, obstate *>::const_iterator i
-		     = obstates.begin(); i != obstates.end(); ++i)
-		i->second->inc_refcnt();
-}
-
-xorn_revision::~xorn_revision()
-{
-	for (std::map<xorn_object_t, obstate *>::const_iterator i
-		     = obstates.begin(); i != obstates.end(); ++i)
-		i->second->dec_refcnt();
 }
 
 
@@ -50,6 +41,10 @@ xorn_revision::~xorn_revision()
  * and copying an empty one: only in the second case, objects of one
  * revision will be valid in the other.
  *
+ * Copying a revision takes constant time.  The copy shares its
+ * memory with the original; changing either of them only allocates
+ * memory for the changed parts.
+ *
  * \return Returns the newly created revision, or NULL if there is not
  *         enough memory.  */
 
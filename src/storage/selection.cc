@@ -41,7 +41,7 @@ xorn_selection_t xorn_select_object(xorn_object_t ob)
 		return NULL;
 	}
 	try {
-		rsel->insert(ob);
+		rsel->push_back(ob);
 	} catch (std::bad_alloc const &) {
 		delete rsel;
 		return NULL;
@@ -60,7 +60,7 @@ xorn_selection_t xorn_select_object(xorn_object_t ob)
 
 xorn_selection_t xorn_select_attached_to(xorn_revision_t rev, xorn_object_t ob)
 {
-	if (ob != NULL && rev->obstates.find(ob) == rev->obstates.end())
+	if (ob != NULL && rev->obstates.find(ob) == NULL)
 		return NULL;
 
 	xorn_selection_t rsel;
@@ -70,18 +70,21 @@ xorn_selection_t xorn_select_attached_to(xorn_revision_t rev, xorn_object_t ob)
 		return NULL;
 	}
 
-	std::map<xorn_object_t, std::vector<xorn_object_t> >::const_iterator i
-		= rev->children.find(ob);
-	if (i == rev->children.end())
+	sibling_map const *children = rev->children.find(ob);
+	if (children == NULL)
 		return rsel;
 
 	try {
-		copy(i->second.begin(), i->second.end(),
-		     inserter(*rsel, rsel->begin()));
+		rsel->reserve(children->size());
+		for (sibling_map::const_iterator i = children->begin();
+		     i != children->end(); ++i)
+			rsel->push_back(i->second);
 	} catch (std::bad_alloc const &) {
 		delete rsel;
 		return NULL;
 	}
+	/* children are ordered by their position, not by object */
+	sort(rsel->begin(), rsel->end());
 	return rsel;
 }
 
@@ -96,9 +99,10 @@ xorn_selection_t xorn_select_all(xorn_revision_t rev)
 		return NULL;
 	}
 	try {
+		rsel->reserve(rev->obstates.size());
 		copy(iterate_keys(rev->obstates.begin()),
 		     iterate_keys(rev->obstates.end()),
-		     inserter(*rsel, rsel->begin()));
+		     back_inserter(*rsel));
 	} catch (std::bad_alloc const &) {
 		delete rsel;
 		return NULL;
@@ -119,10 +123,11 @@ xorn_selection_t xorn_select_all_except(
 		return NULL;
 	}
 	try {
+		rsel->reserve(rev->obstates.size());
 		set_difference(iterate_keys(rev->obstates.begin()),
 			       iterate_keys(rev->obstates.end()),
 			       sel->begin(), sel->end(),
-			       inserter(*rsel, rsel->begin()));
+			       back_inserter(*rsel));
 	} catch (std::bad_alloc const &) {
 		delete rsel;
 		return NULL;
@@ -142,7 +147,10 @@ xorn_selection_t xorn_select_including(xorn_selection_t sel, xorn_object_t ob)
 		return NULL;
 	}
 	try {
-		rsel->insert(ob);
+		xorn_selection::iterator i = lower_bound(
+			rsel->begin(), rsel->end(), ob);
+		if (i == rsel->end() || *i != ob)
+			rsel->insert(i, ob);
 	} catch (std::bad_alloc const &) {
 		delete rsel;
 		return NULL;
@@ -162,8 +170,9 @@ xorn_selection_t xorn_select_excluding(xorn_selection_t sel, xorn_object_t ob)
 		return NULL;
 	}
 	try {
-		xorn_selection::const_iterator i = rsel->find(ob);
-		if (i != rsel->end())
+		xorn_selection::iterator i = lower_bound(
+			rsel->begin(), rsel->end(), ob);
+		if (i != rsel->end() && *i == ob)
 			rsel->erase(i);
 	} catch (std::bad_alloc const &) {
 		delete rsel;
@@ -185,9 +194,10 @@ xorn_selection_t xorn_select_union(
 		return NULL;
 	}
 	try {
+		rsel->reserve(sel0->size() + sel1->size());
 		set_union(sel0->begin(), sel0->end(),
 			  sel1->begin(), sel1->end(),
-			  inserter(*rsel, rsel->begin()));
+			  back_inserter(*rsel));
 	} catch (std::bad_alloc const &) {
 		delete rsel;
 		return NULL;
@@ -208,9 +218,10 @@ xorn_selection_t xorn_select_intersection(
 		return NULL;
 	}
 	try {
+		rsel->reserve(std::min(sel0->size(), sel1->size()));
 		set_intersection(sel0->begin(), sel0->end(),
 				 sel1->begin(), sel1->end(),
-				 inserter(*rsel, rsel->begin()));
+				 back_inserter(*rsel));
 	} catch (std::bad_alloc const &) {
 		delete rsel;
 		return NULL;
@@ -231,9 +242,10 @@ xorn_selection_t xorn_select_difference(
 		return NULL;
 	}
 	try {
+		rsel->reserve(sel0->size());
 		set_difference(sel0->begin(), sel0->end(),
 			       sel1->begin(), sel1->end(),
-			       inserter(*rsel, rsel->begin()));
+			       back_inserter(*rsel));
 	} catch (std::bad_alloc const &) {
 		delete rsel;
 		return NULL;
@@ -245,9 +257,9 @@ xorn_selection_t xorn_select_difference(
 
 bool xorn_selection_is_empty(xorn_revision_t rev, xorn_selection_t sel)
 {
-	std::map<xorn_object_t, obstate *>::const_iterator i
+	pmap<xorn_object_t, obstate *>::const_iterator i
 		= rev->obstates.begin();
-	std::set<xorn_object_t>::const_iterator j = sel->begin();
+	xorn_selection::const_iterator j = sel->begin();
 
 	while (i != rev->obstates.end() && j != sel->end())
 		if (i->first < *j)
@@ -266,8 +278,8 @@ bool xorn_selection_is_empty(xorn_revision_t rev, xorn_selection_t sel)
 bool xorn_object_is_selected(
 	xorn_revision_t rev, xorn_selection_t sel, xorn_object_t ob)
 {
-	return rev->obstates.find(ob) != rev->obstates.end() &&
-	       sel->find(ob) != sel->end();
+	return rev->obstates.find(ob) != NULL &&
+	       binary_search(sel->begin(), sel->end(), ob);
 }
 
 /** \brief Free the memory used for storing a selection.
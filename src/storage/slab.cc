@@ -0,0 +1,135 @@
+/* Copyright (C) 2013-2021 Roland Lutz
+
+   This program is free software; you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation; either version 2 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program; if not, write to the Free Software Foundation,
+   Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
+
+#include "slab.h"
+#include <stdlib.h>
+#include <new>
+
+/* Small blocks of the same size are carved out of larger chunks of
+   memory ("slabs") instead of being allocated individually, which
+   avoids the per-allocation overhead of malloc and keeps the nodes
+   of a map close together.  Freed blocks are put on a free list and
+   reused for the next allocation of the same size; slabs are never
+   returned to the system.
+
+   There is one pool per block size.  Since the library only uses a
+   handful of different sizes, pools are looked up linearly.  Blocks
+   which are too large, or of a size for which there is no pool left,
+   are allocated with malloc.
+
+   Like the rest of the library, this isn't thread-safe.  */
+
+#define SLAB_SIZE 65536
+#define MAX_BLOCK_SIZE (SLAB_SIZE / 16)
+#define MAX_POOLS 32
+
+struct free_block {
+	free_block *next;
+};
+
+struct pool {
+	size_t block_size;
+	free_block *free_list;
+	char *next, *end;	/* unused part of the current slab */
+	size_t slab_count;
+	size_t used_count;
+};
+
+static pool pools[MAX_POOLS];
+static unsigned int pool_count = 0;
+
+static size_t block_size(size_t size)
+{
+	if (size < sizeof(free_block))
+		size = sizeof(free_block);
+	return (size + sizeof(max_align) - 1)
+		/ sizeof(max_align) * sizeof(max_align);
+}
+
+static pool *find_pool(size_t size)
+{
+	for (unsigned int i = 0; i < pool_count; i++)
+		if (pools[i].block_size == size)
+			return &pools[i];
+
+	if (size > MAX_BLOCK_SIZE || pool_count == MAX_POOLS)
+		return NULL;
+
+	pool *p = &pools[pool_count++];
+	p->block_size = size;
+	return p;
+}
+
+void *slab_alloc(size_t size)
+{
+	size = block_size(size);
+	pool *p = find_pool(size);
+	void *ptr;
+
+	if (p == NULL) {
+		ptr = malloc(size);
+		if (ptr == NULL)
+			throw std::bad_alloc();
+		return ptr;
+	}
+
+	if (p->free_list != NULL) {
+		ptr = p->free_list;
+		p->free_list = p->free_list->next;
+	} else {
+		if (p->next == p->end) {
+			char *slab = (char *)malloc(SLAB_SIZE);
+			if (slab == NULL)
+				throw std::bad_alloc();
+			p->next = slab;
+			p->end = slab + SLAB_SIZE / size * size;
+			p->slab_count++;
+		}
+		ptr = p->next;
+		p->next += size;
+	}
+	p->used_count++;
+	return ptr;
+}
+
+void slab_free(void *ptr, size_t size)
+{
+	size = block_size(size);
+	pool *p = find_pool(size);
+
+	if (p == NULL) {
+		free(ptr);
+		return;
+	}
+
+	free_block *b = (free_block *)ptr;
+	b->next = p->free_list;
+	p->free_list = b;
+	p->used_count--;
+}
+
+void slab_usage(size_t *reserved_return, size_t *used_return)
+{
+	size_t reserved = 0, used = 0;
+
+	for (unsigned int i = 0; i < pool_count; i++) {
+		reserved += pools[i].slab_count * SLAB_SIZE;
+		used += pools[i].used_count * pools[i].block_size;
+	}
+
+	*reserved_return = reserved;
+	*used_return = used;
+}
@@ -0,0 +1,41 @@
+/* Copyright (C) 2013-2021 Roland Lutz
+
+   This program is free software; you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation; either version 2 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program; if not, write to the Free Software Foundation,
+   Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
+
+#ifndef SLAB_H
+#define SLAB_H
+
+#include <stddef.h>
+
+/* Blocks are aligned to the size of this union.  */
+union max_align {
+	double d;
+	void *p;
+	size_t n;
+};
+
+/* Allocate a block of memory of a given size from a slab (see
+   slab.cc).  Throws std::bad_alloc if there is not enough memory.  */
+void *slab_alloc(size_t size);
+
+/* Return a block allocated by slab_alloc.  size must be the size
+   which has been passed to slab_alloc.  */
+void slab_free(void *p, size_t size);
+
+/* Return the number of bytes reserved for slabs and the number of
+   bytes in blocks which are currently allocated.  */
+void slab_usage(size_t *reserved_return, size_t *used_return);
+
+#endif
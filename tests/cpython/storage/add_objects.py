@@ -0,0 +1,69 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+
+import xorn.storage
+
+def add_objects_fails(rev, items, exception):
+    try:
+        rev.add_objects(items)
+    except exception:
+        return True
+    else:
+        return False
+
+rev = xorn.storage.Revision()
+net_data = xorn.storage.Net()
+component_data = xorn.storage.Component()
+text_data = xorn.storage.Text(text = 'refdes=R1')
+
+assert rev.add_objects([]) == []
+assert rev.get_objects() == []
+
+assert add_objects_fails(rev, None, TypeError)
+assert add_objects_fails(rev, [net_data], TypeError)
+assert add_objects_fails(rev, [(net_data,)], TypeError)
+assert add_objects_fails(rev, [(None, None)], TypeError)
+assert add_objects_fails(rev, [(net_data, 'foo')], TypeError)
+assert add_objects_fails(rev, [(net_data, 0)], IndexError)
+assert add_objects_fails(rev, [(net_data, None), (text_data, 1)], IndexError)
+assert add_objects_fails(rev, [(net_data, None), (text_data, -1)], IndexError)
+assert add_objects_fails(rev, [(net_data, None),
+                               (component_data, 0)], ValueError)
+assert add_objects_fails(rev, [(text_data, None), (text_data, 0)], ValueError)
+assert add_objects_fails(rev, [(net_data, None),
+                               (xorn.storage.Text(color = 21), 0)],
+                         ValueError)
+assert rev.get_objects() == []
+
+obs = rev.add_objects([(net_data, None),
+                       (component_data, None),
+                       (text_data, 1),
+                       (text_data, 0)])
+assert len(obs) == 4
+assert rev.get_objects() == [obs[0], obs[3], obs[1], obs[2]]
+assert rev.get_object_location(obs[0]) == (None, 0)
+assert rev.get_object_location(obs[1]) == (None, 1)
+assert rev.get_object_location(obs[2]) == (obs[1], 0)
+assert rev.get_object_location(obs[3]) == (obs[0], 0)
+assert rev.get_object_data(obs[2]).text == 'refdes=R1'
+
+# objects are appended after existing ones
+more = rev.add_objects(items = [(net_data, None)])
+assert rev.get_objects() == [obs[0], obs[3], obs[1], obs[2], more[0]]
+
+rev.finalize()
+assert add_objects_fails(rev, [(net_data, None)], ValueError)
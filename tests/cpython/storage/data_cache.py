@@ -0,0 +1,81 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import xorn.storage
+
+rev0 = xorn.storage.Revision()
+line = rev0.add_object(xorn.storage.Line(
+    x = 1, y = 2, width = 3, height = 4, color = 5,
+    line = xorn.storage.LineAttr(width = 1)))
+text = rev0.add_object(xorn.storage.Text(text = 'foo=bar'))
+rev0.finalize()
+
+# data objects which aren't referenced elsewhere are reused
+
+i = id(rev0.get_object_data(line))
+assert id(rev0.get_object_data(line)) == i
+
+rev1 = xorn.storage.Revision(rev0)
+rev1.finalize()
+assert id(rev1.get_object_data(line)) == i
+
+# ...but not while they are in use
+
+data0 = rev0.get_object_data(line)
+data1 = rev0.get_object_data(line)
+assert data0 is not data1
+del data0, data1
+
+# changing a data object doesn't affect subsequent calls
+
+data = rev0.get_object_data(line)
+data.x = 10
+del data
+assert rev0.get_object_data(line).x == 1
+
+data = rev0.get_object_data(line)
+data.line.width = 10
+del data
+assert rev0.get_object_data(line).line.width == 1
+
+data = rev0.get_object_data(line)
+lineattr = data.line
+del data
+data = rev0.get_object_data(line)
+assert data.line is not lineattr
+lineattr.width = 20
+assert data.line.width == 1
+del data, lineattr
+
+data = rev0.get_object_data(text)
+data.text = 'foo=baz'
+del data
+assert rev0.get_object_data(text).text == 'foo=bar'
+
+data = rev0.get_object_data(text)
+rev2 = xorn.storage.Revision(rev0)
+rev2.set_object_data(text, data)
+del data
+assert rev0.get_object_data(text).text == 'foo=bar'
+assert rev2.get_object_data(text).text == 'foo=bar'
+
+# transient revisions always return new objects
+
+rev3 = xorn.storage.Revision(rev0)
+data = rev3.get_object_data(line)
+data.color = 7
+del data
+assert rev3.get_object_data(line).color == 5
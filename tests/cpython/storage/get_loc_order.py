@@ -63,3 +63,20 @@ assert object_location_fails(rev4, ob0)
 assert rev4.get_object_location(ob1a) == (None, 1)
 assert rev4.get_object_location(ob1b) == (None, 0)
 assert rev4.get_object_location(ob2) == (None, 2)
+
+def object_locations_fail(rev, obs, exc_type):
+    try:
+        rev.get_object_locations(obs)
+    except exc_type:
+        return True
+    else:
+        return False
+
+assert rev4.get_object_locations([]) == []
+assert rev4.get_object_locations([ob2, ob1b, ob1a, ob2]) == [
+    (None, 2), (None, 0), (None, 1), (None, 2)]
+assert rev4.get_object_locations((ob1a, )) == [(None, 1)]
+
+assert object_locations_fail(rev4, [ob1a, ob0], KeyError)
+assert object_locations_fail(rev4, [ob1a, None], TypeError)
+assert object_locations_fail(rev4, None, TypeError)
@@ -0,0 +1,57 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import xorn.storage, Setup
+
+def get_objects_with_data_fails(rev, type):
+    try:
+        rev.get_objects_with_data(type)
+    except TypeError:
+        return True
+    else:
+        return False
+
+rev0, rev1, rev2, rev3, ob0, ob1a, ob1b = Setup.setup()
+
+assert rev0.get_objects_with_data() == []
+assert rev2.get_objects_with_data(xorn.storage.Net) == []
+
+result = rev2.get_objects_with_data()
+assert [ob for ob, data, attached_to, pos in result] == [ob0, ob1a, ob1b]
+assert [type(data) for ob, data, attached_to, pos in result] == [
+    xorn.storage.Line, xorn.storage.Box, xorn.storage.Circle]
+assert [(attached_to, pos) for ob, data, attached_to, pos in result] == [
+    (None, 0), (None, 1), (None, 2)]
+assert result[1][1].x == 1
+assert result[1][1].width == 2
+
+rev4 = xorn.storage.Revision(rev3)
+net = rev4.add_object(xorn.storage.Net())
+text = rev4.add_object(xorn.storage.Text(text = 'foo=bar'))
+rev4.relocate_object(text, net, None)
+
+assert [(ob, data.text, attached_to, pos) for ob, data, attached_to, pos in
+        rev4.get_objects_with_data(type = xorn.storage.Text)] == [
+    (text, 'foo=bar', net, 0)]
+assert [ob for ob, data, attached_to, pos in
+        rev4.get_objects_with_data()] == [ob0, ob1b, net, text]
+assert [ob for ob, data, attached_to, pos in
+        rev4.get_objects_with_data(None)] == [ob0, ob1b, net, text]
+assert [ob for ob, data, attached_to, pos in
+        rev4.get_objects_with_data(xorn.storage.Circle)] == [ob1b]
+
+assert get_objects_with_data_fails(rev4, xorn.storage.LineAttr)
+assert get_objects_with_data_fails(rev4, 'Text')
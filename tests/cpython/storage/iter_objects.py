@@ -0,0 +1,72 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import xorn.storage, Setup
+
+rev0, rev1, rev2, rev3, ob0, ob1a, ob1b = Setup.setup()
+
+assert list(rev0.iter_objects()) == []
+assert list(rev1.iter_objects()) == [ob0]
+assert list(rev2.iter_objects()) == [ob0, ob1a, ob1b]
+assert list(rev3.iter_objects()) == [ob0, ob1b]
+
+i = rev2.iter_objects()
+assert iter(i) is i
+assert next(i) == ob0
+assert next(i) == ob1a
+assert next(i) == ob1b
+assert next(i, None) is None
+assert next(i, None) is None
+
+# attached objects follow the object they are attached to
+
+rev4 = xorn.storage.Revision(rev3)
+net = rev4.add_object(xorn.storage.Net())
+text0 = rev4.add_object(xorn.storage.Text())
+text1 = rev4.add_object(xorn.storage.Text())
+rev4.relocate_object(text0, net, None)
+rev4.relocate_object(net, None, ob1b)
+
+assert list(rev4.iter_objects()) == rev4.get_objects()
+assert list(rev4.iter_objects()) == [ob0, net, text0, ob1b, text1]
+
+# the iterator keeps the revision alive
+
+i = xorn.storage.Revision(rev4).iter_objects()
+assert list(i) == [ob0, net, text0, ob1b, text1]
+
+# changing the revision during iteration
+
+i = rev4.iter_objects()
+assert next(i) == ob0
+rev4.delete_object(text1)
+assert next(i) == net
+rev4.relocate_object(ob0, None, None)
+assert next(i) == text0
+assert next(i) == ob1b
+assert next(i) == ob0
+assert next(i, None) is None
+
+i = rev4.iter_objects()
+assert next(i) == net
+rev4.delete_object(net)
+try:
+    next(i)
+except RuntimeError:
+    pass
+else:
+    raise AssertionError
+assert next(i, None) is None
@@ -0,0 +1,42 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import xorn.storage
+
+usage0 = xorn.storage.get_memory_usage()
+assert sorted(usage0) == ['objects', 'reserved', 'strings', 'used']
+assert usage0['used'] <= usage0['reserved']
+
+rev = xorn.storage.Revision()
+for i in xrange(1000):
+    rev.add_object(xorn.storage.Net(x = i))
+    rev.add_object(xorn.storage.Text(x = i, text = 'pinseq=1'))
+
+usage1 = xorn.storage.get_memory_usage()
+assert usage1['objects'] == usage0['objects'] + 2000
+assert usage1['strings'] >= usage0['strings'] + 8
+assert usage0['used'] < usage1['used'] <= usage1['reserved']
+
+# copies share their contents with the original
+rev1 = xorn.storage.Revision(rev)
+assert xorn.storage.get_memory_usage() == usage1
+
+del rev, rev1
+usage2 = xorn.storage.get_memory_usage()
+assert usage2['objects'] == usage0['objects']
+assert usage2['strings'] == usage0['strings']
+assert usage2['used'] == usage0['used']
+assert usage2['reserved'] == usage1['reserved']
@@ -41,6 +41,7 @@ mod_attrs = {
     'get_added_objects': types.BuiltinMethodType,
     'get_removed_objects': types.BuiltinMethodType,
     'get_modified_objects': types.BuiltinMethodType,
+    'get_memory_usage': types.BuiltinMethodType,
 
     'select_none': types.BuiltinMethodType,
     'select_object': types.BuiltinMethodType,
@@ -82,11 +83,15 @@ assert_attributes(xorn.storage.Revision(), {
         'transient': bool,
 
         'get_objects': types.BuiltinMethodType,
+        'get_objects_with_data': types.BuiltinMethodType,
+        'iter_objects': types.BuiltinMethodType,
         'object_exists': types.BuiltinMethodType,
         'get_object_data': types.BuiltinMethodType,
         'get_object_location': types.BuiltinMethodType,
+        'get_object_locations': types.BuiltinMethodType,
 
         'add_object': types.BuiltinMethodType,
+        'add_objects': types.BuiltinMethodType,
         'set_object_data': types.BuiltinMethodType,
         'relocate_object': types.BuiltinMethodType,
         'copy_object': types.BuiltinMethodType,
@@ -33,3 +33,8 @@ text_return = rev1.get_object_data(ob)
 assert type(text_return) == xorn.storage.Text
 assert text_return != text_data
 assert text_return.text == "Hello world"
+
+# equal strings are returned as the same object
+rev2 = xorn.storage.Revision(rev1)
+ob1 = rev2.add_object(xorn.storage.Text(text = ''.join(["Hello ", "world"])))
+assert rev2.get_object_data(ob1).text is rev2.get_object_data(ob).text
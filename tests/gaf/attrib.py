@@ -235,3 +235,36 @@ assert throws(GA.find_pins_by_attribute, net, 'foo3', 'bar3') == ValueError
 assert throws(GA.find_pins_by_attribute, pin, 'foo3', 'bar3') == ValueError
 assert throws(GA.find_pins_by_attribute,
               nonexisting, 'foo3', 'bar3') == KeyError
+
+# searching finalized revisions
+
+srev.finalize()
+rev.finalize()
+
+for i in xrange(2):
+    assert GA.search_floating(rev, 'foo0') == ['bar0', 'baz0']
+    assert GA.search_floating(srev, 'foo3') == ['bar3', 'baz3']
+    assert GA.search_attached(net, 'foo1') == ['bar1', 'baz1']
+    assert GA.search_attached(ob00, 'foo0') == []
+    assert GA.search_inherited(component, 'foo3') == ['bar3', 'baz3']
+    assert GA.search_all(component, 'foo2') == ['bar2', 'baz2']
+    assert GA.search_all(component, 'foo3') == ['bar3', 'baz3']
+
+    assert throws(GA.search_attached, nonexisting, 'foo0') == KeyError
+    assert throws(GA.search_inherited, net, 'foo0') == ValueError
+    assert throws(GA.search_all, nonexisting, 'foo0') == KeyError
+
+    # changing the result doesn't affect later searches
+    GA.search_attached(net, 'foo1').append('qux1')
+    GA.search_floating(srev, 'foo3').append('qux3')
+
+assert rev.rev in GA._indices
+
+# the index doesn't keep the revision alive
+rev = xorn.proxy.RevisionProxy(xorn.storage.Revision())
+ob = rev.add_object(xorn.storage.Text(text = 'foo5=bar5'))
+rev.finalize()
+assert GA.search_floating(rev, 'foo5') == ['bar5']
+count = len(GA._indices)
+del rev, ob
+assert len(GA._indices) == count - 1
@@ -0,0 +1,85 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import fnmatch, StringIO, sys
+import gaf.clib
+
+class MockupSource:
+    def __init__(self, symbols):
+        self.symbols = symbols
+
+    def list(self):
+        return self.symbols
+
+    def get(self, symbol):
+        raise ValueError
+
+SYMBOLS0 = ['7400-1.sym', 'a.sym', 'ab.sym', 'abc.sym', 'b?.sym', 'b[1].sym',
+            'ba.sym', 'resistor-1.sym', 'resistor-2.sym', 'dup.sym', 'dup.sym']
+SYMBOLS1 = ['a.sym', 'abd.sym', 'capacitor-1.sym', 'resistor-1.sym']
+
+source0 = MockupSource(SYMBOLS0)
+source1 = MockupSource(SYMBOLS1)
+
+stderr = sys.stderr
+sys.stderr = StringIO.StringIO()
+try:
+    gaf.clib.add_source(source0, 'source0')
+    gaf.clib.add_source(source1, 'source1')
+    assert sys.stderr.getvalue() == \
+        'Library "source0" contains symbols with conflicting names:\n' \
+        '\tdup.sym\n'
+finally:
+    sys.stderr = stderr
+
+src0 = gaf.clib.lookup_source('source0')
+src1 = gaf.clib.lookup_source('source1')
+
+assert gaf.clib._glob_prefix('*') == ''
+assert gaf.clib._glob_prefix('ab*') == 'ab'
+assert gaf.clib._glob_prefix('b[1]*') == 'b'
+assert gaf.clib._glob_prefix('b?.sym') == 'b'
+assert gaf.clib._glob_prefix('a.sym') == 'a.sym'
+
+# glob searches return the same as fnmatch over the whole list
+
+for pattern in ['*', '*.sym', 'a*', 'ab*', 'abc.sym', 'a?.sym', 'a[bc]*',
+                'b[[]*', 'b[?]*', 'b?.sym', '[ab]*', 'resistor-*',
+                'resistor-[2-9].sym', 'zzz*', 'dup*', '', 'a']:
+    expected = \
+        [(src1, symbol) for symbol in fnmatch.filter(sorted(SYMBOLS1),
+                                                     pattern)] + \
+        [(src0, symbol) for symbol in fnmatch.filter(sorted(SYMBOLS0),
+                                                     pattern)]
+    assert gaf.clib.search(pattern, True) == expected
+    # again, from the cache
+    assert gaf.clib.search(pattern, True) == expected
+
+# exact searches use the symbol counts
+
+assert gaf.clib.search('a.sym') == [(src1, 'a.sym'), (src0, 'a.sym')]
+assert gaf.clib.search('abd.sym') == [(src1, 'abd.sym')]
+assert gaf.clib.search('a*') == []
+assert gaf.clib.search('missing.sym') == []
+assert src0.symbol_counts['dup.sym'] == 2
+assert src0.symbol_counts['a.sym'] == 1
+
+try:
+    gaf.clib.search('dup.sym')
+except gaf.clib.DuplicateError:
+    pass
+else:
+    raise AssertionError
@@ -0,0 +1,164 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import os, shutil, StringIO, sys, tempfile, time
+import gaf.clib
+
+COMMON = """import os, sys
+def symbol_data(name):
+    return 'v 20140308 2\\nB %d 0 100 100 3 0 0 0 -1 -1 0 -1 -1 -1 -1 -1\\n' \\
+        % int(name[1:-4])
+"""
+
+LIST_PY = COMMON + """
+for i in range(5):
+    sys.stdout.write('s%d.sym\\n' % i)
+"""
+
+GET_PY = COMMON + """
+open(os.path.join(os.path.dirname(sys.argv[0]), 'get.log'), 'a').write('x')
+sys.stdout.write(symbol_data(sys.argv[1]))
+"""
+
+SERVER_PY = COMMON + """
+open(os.path.join(os.path.dirname(sys.argv[0]), 'server.log'), 'a').write('x')
+while True:
+    line = sys.stdin.readline()
+    if not line:
+        break
+    name = line[:-1]
+    if name == 's4.sym':
+        sys.stdout.write('ERROR no such symbol\\n')
+    else:
+        data = symbol_data(name)
+        sys.stdout.write('OK %d\\n%s' % (len(data), data))
+    sys.stdout.flush()
+"""
+
+BROKEN_SERVER_PY = """import sys
+sys.stdin.readline()
+sys.stdout.write('garbage\\n')
+"""
+
+SLOW_SERVER_PY = """import sys, time
+sys.stdin.readline()
+time.sleep(10)
+"""
+
+STUBBORN_SERVER_PY = COMMON + """
+import time
+while True:
+    line = sys.stdin.readline()
+    if not line:
+        break
+    data = symbol_data(line[:-1])
+    sys.stdout.write('OK %d\\n%s' % (len(data), data))
+    sys.stdout.flush()
+# don't exit when standard input is closed
+time.sleep(10)
+"""
+
+tmpdir = tempfile.mkdtemp()
+
+def script(name, code):
+    path = os.path.join(tmpdir, name)
+    f = open(path, 'w')
+    try:
+        f.write(code)
+    finally:
+        f.close()
+    return '%s %s' % (sys.executable, path)
+
+def count(name):
+    path = os.path.join(tmpdir, name)
+    if not os.path.exists(path):
+        return 0
+    return len(open(path).read())
+
+def get_x(source, symbol):
+    rev = source.get(symbol)
+    ob, = rev.toplevel_objects()
+    return ob.data().x
+
+try:
+    list_cmd = script('list.py', LIST_PY)
+    get_cmd = script('get.py', GET_PY)
+
+    # without a server, the get command is run once per symbol
+
+    source = gaf.clib.CommandSource(list_cmd, get_cmd)
+    assert list(source.list()) == ['s%d.sym' % i for i in xrange(5)]
+    assert get_x(source, 's1.sym') == 1
+    assert get_x(source, 's2.sym') == 2
+    assert count('get.log') == 2
+
+    # symbol servers are kept running between requests
+
+    source = gaf.clib.CommandSource(
+        list_cmd, get_cmd, script('server.py', SERVER_PY), pool_size = 2)
+    gaf.clib.add_source(source, 'server')
+    gaf.clib.preload_symbols(['s0.sym', 's1.sym', 's2.sym', 's3.sym'])
+    for i in xrange(4):
+        assert get_x(source, 's%d.sym' % i) == i
+        assert gaf.clib.lookup_symbol('s%d.sym' % i).prim_objs is not None
+    assert 1 <= count('server.log') <= 2
+    assert count('get.log') == 2
+
+    # errors reported by the server don't cause a fallback
+    try:
+        source.get('s4.sym')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError
+    assert get_x(source, 's0.sym') == 0
+    assert count('get.log') == 2
+    gaf.clib.reset()
+    assert source._server_count == 0
+
+    # a failing server is replaced by the get command
+
+    stderr = sys.stderr
+    for server_cmd, timeout in [
+            (script('broken.py', BROKEN_SERVER_PY), 30.),
+            (script('slow.py', SLOW_SERVER_PY), .2),
+            (os.path.join(tmpdir, 'nonexistent'), 30.)]:
+        source = gaf.clib.CommandSource(
+            list_cmd, get_cmd, server_cmd, timeout = timeout)
+        sys.stderr = StringIO.StringIO()
+        try:
+            before = count('get.log')
+            assert get_x(source, 's3.sym') == 3
+            assert get_x(source, 's4.sym') == 4
+            assert count('get.log') == before + 2
+            assert sys.stderr.getvalue().startswith('Library server failed')
+        finally:
+            sys.stderr = stderr
+        source.close()
+
+    # a server which doesn't exit is killed after the timeout
+
+    source = gaf.clib.CommandSource(
+        list_cmd, get_cmd, script('stubborn.py', STUBBORN_SERVER_PY),
+        timeout = .2)
+    gaf.clib.add_source(source, 'stubborn')
+    assert get_x(source, 's2.sym') == 2
+    start = time.time()
+    gaf.clib.reset()
+    assert time.time() - start < 5
+    assert source._server_count == 0
+finally:
+    shutil.rmtree(tmpdir)
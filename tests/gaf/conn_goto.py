@@ -0,0 +1,82 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import random
+import xorn.proxy
+import xorn.storage
+import gaf.netlist.conn
+
+# Check that updating a connection map incrementally yields the same
+# connections as building it from scratch.  The nets are placed on a
+# small grid so that plenty of T-junctions and shared endpoints occur.
+
+def random_net():
+    x = random.randint(0, 8) * 100
+    y = random.randint(0, 8) * 100
+    length = random.choice([-3, -2, -1, 1, 2, 3]) * 100
+    if random.randint(0, 1):
+        return xorn.storage.Net(x = x, y = y, width = length,
+                                is_pin = random.randint(0, 7) == 0)
+    else:
+        return xorn.storage.Net(x = x, y = y, height = length,
+                                is_pin = random.randint(0, 7) == 0)
+
+def normalize(d):
+    result = {}
+    for (path, ob), conns in d.iteritems():
+        key = tuple(component.ob for component in path), ob.ob
+        assert key not in result
+        result[key] = set(
+            conn._replace(
+                path0 = tuple(component.ob for component in conn.path0),
+                ob0 = conn.ob0.ob,
+                path1 = tuple(component.ob for component in conn.path1),
+                ob1 = conn.ob1.ob)
+            for conn in conns)
+        assert len(result[key]) == len(conns)
+    return result
+
+def check(cmap, rev):
+    fresh = gaf.netlist.conn.ConnectionMap(rev)
+    assert normalize(cmap.connection_dict) == \
+        normalize(fresh.connection_dict)
+    assert normalize(cmap.incoming_dict) == normalize(fresh.incoming_dict)
+
+random.seed(0)
+
+rev = xorn.storage.Revision()
+obs = [rev.add_object(random_net()) for i in xrange(20)]
+rev.finalize()
+cmap = gaf.netlist.conn.ConnectionMap(xorn.proxy.RevisionProxy(rev))
+check(cmap, xorn.proxy.RevisionProxy(rev))
+
+for i in xrange(200):
+    rev = xorn.storage.Revision(rev)
+    for j in xrange(random.randint(1, 3)):
+        action = random.randint(0, 2)
+        if action == 0 or len(obs) < 5:
+            obs.append(rev.add_object(random_net()))
+        elif action == 1:
+            rev.set_object_data(random.choice(obs), random_net())
+        else:
+            ob = random.choice(obs)
+            rev.delete_object(ob)
+            obs.remove(ob)
+    rev.finalize()
+
+    proxy = xorn.proxy.RevisionProxy(rev)
+    cmap.goto(proxy)
+    check(cmap, proxy)
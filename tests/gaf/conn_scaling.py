@@ -0,0 +1,60 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import time
+import xorn.proxy
+import xorn.storage
+import gaf.netlist.conn
+
+# Building a connection map and updating it after a small change
+# should take roughly linear time in the number of collinear segments
+# (e.g., a long daisy-chained net), not quadratic time.
+
+def measure(count):
+    rev = xorn.storage.Revision()
+    for i in xrange(count):
+        rev.add_object(xorn.storage.Net(x = i * 100, y = 0, width = 100))
+    rev.finalize()
+
+    start = time.time()
+    cmap = gaf.netlist.conn.ConnectionMap(xorn.proxy.RevisionProxy(rev))
+    build_time = time.time() - start
+
+    # a segment with two endpoints of the chain inside it
+    rev = xorn.storage.Revision(rev)
+    rev.add_object(xorn.storage.Net(x = count * 50 + 50, y = 0, width = 200))
+    rev.finalize()
+
+    start = time.time()
+    cmap.goto(xorn.proxy.RevisionProxy(rev))
+    update_time = time.time() - start
+
+    # both of its endpoints are on chain segments, and four chain
+    # segments end inside it
+    assert len(cmap.connection_dict[
+        (), xorn.proxy.ObjectProxy(rev, rev.get_objects()[-1])]) == 6
+    return build_time, update_time
+
+def best_of_three(count):
+    results = [measure(count) for i in xrange(3)]
+    return min(r[0] for r in results), min(r[1] for r in results)
+
+small_build, small_update = best_of_three(2000)
+large_build, large_update = best_of_three(8000)
+
+# four times as many segments: linear would be 4x, quadratic 16x
+assert large_build < small_build * 8
+assert large_update < max(small_update, .01) * 8
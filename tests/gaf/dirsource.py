@@ -0,0 +1,80 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import os, shutil, tempfile
+import xorn.storage
+import gaf.clib
+
+def write_symbol(path, x):
+    f = open(path, 'w')
+    try:
+        f.write('v 20150930 2\nL %d 0 100 0 3 0 0 0 -1 -1\n' % x)
+    finally:
+        f.close()
+
+def get_x(source, symbol):
+    ob, = source.get(symbol).all_objects()
+    return ob.data().x
+
+def walk_list(directory):
+    return [entry for dirpath, dirnames, filenames
+                in sorted(os.walk(directory))
+            for entry in sorted(filenames)
+            if entry[0] != '.' and gaf.clib.sym_filename_filter(entry)]
+
+tmpdir = tempfile.mkdtemp()
+try:
+    os.makedirs(os.path.join(tmpdir, 'b', 'c'))
+    os.mkdir(os.path.join(tmpdir, 'a'))
+    write_symbol(os.path.join(tmpdir, 'b', 'c', 'foo.sym'), 1)
+    write_symbol(os.path.join(tmpdir, 'b', 'foo.sym'), 2)
+    write_symbol(os.path.join(tmpdir, 'b', 'bar.sym'), 3)
+    write_symbol(os.path.join(tmpdir, 'b', '.hidden.sym'), 4)
+    write_symbol(os.path.join(tmpdir, 'a', 'baz.txt'), 5)
+
+    source = gaf.clib.DirectorySource(tmpdir, True)
+
+    # get() works before the first list()
+    assert get_x(source, 'foo.sym') == 2
+
+    assert list(source.list()) == walk_list(tmpdir)
+    assert get_x(source, 'bar.sym') == 3
+    try:
+        source.get('qux.sym')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError
+
+    # changes to the tree are picked up by list() and get()
+    write_symbol(os.path.join(tmpdir, 'a', 'foo.sym'), 6)
+    write_symbol(os.path.join(tmpdir, 'b', 'c', 'qux.sym'), 7)
+    os.unlink(os.path.join(tmpdir, 'b', 'bar.sym'))
+    assert get_x(source, 'qux.sym') == 7
+    assert list(source.list()) == walk_list(tmpdir)
+    assert get_x(source, 'foo.sym') == 6
+    try:
+        source.get('bar.sym')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError
+
+    shutil.rmtree(os.path.join(tmpdir, 'a'))
+    assert get_x(source, 'foo.sym') == 2
+    assert list(source.list()) == walk_list(tmpdir)
+finally:
+    shutil.rmtree(tmpdir)
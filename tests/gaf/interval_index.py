@@ -0,0 +1,90 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import random
+import gaf.netlist.conn
+
+# Check stabbing queries against a brute-force filter over the
+# intervals in insertion order.
+
+def brute_force(intervals, value):
+    return [item for a, b, item in intervals
+            if min(a, b) < value < max(a, b)]
+
+def check(d, expected):
+    assert sorted(d) == sorted(expected)
+    for key in expected:
+        assert len(d[key]) == len(expected[key])
+        for value in xrange(-2, 12):
+            assert gaf.netlist.conn._stab(d, key, value) == \
+                brute_force(expected[key], value)
+
+# points on interval boundaries are excluded
+
+index = gaf.netlist.conn.IntervalIndex()
+index.add(0, 10, 'a')
+index.add(5, 10, 'b')
+index.add(10, 5, 'c')   # reversed
+index.add(5, 10, 'd')   # duplicate
+assert index.stab(0) == []
+assert index.stab(1) == ['a']
+assert index.stab(5) == ['a']
+assert index.stab(6) == ['a', 'b', 'c', 'd']
+assert index.stab(10) == []
+assert index.stab(11) == []
+
+# re-adding an item moves it to the end
+index.remove('a')
+index.add(0, 10, 'a')
+assert index.stab(6) == ['b', 'c', 'd', 'a']
+
+# degenerate intervals contain nothing
+index = gaf.netlist.conn.IntervalIndex()
+index.add(3, 3, 'a')
+assert index.stab(3) == []
+assert gaf.netlist.conn._stab({}, 0, 3) == []
+
+# random changes, with and without queries in between
+
+random.seed(0)
+
+d = {}
+expected = {}
+counter = 0
+for i in xrange(2000):
+    key = random.randint(0, 3)
+    if expected.get(key) and random.randint(0, 2) == 0:
+        entry = random.choice(expected[key])
+        gaf.netlist.conn._remove_interval(d, key, entry[2])
+        expected[key].remove(entry)
+        if not expected[key]:
+            del expected[key]
+    else:
+        a = random.randint(0, 10)
+        b = random.randint(0, 10)
+        if expected.get(key) and random.randint(0, 4) == 0:
+            # duplicate of an existing interval
+            a, b = random.choice(expected[key])[:2]
+        gaf.netlist.conn._add_interval(d, key, a, b, counter)
+        expected.setdefault(key, []).append((a, b, counter))
+        counter += 1
+
+    # only query (and thereby rebuild the trees) from time to time,
+    # so some removals hit an outdated tree
+    if random.randint(0, 3) == 0:
+        check(d, expected)
+
+check(d, expected)
@@ -0,0 +1,55 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+# Benchmark for connecting and traversing a long net.
+#
+# Generates a synthetic sheet with a single daisy-chained net of
+# COUNT segments (100,000 by default) and prints how long it takes
+# to build the connection map and to traverse the net.  This isn't
+# run as part of the test suite; invoke it manually as
+#
+#     PYTHONPATH=.../built-packages python net_chain_bench.py [COUNT]
+
+import sys, time
+import xorn.proxy
+import xorn.storage
+import gaf.netlist.blueprint
+import gaf.netlist.conn
+
+def make_chain(count):
+    rev = xorn.storage.Revision()
+    for i in xrange(count):
+        rev.add_object(xorn.storage.Net(x = i * 100, y = 0, width = 100))
+    rev.finalize()
+    return xorn.proxy.RevisionProxy(rev)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rev = make_chain(count)
+
+    start = time.time()
+    cmap = gaf.netlist.conn.ConnectionMap(rev)
+    print 'building connection map: %.2f s' % (time.time() - start)
+
+    instances = list(gaf.netlist.conn.all_net_instances_in_revision(rev))
+    start = time.time()
+    netY = []
+    gaf.netlist.blueprint.traverse_net(cmap, instances[0], {}, netY)
+    print 'traversing net: %.2f s' % (time.time() - start)
+    assert len(netY) == count
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import StringIO, sys, threading, time
+import xorn.storage
+import gaf.clib
+import gaf.fileformat
+import gaf.read
+
+SCHEMATIC_SCH = """v 20140308 2
+C 0 0 1 0 0 a.sym
+C 500 0 1 0 0 b.sym
+C 1000 0 1 0 0 a.sym
+C 1500 0 1 0 0 EMBEDDEDc.sym
+[
+C 0 0 1 0 0 d.sym
+]
+C 2000 0 1 0 0 broken.sym
+"""
+
+SCHEMATIC_SCH_XML = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<schematic xmlns="https://hedmen.org/xorn/schematic/">
+  <content>
+    <component x="0" y="0" symbol="a"/>
+  </content>
+  <symbol id="a" name="a.sym" mode="referenced"/>
+  <symbol id="b" name="b.sym" mode="omitted"/>
+  <symbol id="c" mode="embedded">
+    <content/>
+  </symbol>
+</schematic>
+"""
+
+SYMBOL_WITH_WARNING = """v 20150930 2
+A 0 0 0 0 90 3 0 0 0 -1 -1
+"""
+
+assert gaf.read.referenced_symbol_names(
+    SCHEMATIC_SCH, gaf.fileformat.FORMAT_SCH) == [
+        'a.sym', 'b.sym', 'd.sym', 'broken.sym']
+assert gaf.read.referenced_symbol_names(
+    SCHEMATIC_SCH_XML, gaf.fileformat.FORMAT_SCH_XML) == ['a.sym', 'b.sym']
+
+class MockupSource:
+    max_jobs = 2
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.requested = []
+
+    def list(self):
+        return ['a.sym', 'b.sym', 'broken.sym', 'd.sym', 'e.sym', 'f.sym',
+                'unused.sym', 'warn.sym']
+
+    def get(self, symbol):
+        with self.lock:
+            self.requested.append(symbol)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(.05)
+            if symbol == 'broken.sym':
+                raise ValueError
+            if symbol in ['unused.sym', 'warn.sym']:
+                return gaf.read.read_file(
+                    StringIO.StringIO(SYMBOL_WITH_WARNING), symbol,
+                    gaf.fileformat.FORMAT_SYM)
+            return xorn.storage.Revision()
+        finally:
+            with self.lock:
+                self.running -= 1
+
+source = MockupSource()
+gaf.clib.add_source(source, '<test source>')
+
+gaf.clib.preload_symbols(['a.sym', 'b.sym', 'd.sym', 'e.sym', 'f.sym',
+                          'broken.sym', 'missing.sym', 'a.sym'])
+assert sorted(source.requested) == [
+    'a.sym', 'b.sym', 'broken.sym', 'd.sym', 'e.sym', 'f.sym']
+assert source.max_running == 2
+
+# preloaded symbols aren't requested again
+del source.requested[:]
+assert gaf.clib.lookup_symbol('a.sym').prim_objs is not None
+try:
+    gaf.clib.lookup_symbol('broken.sym')
+except ValueError:
+    pass
+else:
+    raise AssertionError
+assert source.requested == []
+
+# the error is only raised once
+try:
+    gaf.clib.lookup_symbol('broken.sym')
+except ValueError:
+    pass
+else:
+    raise AssertionError
+assert source.requested == ['broken.sym']
+
+# reading a schematic preloads the referenced symbols
+gaf.clib.refresh()
+del source.requested[:]
+rev = gaf.read.read_file(StringIO.StringIO(SCHEMATIC_SCH.replace(
+                             'broken.sym', 'e.sym')), '<test data>',
+                         gaf.fileformat.FORMAT_SCH, load_symbols = True)
+assert sorted(source.requested) == ['a.sym', 'b.sym', 'd.sym', 'e.sym']
+
+# messages logged while preloading are printed when the symbol is
+# looked up, and dropped if it never is
+stderr = sys.stderr
+sys.stderr = StringIO.StringIO()
+try:
+    gaf.clib.preload_symbols(['unused.sym', 'warn.sym'])
+    assert sys.stderr.getvalue() == ''
+    gaf.clib.lookup_symbol('warn.sym')
+    assert sys.stderr.getvalue() == \
+        'warn.sym:2: warning: arc has radius zero\n'
+    gaf.clib.lookup_symbol('warn.sym')
+    assert sys.stderr.getvalue() == \
+        'warn.sym:2: warning: arc has radius zero\n'
+    gaf.clib.refresh()
+    gaf.clib.lookup_symbol('warn.sym')
+    assert sys.stderr.getvalue() == \
+        'warn.sym:2: warning: arc has radius zero\n' * 2
+finally:
+    sys.stderr = stderr
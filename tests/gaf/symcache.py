@@ -0,0 +1,122 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import os, shutil, StringIO, sys, tempfile
+import xorn.storage
+import gaf.clib
+import gaf.symcache
+
+# dumping and loading a revision preserves data and attachment
+
+rev = xorn.storage.Revision()
+line = xorn.storage.LineAttr()
+line.width = 10.
+line.dash_style = 2
+pin = rev.add_object(xorn.storage.Net(
+    x = 0, y = 100, width = 300, color = 1, is_pin = True))
+rev.add_object(xorn.storage.Box(
+    x = 300, y = 0, width = 400, height = 200, color = 3, line = line))
+attrib = rev.add_object(xorn.storage.Text(
+    x = 100, y = 100, color = 5, text_size = 10, text = 'pinnumber=1'))
+rev.relocate_object(attrib, pin, None)
+
+copy = gaf.symcache.load_revision(gaf.symcache.dump_revision(rev))
+net_ob, attrib_ob, box_ob = copy.get_objects()
+assert copy.get_object_location(attrib_ob) == (net_ob, 0)
+assert copy.get_object_data(net_ob).is_pin == True
+assert copy.get_object_data(net_ob).width == 300
+assert copy.get_object_data(attrib_ob).text == 'pinnumber=1'
+assert copy.get_object_data(box_ob).line.width == 10.
+assert copy.get_object_data(box_ob).line.dash_style == 2
+
+# components reference other symbols and can't be cached
+
+rev.add_object(xorn.storage.Component())
+try:
+    gaf.symcache.dump_revision(rev)
+except gaf.symcache.UncacheableError:
+    pass
+else:
+    raise AssertionError
+
+# symbols are read from the cache until the file changes
+
+def write_symbol(path, x):
+    f = open(path, 'w')
+    try:
+        f.write('v 20150930 2\nL %d 0 100 0 3 0 0 0 -1 -1\n' % x)
+    finally:
+        f.close()
+
+def get_x(source, symbol):
+    rev = source.get(symbol).rev
+    ob, = rev.get_objects()
+    return rev.get_object_data(ob).x
+
+tmpdir = tempfile.mkdtemp()
+try:
+    libdir = os.path.join(tmpdir, 'lib')
+    cachedir = os.path.join(tmpdir, 'cache')
+    os.mkdir(libdir)
+    write_symbol(os.path.join(libdir, 'foo.sym'), 1)
+    write_symbol(os.path.join(libdir, 'bar.sym'), 2)
+
+    for recursive in [False, True]:
+        source = gaf.clib.DirectorySource(libdir, recursive, cachedir)
+        assert sorted(source.list()) == ['bar.sym', 'foo.sym']
+        assert get_x(source, 'foo.sym') == 1
+
+    # recursive and non-recursive listings don't replace each other
+    for recursive in [False, True]:
+        assert gaf.symcache.SymbolCache(
+            cachedir, libdir, recursive).load_listing() is not None
+
+    cache = gaf.symcache.SymbolCache(cachedir, libdir)
+    path = os.path.join(libdir, 'foo.sym')
+    assert cache.load_symbol(path, False) is not None
+    assert cache.load_symbol(path, True) is None
+
+    write_symbol(path, 1000)
+    assert cache.load_symbol(path, False) is None
+    for recursive in [False, True]:
+        source = gaf.clib.DirectorySource(libdir, recursive, cachedir)
+        assert get_x(source, 'foo.sym') == 1000
+
+    os.unlink(os.path.join(libdir, 'bar.sym'))
+    for recursive in [False, True]:
+        source = gaf.clib.DirectorySource(libdir, recursive, cachedir)
+        assert list(source.list()) == ['foo.sym']
+
+    # warnings are repeated when a symbol is loaded from the cache
+    path = os.path.join(libdir, 'warn.sym')
+    f = open(path, 'w')
+    try:
+        f.write('v 20150930 2\nA 0 0 0 0 90 3 0 0 0 -1 -1\n')
+    finally:
+        f.close()
+    warning = '%s:2: warning: arc has radius zero\n' % path
+    stderr = sys.stderr
+    try:
+        for i in xrange(2):
+            sys.stderr = StringIO.StringIO()
+            source = gaf.clib.DirectorySource(libdir, False, cachedir)
+            source.get('warn.sym')
+            assert sys.stderr.getvalue() == warning
+        assert cache.load_symbol(path, False)[1] == [warning]
+    finally:
+        sys.stderr = stderr
+finally:
+    shutil.rmtree(tmpdir)
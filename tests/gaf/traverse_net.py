@@ -0,0 +1,55 @@
+# Copyright (C) 2013-2021 Roland Lutz
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+
+import sys
+import xorn.proxy
+import xorn.storage
+import gaf.netlist.blueprint
+import gaf.netlist.conn
+
+# a chain of segments much longer than the recursion limit
+
+COUNT = sys.getrecursionlimit() * 3
+
+rev = xorn.storage.Revision()
+for i in xrange(COUNT):
+    rev.add_object(xorn.storage.Net(x = i * 100, y = 0, width = 100))
+
+# a separate net with a T-junction
+rev.add_object(xorn.storage.Net(x = 0, y = 1000, width = 200))
+rev.add_object(xorn.storage.Net(x = 100, y = 1000, height = 100))
+rev.add_object(xorn.storage.Net(x = 200, y = 1000, height = -100))
+rev.finalize()
+
+rev = xorn.proxy.RevisionProxy(rev)
+cmap = gaf.netlist.conn.ConnectionMap(rev)
+instances = list(gaf.netlist.conn.all_net_instances_in_revision(rev))
+
+netsY = []
+netsY_by_instance = {}
+for instance in instances:
+    if instance not in netsY_by_instance:
+        netY = []
+        netsY.append(netY)
+        gaf.netlist.blueprint.traverse_net(
+            cmap, instance, netsY_by_instance, netY)
+
+assert len(netsY) == 2
+assert netsY[0] == instances[:COUNT]
+assert netsY[1] == [instances[COUNT], instances[COUNT + 2],
+                    instances[COUNT + 1]]
+assert all(netsY_by_instance[instance] is netsY[0]
+           for instance in instances[:COUNT])
@@ -121,9 +121,20 @@ assert rp1.toplevel_objects() == []
 assert rp.all_objects() == [op, op1]
 assert rp1.all_objects() == []
 
+assert list(rp.iter_objects()) == [op, op1]
+assert list(rp1.iter_objects()) == []
+
 assert rp.selected_objects(sel) == [op]
 assert rp1.selected_objects(sel) == []
 
+assert [(o, type(data), attached_to, pos) for o, data, attached_to, pos in
+        rp.objects_with_data()] == [(op, xorn.storage.Box, None, 0),
+                                    (op1, xorn.storage.Box, None, 1)]
+assert rp.objects_with_data(xorn.storage.Net) == []
+assert rp.object_locations([op1, op, op1]) == [(None, 1), (None, 0), (None, 1)]
+assert rp1.object_locations([]) == []
+assert throws(rp1.object_locations, [op]) == KeyError
+
 op2 = rp1.add_object(xorn.storage.Box())
 assert op2.rev == rev1
 assert rev1.object_exists(op2.ob)
@@ -0,0 +1,161 @@
+/* Copyright (C) 2013-2021 Roland Lutz
+
+   This program is free software; you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation; either version 2 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program; if not, write to the Free Software Foundation,
+   Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
+
+#include <xornstorage.h>
+#include <assert.h>
+#include <stdlib.h>
+#include <string.h>
+
+#define E_OK      ((xorn_error_t) -1)
+#define E_NOTRANS xorn_error_revision_not_transient
+#define E_INVARG  xorn_error_invalid_argument
+#define E_INVDATA xorn_error_invalid_object_data
+#define E_IHIER   xorn_error_invalid_parent
+
+
+static void check(xorn_revision_t rev, size_t count,
+		  const xorn_obtype_t *types, const void *const *data,
+		  const ptrdiff_t *attach_to, xorn_error_t expected_result,
+		  size_t expected_count)
+{
+	xorn_object_t new_objects[4];
+	xorn_object_t *objects;
+	size_t objects_count;
+	xorn_error_t err;
+
+	err = E_OK;
+	assert(xorn_add_objects(rev, count, types, data, attach_to,
+				new_objects, &err)
+		   == (expected_result == E_OK ? 0 : -1));
+	assert(err == expected_result);
+
+	assert(xorn_get_objects(rev, &objects, &objects_count) == 0);
+	assert(objects_count == expected_count);
+	free(objects);
+}
+
+int main(void)
+{
+	xorn_revision_t rev0, rev1;
+	xorn_object_t obs[4], *objects, attached_to;
+	size_t count;
+	unsigned int position;
+	struct xornsch_net net_data;
+	struct xornsch_component component_data;
+	struct xornsch_text text_data, invalid_text_data;
+	xorn_obtype_t types[4];
+	const void *data[4];
+	ptrdiff_t attach_to[4];
+
+	memset(&net_data, 0, sizeof net_data);
+	net_data.color = 4;
+	memset(&component_data, 0, sizeof component_data);
+	memset(&text_data, 0, sizeof text_data);
+	text_data.text.s = "refdes=R1";
+	text_data.text.len = strlen(text_data.text.s);
+	memset(&invalid_text_data, 0, sizeof invalid_text_data);
+	invalid_text_data.color = 21;
+
+	types[0] = xornsch_obtype_net;       data[0] = &net_data;
+	types[1] = xornsch_obtype_component; data[1] = &component_data;
+	types[2] = xornsch_obtype_text;      data[2] = &text_data;
+	types[3] = xornsch_obtype_text;      data[3] = &text_data;
+	attach_to[0] = -1;
+	attach_to[1] = -1;
+	attach_to[2] = 1;
+	attach_to[3] = 0;
+
+	rev0 = xorn_new_revision(NULL);
+	assert(rev0 != NULL);
+
+	/* adding no objects is a no-op */
+	check(rev0, 0, types, data, attach_to, E_OK, 0);
+
+	/* invalid arguments leave the revision unchanged */
+	types[0] = xorn_obtype_none;
+	check(rev0, 4, types, data, attach_to, E_INVARG, 0);
+	types[0] = xornsch_obtype_net;
+	data[1] = NULL;
+	check(rev0, 4, types, data, attach_to, E_INVARG, 0);
+	data[1] = &component_data;
+	attach_to[2] = 2;
+	check(rev0, 4, types, data, attach_to, E_INVARG, 0);
+	attach_to[2] = 3;
+	check(rev0, 4, types, data, attach_to, E_INVARG, 0);
+	attach_to[2] = -2;
+	check(rev0, 4, types, data, attach_to, E_INVARG, 0);
+	attach_to[2] = 1;
+
+	data[3] = &invalid_text_data;
+	check(rev0, 4, types, data, attach_to, E_INVDATA, 0);
+	data[3] = &text_data;
+
+	/* only text can be attached, and only to nets and components */
+	attach_to[1] = 0;
+	check(rev0, 4, types, data, attach_to, E_IHIER, 0);
+	attach_to[1] = -1;
+	attach_to[3] = 2;
+	check(rev0, 4, types, data, attach_to, E_IHIER, 0);
+	attach_to[3] = 0;
+
+	/* objects without attachment */
+	check(rev0, 2, types, data, NULL, E_OK, 2);
+
+	/* objects with attachment */
+	assert(xorn_add_objects(rev0, 4, types, data, attach_to,
+				obs, NULL) == 0);
+	assert(xorn_get_objects(rev0, &objects, &count) == 0);
+	assert(count == 6);
+	assert(objects[2] == obs[0]);
+	assert(objects[3] == obs[3]);
+	assert(objects[4] == obs[1]);
+	assert(objects[5] == obs[2]);
+	free(objects);
+
+	assert(xorn_get_object_type(rev0, obs[0]) == xornsch_obtype_net);
+	assert(xorn_get_object_type(rev0, obs[1]) == xornsch_obtype_component);
+	assert(xornsch_get_text_data(rev0, obs[2])->text.len ==
+	       strlen("refdes=R1"));
+
+	assert(xorn_get_object_location(
+		       rev0, obs[0], &attached_to, &position) == 0);
+	assert(attached_to == NULL);
+	assert(position == 2);
+	assert(xorn_get_object_location(
+		       rev0, obs[2], &attached_to, &position) == 0);
+	assert(attached_to == obs[1]);
+	assert(position == 0);
+	assert(xorn_get_object_location(
+		       rev0, obs[3], &attached_to, &position) == 0);
+	assert(attached_to == obs[0]);
+	assert(position == 0);
+
+	/* the revision must be transient */
+	xorn_finalize_revision(rev0);
+	check(rev0, 4, types, data, attach_to, E_NOTRANS, 6);
+
+	/* changing a copy doesn't affect the original */
+	rev1 = xorn_new_revision(rev0);
+	assert(rev1 != NULL);
+	check(rev1, 4, types, data, attach_to, E_OK, 10);
+	assert(xorn_get_objects(rev0, &objects, &count) == 0);
+	assert(count == 6);
+	free(objects);
+
+	xorn_free_revision(rev1);
+	xorn_free_revision(rev0);
+	return 0;
+}
@@ -0,0 +1,139 @@
+/* Copyright (C) 2013-2021 Roland Lutz
+
+   This program is free software; you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation; either version 2 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program; if not, write to the Free Software Foundation,
+   Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
+
+#include <xornstorage.h>
+#include <assert.h>
+#include <stdlib.h>
+#include <string.h>
+
+
+static void assert_selected(xorn_revision_t rev, xorn_selection_t sel,
+			    xorn_object_t *expected, size_t expected_count)
+{
+	xorn_object_t *objects;
+	size_t count, i, j;
+
+	assert(sel != NULL);
+	assert(xorn_get_selected_objects(rev, sel, &objects, &count) == 0);
+	assert(count == expected_count);
+	for (i = 0; i < expected_count; i++) {
+		for (j = 0; j < count; j++)
+			if (objects[j] == expected[i])
+				break;
+		assert(j < count);
+	}
+	free(objects);
+	xorn_free_selection(sel);
+}
+
+int main(void)
+{
+	xorn_revision_t rev0, rev1, rev2;
+	xorn_object_t net, pin, text, copy;
+	xorn_selection_t sel;
+	xorn_object_t expected[3];
+
+	struct xornsch_net net_data;
+	struct xornsch_text text_data;
+
+	rev0 = xorn_new_revision(NULL);
+	assert(rev0 != NULL);
+
+	memset(&net_data, 0, sizeof net_data);
+	net_data.color = 4;
+	net = xornsch_add_net(rev0, &net_data, NULL);
+	assert(net != NULL);
+
+	net_data.color = 1;
+	net_data.is_pin = true;
+	pin = xornsch_add_net(rev0, &net_data, NULL);
+	assert(pin != NULL);
+
+	memset(&text_data, 0, sizeof text_data);
+	text_data.color = 4;
+	text_data.visibility = true;
+	text = xornsch_add_text(rev0, &text_data, NULL);
+	assert(text != NULL);
+
+	xorn_finalize_revision(rev0);
+
+	expected[0] = net;
+	expected[1] = text;
+	assert_selected(rev0, xornsch_select_by_color(rev0, 4), expected, 2);
+	assert_selected(rev0, xornsch_select_by_color(rev0, 5), NULL, 0);
+	expected[0] = pin;
+	assert_selected(rev0, xornsch_select_by_is_pin(rev0, true),
+			expected, 1);
+	expected[0] = net;
+	assert_selected(rev0, xornsch_select_by_is_pin(rev0, false),
+			expected, 1);
+	expected[0] = net;
+	expected[1] = pin;
+	assert_selected(rev0, xornsch_select_by_is_bus(rev0, false),
+			expected, 2);
+	expected[0] = text;
+	assert_selected(rev0, xornsch_select_by_visibility(rev0, true),
+			expected, 1);
+
+	/* changing objects updates the index of the copy only */
+
+	rev1 = xorn_new_revision(rev0);
+	assert(rev1 != NULL);
+
+	net_data.color = 4;
+	assert(xornsch_set_net_data(rev1, pin, &net_data, NULL) == 0);
+	assert(xorn_delete_object(rev1, text, NULL) == 0);
+
+	sel = xorn_select_object(net);
+	assert(sel != NULL);
+	assert(xornsch_set_color(rev1, sel, 5, NULL) == 0);
+	xorn_free_selection(sel);
+
+	xorn_finalize_revision(rev1);
+
+	expected[0] = pin;
+	assert_selected(rev1, xornsch_select_by_color(rev1, 4), expected, 1);
+	expected[0] = net;
+	assert_selected(rev1, xornsch_select_by_color(rev1, 5), expected, 1);
+	assert_selected(rev1, xornsch_select_by_color(rev1, 1), NULL, 0);
+	assert_selected(rev1, xornsch_select_by_visibility(rev1, true),
+			NULL, 0);
+
+	expected[0] = net;
+	expected[1] = text;
+	assert_selected(rev0, xornsch_select_by_color(rev0, 4), expected, 2);
+	expected[0] = pin;
+	assert_selected(rev0, xornsch_select_by_color(rev0, 1), expected, 1);
+
+	/* copied objects are indexed as well */
+
+	rev2 = xorn_new_revision(rev1);
+	assert(rev2 != NULL);
+	copy = xorn_copy_object(rev2, rev1, pin, NULL);
+	assert(copy != NULL);
+	xorn_finalize_revision(rev2);
+
+	expected[0] = pin;
+	expected[1] = copy;
+	assert_selected(rev2, xornsch_select_by_color(rev2, 4), expected, 2);
+	assert_selected(rev2, xornsch_select_by_is_pin(rev2, true),
+			expected, 2);
+
+	xorn_free_revision(rev2);
+	xorn_free_revision(rev1);
+	xorn_free_revision(rev0);
+	return 0;
+}
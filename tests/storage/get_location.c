@@ -167,9 +167,59 @@ static void check_attach(void)
 	xorn_free_revision(rev);
 }
 
+static void check_bulk(void)
+{
+	xorn_revision_t rev;
+	xorn_object_t N, a, b, objects[4], attached_to[4];
+	unsigned int positions[4];
+	struct xornsch_net net_data;
+	struct xornsch_text text_data;
+
+	assert(rev = xorn_new_revision(NULL));
+
+	memset(&net_data, 0, sizeof net_data);
+	assert(N = xornsch_add_net(rev, &net_data, NULL));
+
+	memset(&text_data, 0, sizeof text_data);
+	assert(a = xornsch_add_text(rev, &text_data, NULL));
+	assert(b = xornsch_add_text(rev, &text_data, NULL));
+	assert(xorn_relocate_object(rev, b, N, _, NULL) == 0);
+
+	objects[0] = b;
+	objects[1] = a;
+	objects[2] = N;
+	objects[3] = b;
+
+	assert(xorn_get_object_locations(rev, objects, 0, NULL, NULL) == 0);
+	assert(xorn_get_object_locations(rev, objects, 4, NULL, NULL) == 0);
+	assert(xorn_get_object_locations(rev, objects, 4,
+					 attached_to, positions) == 0);
+	assert(attached_to[0] == N && positions[0] == 0);
+	assert(attached_to[1] == _ && positions[1] == 1);
+	assert(attached_to[2] == _ && positions[2] == 0);
+	assert(attached_to[3] == N && positions[3] == 0);
+
+	positions[1] = -1;
+	assert(xorn_get_object_locations(rev, objects, 2,
+					 NULL, positions) == 0);
+	assert(positions[0] == 0);
+	assert(positions[1] == 1);
+
+	assert(xorn_delete_object(rev, a, NULL) == 0);
+	assert(xorn_get_object_locations(rev, objects, 4,
+					 attached_to, positions) == -1);
+	assert(xorn_get_object_locations(rev, objects + 2, 2,
+					 attached_to, positions) == 0);
+	assert(attached_to[0] == _ && positions[0] == 0);
+	assert(attached_to[1] == N && positions[1] == 0);
+
+	xorn_free_revision(rev);
+}
+
 int main(void)
 {
 	check_order();
 	check_attach();
+	check_bulk();
 	return 0;
 }
@@ -0,0 +1,106 @@
+/* Copyright (C) 2013-2021 Roland Lutz
+
+   This program is free software; you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation; either version 2 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program; if not, write to the Free Software Foundation,
+   Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
+
+#include "Setup.h"
+#include <stdlib.h>
+
+#define _ NULL
+
+
+static void assert_order(xorn_revision_t rev)
+{
+	xorn_object_t *objects, ob = NULL;
+	size_t count, i;
+
+	assert(xorn_get_objects(rev, &objects, &count) == 0);
+	for (i = 0; i < count; i++) {
+		ob = xorn_get_next_object(rev, ob);
+		assert(ob == objects[i]);
+	}
+	assert(xorn_get_next_object(rev, ob) == NULL);
+	free(objects);
+}
+
+int main(void)
+{
+	xorn_revision_t rev0, rev1, rev2, rev3, rev;
+	xorn_object_t ob0, ob1a, ob1b, N0, N1, a, b, c, t;
+	struct xornsch_text text_data;
+
+	setup(&rev0, &rev1, &rev2, &rev3, &ob0, &ob1a, &ob1b);
+
+	assert(xorn_get_next_object(rev0, _) == NULL);
+	assert(xorn_get_next_object(rev0, ob0) == NULL);
+
+	assert(xorn_get_next_object(rev1, _) == ob0);
+	assert(xorn_get_next_object(rev1, ob0) == NULL);
+	assert(xorn_get_next_object(rev1, ob1a) == NULL);
+
+	assert(xorn_get_next_object(rev2, _) == ob0);
+	assert(xorn_get_next_object(rev2, ob0) == ob1a);
+	assert(xorn_get_next_object(rev2, ob1a) == ob1b);
+	assert(xorn_get_next_object(rev2, ob1b) == NULL);
+
+	assert(xorn_get_next_object(rev3, _) == ob0);
+	assert(xorn_get_next_object(rev3, ob0) == ob1b);
+	assert(xorn_get_next_object(rev3, ob1a) == NULL);
+	assert(xorn_get_next_object(rev3, ob1b) == NULL);
+
+	/* attached objects follow the object they are attached to */
+
+	assert(rev = xorn_new_revision(NULL));
+	assert(N0 = xornsch_add_net(rev, &net_data, NULL));
+	assert(N1 = xornsch_add_net(rev, &net_data, NULL));
+
+	memset(&text_data, 0, sizeof text_data);
+	assert(a = xornsch_add_text(rev, &text_data, NULL));
+	assert(b = xornsch_add_text(rev, &text_data, NULL));
+	assert(c = xornsch_add_text(rev, &text_data, NULL));
+	assert(t = xornsch_add_text(rev, &text_data, NULL));
+
+	assert(xorn_relocate_object(rev, a, N0, _, NULL) == 0);
+	assert(xorn_relocate_object(rev, b, N0, _, NULL) == 0);
+	assert(xorn_relocate_object(rev, c, N1, _, NULL) == 0);
+	assert_order(rev);
+
+	assert(xorn_get_next_object(rev, _) == N0);
+	assert(xorn_get_next_object(rev, N0) == a);
+	assert(xorn_get_next_object(rev, a) == b);
+	assert(xorn_get_next_object(rev, b) == N1);
+	assert(xorn_get_next_object(rev, N1) == c);
+	assert(xorn_get_next_object(rev, c) == t);
+	assert(xorn_get_next_object(rev, t) == NULL);
+
+	assert(xorn_relocate_object(rev, t, _, N0, NULL) == 0);
+	assert(xorn_relocate_object(rev, b, N0, a, NULL) == 0);
+	assert(xorn_delete_object(rev, N1, NULL) == 0);
+	assert_order(rev);
+
+	assert(xorn_get_next_object(rev, _) == t);
+	assert(xorn_get_next_object(rev, t) == N0);
+	assert(xorn_get_next_object(rev, N0) == b);
+	assert(xorn_get_next_object(rev, b) == a);
+	assert(xorn_get_next_object(rev, a) == NULL);
+	assert(xorn_get_next_object(rev, N1) == NULL);
+	assert(xorn_get_next_object(rev, c) == NULL);
+
+	xorn_free_revision(rev);
+	xorn_free_revision(rev3);
+	xorn_free_revision(rev2);
+	xorn_free_revision(rev1);
+	xorn_free_revision(rev0);
+	return 0;
+}
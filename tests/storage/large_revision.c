@@ -0,0 +1,140 @@
+/* Copyright (C) 2013-2021 Roland Lutz
+
+   This program is free software; you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation; either version 2 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program; if not, write to the Free Software Foundation,
+   Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
+
+#include <xornstorage.h>
+#include <assert.h>
+#include <stdlib.h>
+#include <string.h>
+
+#define COUNT 1000
+
+
+static void assert_objects(xorn_revision_t rev,
+			   xorn_object_t *expected, size_t expected_count)
+{
+	xorn_object_t *objects;
+	size_t count, i;
+
+	assert(xorn_get_objects(rev, &objects, &count) == 0);
+	assert(count == expected_count);
+	for (i = 0; i < count; i++)
+		assert(objects[i] == expected[i]);
+	free(objects);
+}
+
+static void assert_diff(
+	int (*fun)(xorn_revision_t, xorn_revision_t,
+		   xorn_object_t **, size_t *),
+	xorn_revision_t from, xorn_revision_t to,
+	xorn_object_t *expected, size_t expected_count)
+{
+	xorn_object_t *objects;
+	size_t count, i, j;
+
+	assert(fun(from, to, &objects, &count) == 0);
+	assert(count == expected_count);
+	for (i = 0; i < expected_count; i++) {
+		for (j = 0; j < count; j++)
+			if (objects[j] == expected[i])
+				break;
+		assert(j < count);
+	}
+	free(objects);
+}
+
+int main(void)
+{
+	xorn_revision_t rev0, rev1, rev2;
+	xorn_object_t obs[COUNT], front[COUNT];
+	xorn_object_t expected[2 * COUNT];
+	struct xornsch_net net_data;
+	size_t i;
+
+	memset(&net_data, 0, sizeof net_data);
+	net_data.color = 4;
+
+	rev0 = xorn_new_revision(NULL);
+	assert(rev0 != NULL);
+	for (i = 0; i < COUNT; i++) {
+		net_data.pos.x = i;
+		obs[i] = xornsch_add_net(rev0, &net_data, NULL);
+		assert(obs[i] != NULL);
+	}
+	xorn_finalize_revision(rev0);
+	assert_objects(rev0, obs, COUNT);
+
+	/* changing a copy doesn't affect the original */
+
+	rev1 = xorn_new_revision(rev0);
+	assert(rev1 != NULL);
+	assert_diff(xorn_get_added_objects, rev0, rev1, NULL, 0);
+	assert_diff(xorn_get_removed_objects, rev0, rev1, NULL, 0);
+	assert_diff(xorn_get_modified_objects, rev0, rev1, NULL, 0);
+
+	assert(xorn_delete_object(rev1, obs[10], NULL) == 0);
+	assert(xorn_delete_object(rev1, obs[500], NULL) == 0);
+	net_data.pos.x = -1;
+	assert(xornsch_set_net_data(rev1, obs[20], &net_data, NULL) == 0);
+	assert(xornsch_set_net_data(rev1, obs[999], &net_data, NULL) == 0);
+
+	assert_objects(rev0, obs, COUNT);
+	assert(xornsch_get_net_data(rev0, obs[20])->pos.x == 20.);
+	assert(xornsch_get_net_data(rev1, obs[20])->pos.x == -1.);
+
+	assert_diff(xorn_get_added_objects, rev0, rev1, NULL, 0);
+	expected[0] = obs[10];
+	expected[1] = obs[500];
+	assert_diff(xorn_get_removed_objects, rev0, rev1, expected, 2);
+	expected[0] = obs[20];
+	expected[1] = obs[999];
+	assert_diff(xorn_get_modified_objects, rev0, rev1, expected, 2);
+	assert_diff(xorn_get_modified_objects, rev1, rev0, expected, 2);
+
+	/* repeatedly inserting objects at the same position */
+
+	rev2 = xorn_new_revision(rev0);
+	assert(rev2 != NULL);
+	for (i = 0; i < COUNT; i++) {
+		front[i] = xornsch_add_net(rev2, &net_data, NULL);
+		assert(front[i] != NULL);
+		assert(xorn_relocate_object(
+			       rev2, front[i], NULL,
+			       i == 0 ? obs[0] : front[i - 1], NULL) == 0);
+	}
+	for (i = 0; i < COUNT; i++) {
+		expected[i] = front[COUNT - 1 - i];
+		expected[COUNT + i] = obs[i];
+	}
+	assert_objects(rev2, expected, 2 * COUNT);
+	assert_diff(xorn_get_added_objects, rev0, rev2, front, COUNT);
+	assert_diff(xorn_get_removed_objects, rev2, rev0, front, COUNT);
+	assert_objects(rev0, obs, COUNT);
+
+	/* moving objects between two siblings */
+
+	for (i = 1; i < COUNT; i++)
+		assert(xorn_relocate_object(
+			       rev2, obs[i], NULL, obs[0], NULL) == 0);
+	for (i = 0; i < COUNT - 1; i++)
+		expected[COUNT + i] = obs[i + 1];
+	expected[2 * COUNT - 1] = obs[0];
+	assert_objects(rev2, expected, 2 * COUNT);
+
+	xorn_free_revision(rev2);
+	xorn_free_revision(rev1);
+	xorn_free_revision(rev0);
+	return 0;
+}
@@ -0,0 +1,159 @@
+/* Copyright (C) 2013-2021 Roland Lutz
+
+   This program is free software; you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation; either version 2 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program; if not, write to the Free Software Foundation,
+   Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.  */
+
+#include <xornstorage.h>
+#include <assert.h>
+#include <stdlib.h>
+#include <string.h>
+
+#define COUNT 1000
+
+
+static void assert_selected(xorn_revision_t rev, xorn_selection_t sel,
+			    xorn_object_t *obs, int (*pred)(size_t))
+{
+	xorn_object_t *objects;
+	size_t count, expected_count = 0, i;
+
+	assert(sel != NULL);
+	for (i = 0; i < COUNT; i++) {
+		assert(xorn_object_is_selected(rev, sel, obs[i]) == !!pred(i));
+		if (pred(i))
+			expected_count++;
+	}
+
+	assert(xorn_get_selected_objects(rev, sel, &objects, &count) == 0);
+	assert(count == expected_count);
+	free(objects);
+	xorn_free_selection(sel);
+}
+
+static int is_even(size_t i)
+{
+	return i % 2 == 0;
+}
+
+static int is_multiple_of_3(size_t i)
+{
+	return i % 3 == 0;
+}
+
+static int is_even_or_multiple_of_3(size_t i)
+{
+	return i % 2 == 0 || i % 3 == 0;
+}
+
+static int is_multiple_of_6(size_t i)
+{
+	return i % 6 == 0;
+}
+
+static int is_odd_multiple_of_3(size_t i)
+{
+	return i % 2 != 0 && i % 3 == 0;
+}
+
+static int is_attached(size_t i)
+{
+	return i != 0;
+}
+
+static int is_any(size_t i)
+{
+	(void)i;
+	return 1;
+}
+
+static int is_odd(size_t i)
+{
+	return i % 2 != 0;
+}
+
+int main(void)
+{
+	xorn_revision_t rev;
+	xorn_object_t obs[COUNT];
+	xorn_selection_t evens, threes, sel, tmp;
+	struct xornsch_net net_data;
+	struct xornsch_text text_data;
+	size_t i;
+
+	memset(&net_data, 0, sizeof net_data);
+	net_data.color = 4;
+	memset(&text_data, 0, sizeof text_data);
+	text_data.color = 5;
+
+	rev = xorn_new_revision(NULL);
+	assert(rev != NULL);
+	obs[0] = xornsch_add_net(rev, &net_data, NULL);
+	assert(obs[0] != NULL);
+	for (i = 1; i < COUNT; i++) {
+		text_data.pos.x = i;
+		obs[i] = xornsch_add_text(rev, &text_data, NULL);
+		assert(obs[i] != NULL);
+	}
+
+	/* build selections by adding objects in reverse order */
+
+	evens = xorn_select_none();
+	threes = xorn_select_none();
+	assert(evens != NULL && threes != NULL);
+	for (i = COUNT; i-- > 0; ) {
+		if (i % 2 == 0) {
+			tmp = xorn_select_including(evens, obs[i]);
+			xorn_free_selection(evens);
+			evens = tmp;
+			assert(evens != NULL);
+		}
+		if (i % 3 == 0) {
+			tmp = xorn_select_including(threes, obs[i]);
+			xorn_free_selection(threes);
+			threes = tmp;
+			assert(threes != NULL);
+		}
+	}
+
+	/* including an object twice doesn't change the selection */
+	sel = xorn_select_including(evens, obs[0]);
+	assert_selected(rev, sel, obs, is_even);
+	sel = xorn_select_excluding(evens, obs[1]);
+	assert_selected(rev, sel, obs, is_even);
+
+	assert_selected(rev, xorn_select_union(threes, threes),
+			obs, is_multiple_of_3);
+	assert_selected(rev, xorn_select_union(evens, threes),
+			obs, is_even_or_multiple_of_3);
+	assert_selected(rev, xorn_select_intersection(evens, threes),
+			obs, is_multiple_of_6);
+	assert_selected(rev, xorn_select_difference(threes, evens),
+			obs, is_odd_multiple_of_3);
+	assert_selected(rev, xorn_select_all_except(rev, evens),
+			obs, is_odd);
+	assert_selected(rev, xorn_select_all(rev), obs, is_any);
+
+	/* attach texts to the net in reverse order */
+
+	for (i = COUNT - 1; i > 0; i--)
+		assert(xorn_relocate_object(rev, obs[i], obs[0],
+					    NULL, NULL) == 0);
+	assert_selected(rev, xorn_select_attached_to(rev, obs[0]),
+			obs, is_attached);
+
+	xorn_free_selection(threes);
+	xorn_free_selection(evens);
+	xorn_free_revision(rev);
+	return 0;
+}
@@ -24,8 +24,9 @@ static const char *caption = "Hello world";
 
 int main(void)
 {
-	xorn_revision_t rev0, rev1;
-	xorn_object_t ob;
+	xorn_revision_t rev0, rev1, rev2;
+	xorn_object_t ob, ob1;
+	char buf[32];
 
 	memset(&text_data, 0, sizeof text_data);
 	text_data.text.s = caption;
@@ -47,6 +48,26 @@ int main(void)
 	assert(text_return->text.s != NULL);
 	assert(text_return->text.s != caption);
 	assert(text_return->text.len == strlen(caption) + 1);
+	assert(memcmp(text_return->text.s, caption,
+		      text_return->text.len) == 0);
+
+	/* strings with the same contents share a buffer */
+
+	rev2 = xorn_new_revision(rev1);
+	assert(rev2 != NULL);
+	memcpy(buf, caption, strlen(caption) + 1);
+	text_data.text.s = buf;
+	ob1 = xornsch_add_text(rev2, &text_data, NULL);
+	assert(ob1 != NULL);
+	assert(xornsch_get_text_data(rev2, ob1)->text.s == text_return->text.s);
+
+	buf[0] = 'J';
+	assert(xornsch_set_text_data(rev2, ob1, &text_data, NULL) == 0);
+	assert(xornsch_get_text_data(rev2, ob1)->text.s != text_return->text.s);
+	assert(xornsch_get_text_data(rev2, ob1)->text.s[0] == 'J');
+	assert(xornsch_get_text_data(rev2, ob)->text.s == text_return->text.s);
+	xorn_free_revision(rev2);
+
 	assert(memcmp(text_return->text.s, caption,
 		      text_return->text.len) == 0);
 